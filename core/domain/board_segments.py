@@ -0,0 +1,31 @@
+import os
+
+# Sufijo del segmento delta: 'comunicados_25-26.csv' -> 'comunicados_25-26_delta.csv'
+DELTA_SUFFIX = "_delta"
+
+
+def delta_filename(filename):
+    """Nombre del segmento delta que acompaña a un CSV base."""
+    root, ext = os.path.splitext(filename)
+    return f"{root}{DELTA_SUFFIX}{ext}"
+
+
+def merge_segments(base_rows, delta_rows):
+    """
+    Une el CSV base de una temporada con su segmento delta.
+    El delta solo contiene mensajes posteriores a la última compactación, así que
+    va delante para conservar el orden de más reciente a más antiguo. Los mensajes
+    repetidos (p. ej. justo tras compactar) se quedan una sola vez, por 'id_hash'.
+    """
+    if not delta_rows:
+        return list(base_rows or [])
+    merged = []
+    seen = set()
+    for row in list(delta_rows) + list(base_rows or []):
+        id_hash = row.get("id_hash")
+        if id_hash in seen:
+            continue
+        if id_hash:
+            seen.add(id_hash)
+        merged.append(row)
+    return merged
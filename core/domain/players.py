@@ -0,0 +1,83 @@
+import sys
+from collections.abc import Mapping
+
+# Códigos de posición de Biwenger; cualquier otro valor se guarda como 0
+POSITION_CODES = (1, 2, 3, 4, 5)
+UNKNOWN_POSITION = 0
+
+
+class Player:
+    """
+    Jugador de la base de datos de Biwenger con solo los campos que usan las
+    herramientas. Usa '__slots__' para no arrastrar un diccionario por jugador.
+    """
+
+    __slots__ = ("id", "name", "position", "price")
+
+    def __init__(self, id, name, position=UNKNOWN_POSITION, price=0):
+        self.id = id
+        self.name = name
+        self.position = position
+        self.price = price
+
+    def __eq__(self, other):
+        if not isinstance(other, Player):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __repr__(self):
+        return (
+            f"Player(id={self.id!r}, name={self.name!r}, "
+            f"position={self.position!r}, price={self.price!r})"
+        )
+
+
+class PlayerCatalogue(Mapping):
+    """
+    Catálogo en memoria de jugadores indexado por ID (búsqueda O(1)).
+    Los nombres se internan para que los repetidos compartan la misma cadena y las
+    posiciones se guardan como códigos enteros.
+    """
+
+    def __init__(self, players=()):
+        self._players = {}
+        for player in players:
+            self._players[player.id] = player
+
+    def add(self, player_info):
+        """Añade un jugador a partir del diccionario de la API y lo devuelve."""
+        position = player_info.get("position")
+        player = Player(
+            player_info["id"],
+            sys.intern(str(player_info.get("name") or "N/A")),
+            position if position in POSITION_CODES else UNKNOWN_POSITION,
+            int(player_info.get("price") or 0),
+        )
+        self._players[player.id] = player
+        return player
+
+    def __getitem__(self, player_id):
+        return self._players[player_id]
+
+    def __iter__(self):
+        return iter(self._players)
+
+    def __len__(self):
+        return len(self._players)
+
+    def memory_bytes(self):
+        """
+        Tamaño aproximado en memoria del catálogo: el índice, los registros y sus
+        valores. Los nombres internados repetidos solo se cuentan una vez.
+        """
+        total = sys.getsizeof(self._players)
+        seen = set()
+        for player_id, player in self._players.items():
+            total += sys.getsizeof(player_id) + sys.getsizeof(player)
+            for value in (player.name, player.position, player.price):
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    total += sys.getsizeof(value)
+        return total
@@ -0,0 +1,123 @@
+import json
+import re
+from bisect import bisect_left
+
+from bs4 import BeautifulSoup
+from unidecode import unidecode
+
+TOKEN_PATTERN = re.compile(r"[A-Z0-9]+")
+INDEX_FORMAT_VERSION = 1
+
+
+def normalize_text(text):
+    """Normaliza un texto a mayúsculas y sin acentos para compararlo de forma robusta."""
+    return unidecode((text or "").strip().upper())
+
+
+def tokenize(text):
+    """Divide un texto normalizado en términos alfanuméricos."""
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def html_to_text(html):
+    """Extrae el texto plano del contenido HTML de un mensaje."""
+    return BeautifulSoup(html or "", "html.parser").get_text(separator=" ", strip=True)
+
+
+def message_search_text(message, content_text=None):
+    """Texto buscable de un mensaje del CSV: título, autor y contenido sin HTML."""
+    if content_text is None:
+        content_text = html_to_text(message.get("contenido", ""))
+    return f"{message.get('titulo', '')} {message.get('autor', '')} {content_text}"
+
+
+class BoardSearchIndex:
+    """
+    Índice invertido de los mensajes del tablón, compartido por el scraper y la web.
+    Cada término apunta a la lista de mensajes (por su 'id_hash') que lo contienen.
+    Para que el archivo sea compacto, los 'id_hash' se guardan una sola vez y las
+    listas de cada término almacenan su posición en esa lista.
+    """
+
+    def __init__(self, ids=None, postings=None):
+        self.ids = ids or []
+        self.postings = postings or {}
+        self._positions = {id_hash: pos for pos, id_hash in enumerate(self.ids)}
+        self._terms = None
+
+    def __contains__(self, id_hash):
+        return id_hash in self._positions
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, id_hash, text):
+        """Añade un mensaje al índice. Devuelve False si ya estaba indexado."""
+        if id_hash in self._positions:
+            return False
+        position = len(self.ids)
+        self.ids.append(id_hash)
+        self._positions[id_hash] = position
+        for term in set(tokenize(text)):
+            self.postings.setdefault(term, []).append(position)
+        self._terms = None
+        return True
+
+    def add_message(self, message, content_text=None):
+        """Añade un mensaje con el formato del CSV de comunicados."""
+        return self.add(message["id_hash"], message_search_text(message, content_text))
+
+    @classmethod
+    def from_messages(cls, messages):
+        """Construye un índice completo a partir de los mensajes del CSV."""
+        index = cls()
+        for message in messages:
+            index.add_message(message)
+        return index
+
+    def _matching_positions(self, token):
+        """Posiciones de los mensajes con algún término que empiece por 'token'."""
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        positions = set()
+        for term in self._terms[bisect_left(self._terms, token) :]:
+            if not term.startswith(token):
+                break
+            positions.update(self.postings[term])
+        return positions
+
+    def search(self, query):
+        """
+        Devuelve el conjunto de 'id_hash' de los mensajes que contienen todas las
+        palabras de la búsqueda (cada palabra puede ser el inicio de un término).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+
+        positions = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            matches = self._matching_positions(token)
+            positions = matches if positions is None else positions & matches
+            if not positions:
+                return set()
+        return {self.ids[position] for position in positions}
+
+    def to_json(self):
+        """Serializa el índice para guardarlo junto al CSV de comunicados."""
+        return json.dumps(
+            {
+                "version": INDEX_FORMAT_VERSION,
+                "ids": self.ids,
+                "postings": self.postings,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, content):
+        """Carga un índice serializado con to_json()."""
+        data = json.loads(content)
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Versión de índice no soportada: {data.get('version')}")
+        return cls(data["ids"], data["postings"])
@@ -0,0 +1,58 @@
+import gzip
+import json
+import os
+
+ARCHIVE_VERSION = 1
+ARCHIVE_EXTENSION = ".jsonl.gz"
+
+
+def archive_filename(csv_filename):
+    """Nombre del archivo comprimido de un CSV: 'comunicados_25-26.jsonl.gz'."""
+    root, _ = os.path.splitext(csv_filename)
+    return f"{root}{ARCHIVE_EXTENSION}"
+
+
+def write_season_archive(messages, fields):
+    """
+    Serializa los mensajes de una temporada como JSON Lines comprimido con gzip.
+    La primera línea es una cabecera con la versión, las columnas y el número de
+    filas (y cuántas hay por categoría); cada línea siguiente es una lista con los
+    valores de un mensaje en el orden de las columnas, sin repetir las claves.
+    """
+    fields = list(fields)
+    categories = {}
+    for message in messages:
+        categoria = message.get("categoria", "")
+        categories[categoria] = categories.get(categoria, 0) + 1
+    header = {
+        "version": ARCHIVE_VERSION,
+        "fields": fields,
+        "count": len(messages),
+        "categories": categories,
+    }
+    lines = [json.dumps(header, ensure_ascii=False)]
+    lines.extend(
+        json.dumps([message.get(field, "") for field in fields], ensure_ascii=False)
+        for message in messages
+    )
+    return gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), mtime=0)
+
+
+def read_season_archive(data):
+    """
+    Devuelve la lista de mensajes (diccionarios, como los del CSV) de un archivo
+    generado con write_season_archive. Lanza ValueError si no es válido.
+    """
+    try:
+        lines = gzip.decompress(data).decode("utf-8").splitlines()
+        header = json.loads(lines[0])
+    except (OSError, EOFError, UnicodeDecodeError, IndexError) as e:
+        raise ValueError(f"Archivo de temporada ilegible: {e}") from e
+    if header.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Versión de archivo no soportada: {header.get('version')}")
+
+    fields = header["fields"]
+    messages = [dict(zip(fields, json.loads(line))) for line in lines[1:] if line]
+    if len(messages) != header.get("count"):
+        raise ValueError("El archivo de temporada está incompleto.")
+    return messages
@@ -1,40 +1,270 @@
+import base64
 import json
-import re
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+from core.domain.players import PlayerCatalogue
+from core.sdk.json_stream import iter_json_object_items
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Vigencia del token guardado cuando no se puede leer su caducidad
+DEFAULT_TOKEN_TTL_SECONDS = 24 * 3600
+# Tiempo máximo (segundos) para conectar y para esperar cada respuesta
+DEFAULT_TIMEOUT = (5, 30)
+# Conexiones abiertas por host: al menos tantas como descargas en paralelo
+DEFAULT_POOL_SIZE = 16
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def build_session(pool_size=DEFAULT_POOL_SIZE, max_retries=3, backoff_seconds=1.0):
+    """
+    Crea una sesión con un pool de conexiones keep-alive de 'pool_size' por host y
+    reintentos acotados (con espera exponencial y azar) ante errores 5xx y fallos
+    de conexión o lectura en peticiones GET. Los 429 los gestiona el cliente para
+    poder frenar a todos los hilos a la vez con el limitador.
+    """
+    retry = Retry(
+        total=max_retries,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        backoff_factor=backoff_seconds,
+        backoff_jitter=backoff_seconds,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter:
+    """
+    Limitador de tipo token bucket compartido entre hilos.
+    Permite ráfagas de hasta 'capacity' peticiones y, en media, 'rate' por segundo.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible y lo consume."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Vacía el cubo durante 'seconds' para que todos los hilos esperen (p. ej. tras un 429)."""
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = max(self._updated, time.monotonic() + seconds)
+
+
+class TokenCache:
+    """
+    Guarda en disco el token de sesión de Biwenger y el ID de usuario de la liga
+    para reutilizarlos entre ejecuciones sin volver a hacer login.
+    La caducidad se toma del propio token (campo 'exp' del JWT) o, si no se puede
+    leer, de 'ttl_seconds'.
+    """
+
+    def __init__(self, path, ttl_seconds=DEFAULT_TOKEN_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+
+    def load(self, email, league_id):
+        """Devuelve {'token', 'user_id'} si hay un token vigente para esa cuenta y liga."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if (
+                entry["email"] == email
+                and entry["league_id"] == str(league_id)
+                and entry["expires_at"] > time.time()
+            ):
+                return {"token": entry["token"], "user_id": entry["user_id"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def save(self, email, league_id, token, user_id):
+        expires_at = token_expiry(token) or time.time() + self.ttl_seconds
+        entry = {
+            "email": email,
+            "league_id": str(league_id),
+            "token": token,
+            "user_id": user_id,
+            "expires_at": expires_at,
+        }
+        try:
+            # Solo legible por el usuario: contiene una credencial
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar el token de Biwenger: {e}")
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def token_expiry(token):
+    """Lee el campo 'exp' de un JWT sin verificarlo. Devuelve None si no es un JWT."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
 
 
 class BiwengerClient:
     """
     Cliente para interactuar con la API de Biwenger.
     La configuración (URLs, credenciales) se inyecta al crear una instancia.
+    Las peticiones a la API pasan por un limitador de peticiones por segundo y
+    se reintentan con espera exponencial cuando Biwenger responde 429.
+    Si se pasa 'http_cache' (un HttpCache), las descargas grandes y estáticas como la
+    base de datos de jugadores se reutilizan entre ejecuciones.
+    Con 'token_cache' (un TokenCache) la sesión se reutiliza entre ejecuciones y solo
+    se vuelve a hacer login cuando Biwenger responde 401.
     """
 
-    def __init__(self, email, password, login_url, account_url, league_id):
+    LOGIN_HEADERS = {
+        "Accept": "application/json, text/plain, */*",
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+        "X-Lang": "es",
+        "X-Version": "628",
+    }
+
+    def __init__(
+        self,
+        email,
+        password,
+        login_url,
+        account_url,
+        league_id,
+        requests_per_second=5,
+        max_retries=3,
+        backoff_seconds=1.0,
+        http_cache=None,
+        token_cache=None,
+        timeout=DEFAULT_TIMEOUT,
+        pool_size=DEFAULT_POOL_SIZE,
+    ):
         requests.packages.urllib3.disable_warnings(
             requests.packages.urllib3.exceptions.InsecureRequestWarning
         )
-        self.session = requests.Session()
+        self.session = build_session(pool_size, max_retries, backoff_seconds)
+        self.timeout = timeout
         self.email = email
         self.password = password
         self.login_url = login_url
         self.account_url = account_url
         self.league_id = str(league_id)
         self.user_id = None
-        self._authenticate()
+        self.rate_limiter = (
+            RateLimiter(requests_per_second) if requests_per_second else None
+        )
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.http_cache = http_cache
+        self.token_cache = token_cache
+        self._token = None
+        self._auth_lock = threading.Lock()
+
+        cached = token_cache.load(email, self.league_id) if token_cache else None
+        if cached:
+            print("✅ Sesión de Biwenger reutilizada desde la caché de token.")
+            self._configure_session(cached["token"], cached["user_id"])
+        else:
+            self._authenticate()
+
+    def _get(self, url):
+        """
+        GET con la sesión autenticada respetando el límite de peticiones.
+        Ante un 429 espera (según 'Retry-After' o de forma exponencial) y reintenta;
+        ante un 401 renueva la sesión una vez y repite la petición.
+        """
+        reauthenticated = False
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            token = self._token
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code == 401 and not reauthenticated:
+                self._reauthenticate(token)
+                reauthenticated = True
+                continue
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+
+            try:
+                delay = float(response.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                # Espera exponencial con algo de azar para que los hilos no se sincronicen
+                delay = self.backoff_seconds * 2**attempt + random.uniform(
+                    0, self.backoff_seconds
+                )
+            print(
+                f"⏳ Biwenger ha limitado las peticiones (429). Reintentando en {delay:.1f}s..."
+            )
+            if self.rate_limiter:
+                self.rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def _reauthenticate(self, expired_token):
+        """
+        Vuelve a hacer login tras un 401. Si varios hilos reciben el 401 a la vez,
+        solo el primero renueva el token y el resto reutiliza el nuevo.
+        """
+        with self._auth_lock:
+            if self._token != expired_token:
+                return
+            print("🔑 El token de Biwenger ha caducado (401). Renovando sesión...")
+            if self.token_cache:
+                self.token_cache.clear()
+            self._authenticate()
 
     def _authenticate(self):
         """Realiza el proceso de login y configura la sesión con las cabeceras necesarias."""
         print("▶️  Iniciando sesión en Biwenger...")
-        login_headers = {
-            "Accept": "application/json, text/plain, */*",
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-            "X-Lang": "es",
-            "X-Version": "628",
-        }
         login_payload = {"email": self.email, "password": self.password}
 
         login_response = self.session.post(
-            self.login_url, data=login_payload, headers=login_headers, verify=False
+            self.login_url,
+            data=login_payload,
+            headers=self.LOGIN_HEADERS,
+            verify=False,
+            timeout=self.timeout,
         )
         login_response.raise_for_status()
         token = login_response.json().get("token")
@@ -42,38 +272,52 @@ class BiwengerClient:
             raise Exception("Error en el login: No se recibió el token.")
         print("✅ Token de sesión obtenido.")
 
-        self.session.headers.update(login_headers)
+        self.session.headers.update(self.LOGIN_HEADERS)
         self.session.headers.update({"Authorization": f"Bearer {token}"})
 
         print("▶️  Obteniendo datos de la cuenta...")
-        account_response = self.session.get(self.account_url, verify=False)
+        account_response = self.session.get(
+            self.account_url, verify=False, timeout=self.timeout
+        )
         account_response.raise_for_status()
         account_data = account_response.json()
 
+        user_id = None
         leagues = account_data.get("data", {}).get("leagues", [])
         for league in leagues:
             if str(league.get("id")) == self.league_id:
-                self.user_id = league.get("user", {}).get("id")
+                user_id = league.get("user", {}).get("id")
                 break
 
-        if not self.user_id:
+        if not user_id:
             raise Exception(
                 f"Error: No se pudo encontrar el ID de usuario para la liga {self.league_id}."
             )
-        print(
-            f"✅ ID de usuario ({self.user_id}) para la liga {self.league_id} obtenido."
-        )
+        print(f"✅ ID de usuario ({user_id}) para la liga {self.league_id} obtenido.")
+
+        self._configure_session(token, user_id)
+        if self.token_cache:
+            self.token_cache.save(self.email, self.league_id, token, user_id)
+        print("✅ Sesión de Biwenger iniciada y configurada.")
 
+    def _configure_session(self, token, user_id):
+        """Deja la sesión lista para la API: token, liga y usuario en las cabeceras."""
+        self._token = token
+        self.user_id = user_id
+        self.session.headers.update(self.LOGIN_HEADERS)
         self.session.headers.update(
-            {"X-League": self.league_id, "X-User": str(self.user_id)}
+            {
+                "Authorization": f"Bearer {token}",
+                "X-League": self.league_id,
+                "X-User": str(user_id),
+            }
         )
         self.session.verify = False
-        print("✅ Sesión de Biwenger iniciada y configurada.")
 
     def get_league_users(self, league_users_url):
         """Obtiene el mapa de usuarios (ID -> Nombre) de la liga."""
         print("▶️  Obteniendo lista de usuarios de la liga...")
-        response = self.session.get(league_users_url)
+        response = self._get(league_users_url)
         response.raise_for_status()
         standings = response.json().get("data", {}).get("standings", [])
         if not standings:
@@ -87,45 +331,78 @@ class BiwengerClient:
     def get_board_messages(self, board_messages_url):
         """Obtiene todos los mensajes del tablón de la liga."""
         print(f"▶️  Obteniendo mensajes del tablón...")
-        response = self.session.get(board_messages_url)
+        response = self._get(board_messages_url)
         response.raise_for_status()
         return response.json()
 
     def get_all_players_data_map(self, all_players_data_url):
-        """Descarga la base de datos completa de jugadores de Biwenger."""
+        """
+        Descarga la base de datos completa de jugadores de Biwenger y devuelve un
+        PlayerCatalogue (ID -> Player). La respuesta (JSON o JSONP) se decodifica en
+        streaming jugador a jugador.
+        """
         print("▶️  Descargando la base de datos de jugadores de Biwenger...")
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
-        }
-        response = requests.get(all_players_data_url, headers=headers, verify=False)
+        # Va por la sesión (pool de conexiones y reintentos), sin el limitador de la API
+        if self.http_cache:
+            response = self.http_cache.get(
+                all_players_data_url,
+                fetch=self.session.get,
+                timeout=self.timeout,
+                stream=True,
+            )
+        else:
+            response = self.session.get(
+                all_players_data_url, timeout=self.timeout, stream=True
+            )
         response.raise_for_status()
-        try:
-            data = response.json()
-        except json.JSONDecodeError:
-            jsonp_text = response.text
-            json_str = re.search(
-                r"^\s*jsonp_\d+\((.*)\)\s*$", jsonp_text, re.DOTALL
-            ).group(1)
-            data = json.loads(json_str)
-        players_dict = data.get("data", {}).get("players", {})
-        players_map = {
-            player_info["id"]: player_info
-            for player_id, player_info in players_dict.items()
-        }
-        print(f"✅ Base de datos de Biwenger con {len(players_map)} jugadores creada.")
+        players_map = PlayerCatalogue()
+        with response:
+            players = iter_json_object_items(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                ("data", "players"),
+            )
+            for _, player_info in players:
+                players_map.add(player_info)
+        print(
+            f"✅ Base de datos de Biwenger con {len(players_map)} jugadores creada "
+            f"({players_map.memory_bytes() / 1024:.0f} KB en memoria)."
+        )
         return players_map
 
     def get_manager_squad(self, manager_squad_url_template, manager_id):
         """Obtiene la plantilla de un mánager específico."""
         url = manager_squad_url_template.format(manager_id=manager_id)
-        response = self.session.get(url)
+        response = self._get(url)
         response.raise_for_status()
         return response.json().get("data", {}).get("players", [])
 
+    def get_manager_squads(
+        self, manager_squad_url_template, manager_ids, max_workers=8
+    ):
+        """
+        Obtiene en paralelo las plantillas de varios mánagers.
+        Devuelve un diccionario {manager_id: plantilla} en el mismo orden recibido;
+        el ritmo real de peticiones lo marca el limitador del cliente.
+        """
+        manager_ids = list(manager_ids)
+        if not manager_ids:
+            return {}
+        print(f"▶️  Obteniendo las plantillas de {len(manager_ids)} mánagers...")
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(manager_ids))
+        ) as executor:
+            squads = executor.map(
+                lambda manager_id: self.get_manager_squad(
+                    manager_squad_url_template, manager_id
+                ),
+                manager_ids,
+            )
+            return dict(zip(manager_ids, squads))
+
     def get_market_players(self, market_url):
         """Obtiene los jugadores que están actualmente en el mercado."""
         print("▶️  Obteniendo jugadores del mercado...")
-        response = self.session.get(market_url)
+        response = self._get(market_url)
         response.raise_for_status()
         market_players = response.json().get("data", {}).get("sales", [])
         print(f"✅ Se han encontrado {len(market_players)} jugadores en el mercado.")
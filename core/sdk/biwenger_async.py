@@ -0,0 +1,85 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from core.sdk.biwenger import DEFAULT_POOL_SIZE, BiwengerClient
+
+
+class AsyncBiwengerClient:
+    """
+    Variante asyncio de BiwengerClient con los mismos métodos, pensada para lanzar
+    decenas de peticiones desde un único event loop (p. ej. con asyncio.gather).
+
+    Envuelve un BiwengerClient síncrono y comparte con él la sesión autenticada
+    (token, renovación tras 401), el pool de conexiones y el limitador de
+    peticiones: cada llamada se ejecuta en un pool de hilos propio de
+    'max_concurrency' hilos, así que el ritmo real lo sigue marcando el limitador.
+    """
+
+    def __init__(self, client, max_concurrency=DEFAULT_POOL_SIZE):
+        self.client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="biwenger-async"
+        )
+
+    @classmethod
+    async def connect(cls, *args, max_concurrency=DEFAULT_POOL_SIZE, **kwargs):
+        """Crea (y autentica) el cliente síncrono sin bloquear el event loop."""
+        loop = asyncio.get_running_loop()
+        client = await loop.run_in_executor(
+            None, lambda: BiwengerClient(*args, **kwargs)
+        )
+        return cls(client, max_concurrency=max_concurrency)
+
+    async def _call(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, method, *args)
+
+    @property
+    def user_id(self):
+        return self.client.user_id
+
+    async def get_league_users(self, league_users_url):
+        """Obtiene el mapa de usuarios (ID -> Nombre) de la liga."""
+        return await self._call(self.client.get_league_users, league_users_url)
+
+    async def get_board_messages(self, board_messages_url):
+        """Obtiene los mensajes del tablón de la liga."""
+        return await self._call(self.client.get_board_messages, board_messages_url)
+
+    async def get_all_players_data_map(self, all_players_data_url):
+        """Descarga la base de datos de jugadores (PlayerCatalogue)."""
+        return await self._call(
+            self.client.get_all_players_data_map, all_players_data_url
+        )
+
+    async def get_manager_squad(self, manager_squad_url_template, manager_id):
+        """Obtiene la plantilla de un mánager específico."""
+        return await self._call(
+            self.client.get_manager_squad, manager_squad_url_template, manager_id
+        )
+
+    async def get_manager_squads(self, manager_squad_url_template, manager_ids):
+        """Obtiene a la vez las plantillas de varios mánagers, en el orden recibido."""
+        manager_ids = list(manager_ids)
+        squads = await asyncio.gather(
+            *(
+                self.get_manager_squad(manager_squad_url_template, manager_id)
+                for manager_id in manager_ids
+            )
+        )
+        return dict(zip(manager_ids, squads))
+
+    async def get_market_players(self, market_url):
+        """Obtiene los jugadores que están actualmente en el mercado."""
+        return await self._call(self.client.get_market_players, market_url)
+
+    def close(self):
+        """Libera los hilos y cierra la sesión HTTP."""
+        self._executor.shutdown(wait=True)
+        self.client.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
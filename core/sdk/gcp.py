@@ -1,12 +1,19 @@
+import codecs
 import csv
 import io
 import os
+import threading
+import time
+from collections import OrderedDict
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
 
+# Tamaño de cada trozo al descargar de Drive (MediaIoBaseDownload usa 100 MB por defecto)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 # --- AUTENTICACIÓN Y SERVICIOS ---
 
 def get_google_service(api_name, api_version, service_account_file, scopes):
@@ -28,26 +35,167 @@ def find_file_on_drive(service, name, folder_id):
     response = service.files().list(q=query, spaces='drive', fields='files(id, name, modifiedTime)').execute()
     return response.get('files', [])[0] if response.get('files') else None
 
-def download_csv_from_drive(service, file_id):
-    """Descarga el contenido de un archivo CSV de Drive y lo devuelve como string."""
+def list_folder_files(service, folder_id, file_ids=()):
+    """
+    Obtiene con una sola llamada a Drive la metadata de todos los archivos de una
+    carpeta y, si se piden, la de otros archivos por ID (p. ej. un Google Sheet de
+    otra carpeta), agrupando las consultas en una petición batch.
+    Devuelve dos diccionarios: nombre -> metadata con los archivos de la carpeta
+    e ID -> metadata con los pedidos por ID (None si no se pudieron leer).
+    """
+    fields = 'id, name, modifiedTime'
+    responses, errors = {}, {}
+
+    def collect(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            responses[request_id] = response
+
+    query = f"'{folder_id}' in parents and trashed=false"
+    list_kwargs = {'q': query, 'spaces': 'drive', 'pageSize': 1000, 'fields': f'nextPageToken, files({fields})'}
+    batch = service.new_batch_http_request(callback=collect)
+    batch.add(service.files().list(**list_kwargs), request_id='folder')
+    for file_id in file_ids:
+        batch.add(service.files().get(fileId=file_id, fields=fields), request_id=f'id:{file_id}')
+    batch.execute()
+    if 'folder' in errors:
+        raise errors['folder']
+
+    files_by_name = {}
+    page = responses['folder']
+    while True:
+        for file in page.get('files', []):
+            # Como find_file_on_drive: si hay nombres repetidos se usa el primero
+            files_by_name.setdefault(file['name'], file)
+        if not page.get('nextPageToken'):
+            break
+        page = service.files().list(pageToken=page['nextPageToken'], **list_kwargs).execute()
+
+    files_by_id = {file_id: responses.get(f'id:{file_id}') for file_id in file_ids}
+    return files_by_name, files_by_id
+
+class DriveFolderIndex:
+    """
+    Memoriza durante un TTL corto la metadata de los archivos de una carpeta de
+    Drive (y de otros archivos sueltos por ID), de modo que todas las búsquedas
+    por nombre de esa ventana comparten una única llamada a list_folder_files.
+    """
+
+    def __init__(self, ttl_seconds=60):
+        self.ttl_seconds = ttl_seconds
+        self._folders = {}
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def get(self, service, folder_id, file_ids=()):
+        """Como list_folder_files, pero solo llama a Drive si algo ha caducado."""
+        file_ids = [file_id for file_id in file_ids if file_id]
+        now = time.monotonic()
+        with self._lock:
+            folder = self._folders.get(folder_id)
+            fresh = folder and now - folder[0] < self.ttl_seconds and all(
+                file_id in self._files and now - self._files[file_id][0] < self.ttl_seconds
+                for file_id in file_ids
+            )
+            if fresh:
+                return folder[1], {file_id: self._files[file_id][1] for file_id in file_ids}
+
+        files_by_name, files_by_id = list_folder_files(service, folder_id, file_ids)
+        with self._lock:
+            checked_at = time.monotonic()
+            self._folders[folder_id] = (checked_at, files_by_name)
+            for file_id, file in files_by_id.items():
+                self._files[file_id] = (checked_at, file)
+        return files_by_name, files_by_id
+
+    def find(self, service, name, folder_id):
+        """Devuelve la metadata del archivo 'name' de la carpeta, o None si no existe."""
+        return self.get(service, folder_id)[0].get(name)
+
+    def invalidate(self, folder_id):
+        """Olvida la metadata de una carpeta para que la siguiente búsqueda la pida."""
+        with self._lock:
+            self._folders.pop(folder_id, None)
+
+    def clear(self):
+        """Vacía el índice por completo."""
+        with self._lock:
+            self._folders.clear()
+            self._files.clear()
+
+def download_file_from_drive(service, file_id):
+    """Descarga el contenido de un archivo de Drive y lo devuelve como bytes."""
     request = service.files().get_media(fileId=file_id)
     fh = io.BytesIO()
     downloader = MediaIoBaseDownload(fh, request)
     done = False
     while not done:
         status, done = downloader.next_chunk()
-    return fh.getvalue().decode('utf-8')
+    return fh.getvalue()
 
-def download_csv_as_dict(service, file_id):
-    """Descarga un CSV de Drive y lo devuelve como una lista de diccionarios."""
+def iter_drive_file_chunks(service, file_id, chunksize=DOWNLOAD_CHUNK_SIZE):
+    """
+    Descarga un archivo de Drive por trozos de 'chunksize' bytes y los va devolviendo
+    según llegan, sin acumular el archivo completo en memoria.
+    """
+    request = service.files().get_media(fileId=file_id)
+    buffer = io.BytesIO()
+    downloader = MediaIoBaseDownload(buffer, request, chunksize=chunksize)
+    done = False
+    while not done:
+        status, done = downloader.next_chunk()
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        if chunk:
+            yield chunk
+
+def iter_text_lines(chunks, encoding='utf-8'):
+    """
+    Convierte trozos de bytes en líneas de texto (con su salto de línea) usando un
+    decodificador incremental, de modo que un carácter partido entre dos trozos
+    se decodifica bien.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).splitlines(keepends=True)
+        # La última línea puede estar incompleta (o ser un '\r' al que le sigue '\n')
+        pending = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+        yield from lines
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+def iter_csv_rows_from_drive(service, file_id):
+    """
+    Descarga un CSV de Drive y devuelve sus filas (diccionarios) a medida que llegan
+    los trozos, sin copias intermedias del archivo completo en bytes ni en texto.
+    """
     if not file_id:
         raise FileNotFoundError("El ID del archivo CSV no fue proporcionado.")
-    csv_content = download_csv_from_drive(service, file_id)
-    return list(csv.DictReader(io.StringIO(csv_content)))
+    return csv.DictReader(iter_text_lines(iter_drive_file_chunks(service, file_id)))
+
+def download_csv_from_drive(service, file_id):
+    """Descarga el contenido de un archivo CSV de Drive y lo devuelve como string."""
+    return download_file_from_drive(service, file_id).decode('utf-8')
+
+def download_csv_as_dict(service, file_id):
+    """Descarga un CSV de Drive y lo devuelve como una lista de diccionarios."""
+    return list(iter_csv_rows_from_drive(service, file_id))
 
 def upload_csv_to_drive(service, folder_id, filename, csv_content_string, existing_file_id):
     """Sube (o actualiza) un string con contenido CSV a una carpeta de Drive."""
-    media = MediaIoBaseUpload(io.BytesIO(csv_content_string.encode('utf-8')), mimetype='text/csv', resumable=True)
+    upload_file_to_drive(service, folder_id, filename, csv_content_string, existing_file_id, 'text/csv')
+
+def upload_file_to_drive(service, folder_id, filename, content_string, existing_file_id, mimetype):
+    """Sube (o actualiza) un string con el tipo MIME indicado a una carpeta de Drive."""
+    upload_bytes_to_drive(service, folder_id, filename, content_string.encode('utf-8'), existing_file_id, mimetype)
+
+def upload_bytes_to_drive(service, folder_id, filename, content_bytes, existing_file_id, mimetype):
+    """Sube (o actualiza) contenido binario con el tipo MIME indicado a una carpeta de Drive."""
+    media = MediaIoBaseUpload(io.BytesIO(content_bytes), mimetype=mimetype, resumable=True)
     if existing_file_id:
         service.files().update(fileId=existing_file_id, media_body=media).execute()
         print(f"✅ Archivo '{filename}' actualizado en Drive.")
@@ -58,18 +206,141 @@ def upload_csv_to_drive(service, folder_id, filename, csv_content_string, existi
         service.permissions().create(fileId=file.get('id'), body=permission).execute()
         print(f"✅ Archivo '{filename}' creado y compartido públicamente en Drive.")
 
+# --- CACHÉ EN MEMORIA DE CSVs DE DRIVE ---
+
+class DriveCsvCache:
+    """
+    Caché LRU en memoria con TTL para los CSV de una carpeta de Drive.
+    Cada entrada guarda el ID y el 'modifiedTime' del archivo: mientras el TTL
+    esté vigente no se consulta Drive, y al caducar solo se pide la metadata.
+    El CSV únicamente se vuelve a descargar si el archivo ha cambiado.
+    Con un 'folder_index' (DriveFolderIndex) la metadata de todos los archivos
+    sale de un único listado de la carpeta en lugar de una consulta por archivo.
+    Las filas devueltas se comparten entre peticiones y no deben modificarse.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=16, folder_index=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.folder_index = folder_index
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_rows(self, service, name, folder_id, load=None):
+        """
+        Devuelve las filas del CSV o None si el archivo no existe en Drive.
+        'load(service, file_id)' permite cachear otros formatos de archivo.
+        """
+        key = (folder_id, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry['checked_at'] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return entry['rows']
+
+        if self.folder_index is not None:
+            file_metadata = self.folder_index.find(service, name, folder_id)
+        else:
+            file_metadata = find_file_on_drive(service, name, folder_id)
+        if not file_metadata:
+            # También se cachea la ausencia del archivo para no preguntar en cada visita
+            rows, derived, version = None, {}, None
+        else:
+            version = (file_metadata['id'], file_metadata.get('modifiedTime'))
+            if entry and entry['version'] == version:
+                rows, derived = entry['rows'], entry['derived']
+            else:
+                rows, derived = (load or download_csv_as_dict)(service, file_metadata['id']), {}
+
+        with self._lock:
+            self._entries[key] = {
+                'version': version, 'rows': rows, 'derived': derived, 'checked_at': time.monotonic()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rows
+
+    def get_derived(self, service, name, folder_id, build, load=None):
+        """
+        Devuelve build(filas), calculado una única vez por versión del archivo.
+        Permite cachear estructuras precalculadas a partir del CSV (índices,
+        agrupaciones...) que se descartan automáticamente cuando el archivo cambia.
+        Devuelve None si el archivo no existe en Drive.
+        """
+        rows = self.get_rows(service, name, folder_id, load)
+        if rows is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get((folder_id, name))
+            derived = entry['derived'] if entry and entry['rows'] is rows else {}
+            if build in derived:
+                return derived[build]
+
+        value = build(rows)
+        with self._lock:
+            derived[build] = value
+        return value
+
+    def get_segments_derived(self, service, names, folder_id, build, loads=None):
+        """
+        Como get_derived, pero para un archivo partido en segmentos (p. ej. un CSV
+        base y su delta): build(lista con las filas de cada segmento) se calcula una
+        única vez por combinación de versiones. Los segmentos que no existen llegan
+        como None. Devuelve None si el primer segmento (el base) no existe.
+        'loads' indica, si hace falta, la función de carga de cada segmento.
+        """
+        loads = loads or [None] * len(names)
+        segments = [self.get_rows(service, names[0], folder_id, loads[0])]
+        if segments[0] is None:
+            return None
+        segments += [self.get_rows(service, name, folder_id, load) for name, load in zip(names[1:], loads[1:])]
+
+        with self._lock:
+            entry = self._entries.get((folder_id, names[0]))
+            derived = entry['derived'] if entry and entry['rows'] is segments[0] else {}
+            cached = derived.get((build, tuple(names)))
+            # Se guardan los propios segmentos para comparar por identidad con la versión en caché
+            if cached and all(a is b for a, b in zip(cached[0], segments)):
+                return cached[1]
+
+        value = build(segments)
+        with self._lock:
+            derived[(build, tuple(names))] = (segments, value)
+        return value
+
+    def invalidate(self, name, folder_id):
+        """Elimina de la caché la entrada de un archivo concreto."""
+        with self._lock:
+            self._entries.pop((folder_id, name), None)
+        if self.folder_index is not None:
+            self.folder_index.invalidate(folder_id)
+
+    def clear(self):
+        """Vacía la caché por completo."""
+        with self._lock:
+            self._entries.clear()
+        if self.folder_index is not None:
+            self.folder_index.clear()
+
 # --- OPERACIONES CON GOOGLE SHEETS ---
 
+# Solo se piden los títulos de las pestañas y el texto mostrado de cada celda
+SHEETS_GRID_FIELDS = 'sheets(properties/title,data/rowData/values/formattedValue)'
+
 def get_sheets_data(service, spreadsheet_id):
-    """Lee y procesa los datos de todas las hojas de un Google Sheet."""
-    sheet_metadata = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
-    sheets = sheet_metadata.get('sheets', '')
+    """
+    Lee y procesa los datos de todas las hojas de un Google Sheet con una sola
+    llamada a la API: las pestañas y sus valores llegan en la misma respuesta.
+    """
+    spreadsheet = service.spreadsheets().get(
+        spreadsheetId=spreadsheet_id, includeGridData=True, fields=SHEETS_GRID_FIELDS
+    ).execute()
 
     all_leagues_data = []
-    for sheet in sheets:
-        sheet_title = sheet.get("properties", {}).get("title", "Sin Título")
-        result = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=sheet_title).execute()
-        values = result.get('values', [])
+    for sheet in spreadsheet.get('sheets', []):
+        values = grid_to_values(sheet.get('data', []))
 
         if not values or len(values) < 6: continue
 
@@ -83,3 +354,59 @@ def get_sheets_data(service, spreadsheet_id):
         all_leagues_data.append(league_info)
     return all_leagues_data
 
+def grid_to_values(grid_data):
+    """
+    Convierte el 'gridData' de una pestaña en una lista de filas de texto, igual
+    que la que devuelve 'values().get': sin celdas vacías al final de cada fila
+    ni filas vacías al final de la hoja.
+    """
+    values = []
+    for grid in grid_data:
+        for row_data in grid.get('rowData', []):
+            row = [cell.get('formattedValue', '') for cell in row_data.get('values', [])]
+            while row and row[-1] == '':
+                row.pop()
+            values.append(row)
+    while values and not values[-1]:
+        values.pop()
+    return values
+
+class SheetsDataCache:
+    """
+    Caché en memoria con TTL de los datos ya procesados de cada Google Sheet
+    (resultado de get_sheets_data). Mientras el TTL esté vigente no se llama a la
+    API; al caducar se vuelve a leer el Sheet con una única llamada.
+    Los datos devueltos se comparten entre peticiones y no deben modificarse.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=16):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, service, spreadsheet_id):
+        """Devuelve las ligas del Sheet, leyéndolo solo si no está en caché."""
+        with self._lock:
+            entry = self._entries.get(spreadsheet_id)
+            if entry and time.monotonic() - entry['checked_at'] < self.ttl_seconds:
+                self._entries.move_to_end(spreadsheet_id)
+                return entry['data']
+
+        data = get_sheets_data(service, spreadsheet_id)
+        with self._lock:
+            self._entries[spreadsheet_id] = {'data': data, 'checked_at': time.monotonic()}
+            self._entries.move_to_end(spreadsheet_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self, spreadsheet_id):
+        """Elimina de la caché un Sheet concreto."""
+        with self._lock:
+            self._entries.pop(spreadsheet_id, None)
+
+    def clear(self):
+        """Vacía la caché por completo."""
+        with self._lock:
+            self._entries.clear()
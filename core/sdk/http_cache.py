@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class HttpCache:
+    """
+    Caché HTTP en disco para descargas grandes que cambian poco (base de datos de
+    jugadores, páginas de terceros). Cada URL tiene un TTL: dentro de esa ventana se
+    reutilizan los bytes guardados sin tocar la red y, pasada, se revalida con
+    'If-None-Match'/'If-Modified-Since', de modo que si nada ha cambiado solo cuesta
+    una respuesta 304 vacía.
+    """
+
+    def __init__(self, directory, ttls=None, default_ttl=0):
+        self.directory = directory
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, url):
+        """TTL (segundos) configurado para la URL, o el TTL por defecto."""
+        return self.ttls.get(url, self.default_ttl)
+
+    def get(self, url, fetch=None, headers=None, ttl=None, **kwargs):
+        """
+        Devuelve un 'requests.Response' para la URL usando la caché cuando se puede.
+        'fetch' es la función que hace el GET real (por defecto 'requests.get'; p. ej.
+        'session.get' para usar una sesión) y recibe 'headers' y el resto de argumentos.
+        Solo se guardan las respuestas 200; cualquier otra se devuelve tal cual.
+        """
+        fetch = fetch or requests.get
+        ttl = self.ttl_for(url) if ttl is None else ttl
+        meta, body = self._load(url)
+
+        if meta is not None and time.time() - meta["fetched_at"] < ttl:
+            self._count("hits")
+            return self._build_response(url, meta, body)
+
+        request_headers = dict(headers or {})
+        if meta is not None:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = fetch(url, headers=request_headers, **kwargs)
+        if response.status_code == 304 and meta is not None:
+            self._count("revalidated")
+            meta["fetched_at"] = time.time()
+            self._store(url, meta, body)
+            return self._build_response(url, meta, body)
+
+        self._count("misses")
+        if response.status_code == 200:
+            meta = {
+                "url": url,
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_type": response.headers.get("Content-Type"),
+                "encoding": response.encoding,
+            }
+            self._store(url, meta, response.content)
+        return response
+
+    def print_stats(self):
+        print(
+            f"🗄️  Caché HTTP: {self.hits} aciertos, {self.revalidated} revalidadas (304) "
+            f"y {self.misses} descargas completas."
+        )
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        if meta.get("url") != url:
+            return None, None
+        return meta, body
+
+    def _store(self, url, meta, body):
+        """Escribe cuerpo y metadatos de forma atómica; un fallo de disco no es fatal."""
+        meta_path, body_path = self._paths(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._atomic_write(body_path, body)
+            self._atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la caché HTTP de {url}: {e}")
+
+    def _atomic_write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _build_response(url, meta, body):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response._content_consumed = True
+        response.encoding = meta.get("encoding")
+        response.headers = CaseInsensitiveDict(
+            {
+                key: value
+                for key, value in (
+                    ("ETag", meta.get("etag")),
+                    ("Last-Modified", meta.get("last_modified")),
+                    ("Content-Type", meta.get("content_type")),
+                )
+                if value
+            }
+        )
+        return response
@@ -0,0 +1,135 @@
+import codecs
+import json
+
+# A partir de este tamaño se descarta el texto ya consumido del búfer
+_COMPACT_AFTER = 64 * 1024
+_WHITESPACE = " \t\n\r"
+
+
+class _JsonStreamReader:
+    """
+    Lector incremental sobre un flujo de bytes con JSON (o JSONP). Mantiene en
+    memoria solo el trozo pendiente de procesar y decodifica valor a valor con
+    'json.JSONDecoder.raw_decode'.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Añade el siguiente trozo al búfer. Devuelve False al final del flujo."""
+        if self._eof:
+            return False
+        if self._pos > _COMPACT_AFTER:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._decoder.decode(chunk)
+                return True
+        self._buf += self._decoder.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _peek(self):
+        """Salta espacios y devuelve el siguiente carácter significativo."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("El JSON termina de forma inesperada.")
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Se esperaba '{char}' y se encontró '{found}'.")
+        self._pos += 1
+
+    def _value(self):
+        """Decodifica el siguiente valor, pidiendo más datos si está incompleto."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Un número pegado al final del búfer puede seguir en el siguiente trozo
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def skip_prefix(self):
+        """Se sitúa en la primera '{', saltando envoltorios JSONP como 'jsonp_123('."""
+        while True:
+            start = self._buf.find("{", self._pos)
+            if start != -1:
+                self._pos = start
+                return
+            self._pos = len(self._buf)
+            if not self._fill():
+                raise ValueError("No se encontró ningún objeto JSON en la respuesta.")
+
+    def find_key(self, key):
+        """
+        Dentro del objeto actual, avanza hasta el valor de 'key' saltando el resto
+        de miembros. Devuelve False si el objeto no la contiene.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return False
+        while True:
+            member = self._value()
+            self._expect(":")
+            if member == key:
+                return True
+            self._value()
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return False
+            if separator != ",":
+                raise ValueError(f"Separador inesperado '{separator}' en el JSON.")
+
+    def iter_items(self):
+        """Recorre el objeto actual devolviendo sus miembros (clave, valor) uno a uno."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            member = self._value()
+            self._expect(":")
+            yield member, self._value()
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Separador inesperado '{separator}' en el JSON.")
+
+
+def iter_json_object_items(chunks, path=()):
+    """
+    Recorre en streaming los miembros (clave, valor) del objeto situado en 'path'
+    dentro de un documento JSON o JSONP recibido como trozos de bytes (p. ej.
+    'response.iter_content()'). Solo se decodifica un miembro cada vez, así que no
+    hace falta tener el documento completo en memoria ni copiarlo a texto.
+    Si alguna clave de 'path' no existe no devuelve nada.
+    """
+    reader = _JsonStreamReader(chunks)
+    reader.skip_prefix()
+    for key in path:
+        if not reader.find_key(key):
+            return
+    yield from reader.iter_items()
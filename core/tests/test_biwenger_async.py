@@ -0,0 +1,123 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.sdk.biwenger_async import AsyncBiwengerClient
+
+
+class StubBiwengerHandler(BaseHTTPRequestHandler):
+    """Servidor local que imita los endpoints de Biwenger que usa el cliente."""
+
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200, raw=None):
+        body = raw if raw is not None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send({"token": "stub_token"})
+
+    def do_GET(self):
+        if self.path == "/players":
+            # Descarga pública en formato JSONP
+            raw = b'jsonp_1({"data": {"players": {"7": {"id": 7, "name": "Pedri"}}}})'
+            return self._send(None, raw=raw)
+        if self.headers.get("Authorization") != "Bearer stub_token":
+            return self._send({}, status=401)
+        if self.path == "/account":
+            return self._send({"data": {"leagues": [{"id": "1", "user": {"id": 99}}]}})
+        if self.path == "/league_users":
+            return self._send({"data": {"standings": [{"id": 5, "name": "Ana"}]}})
+        if self.path == "/board":
+            return self._send({"data": [{"id": 1}]})
+        if self.path == "/market":
+            return self._send({"data": {"sales": [{"id": 3}]}})
+        squad = re.fullmatch(r"/squad/(\d+)", self.path)
+        if squad:
+            cls = type(self)
+            with cls.lock:
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            time.sleep(0.05)
+            with cls.lock:
+                cls.in_flight -= 1
+            return self._send({"data": {"players": [{"id": int(squad.group(1))}]}})
+        self._send({}, status=404)
+
+
+@pytest.fixture
+def stub_server():
+    StubBiwengerHandler.in_flight = 0
+    StubBiwengerHandler.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBiwengerHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def connect(base_url):
+    return AsyncBiwengerClient.connect(
+        "test@example.com",
+        "password",
+        f"{base_url}/login",
+        f"{base_url}/account",
+        "1",
+        requests_per_second=1000,
+    )
+
+
+def test_async_client_mirrors_sync_methods(stub_server):
+    """El cliente asíncrono expone los mismos métodos que el síncrono."""
+
+    async def run():
+        async with await connect(stub_server) as client:
+            return client.user_id, await asyncio.gather(
+                client.get_league_users(f"{stub_server}/league_users"),
+                client.get_board_messages(f"{stub_server}/board"),
+                client.get_market_players(f"{stub_server}/market"),
+                client.get_all_players_data_map(f"{stub_server}/players"),
+                client.get_manager_squad(f"{stub_server}/squad/{{manager_id}}", 4),
+            )
+
+    user_id, (users, board, market, players, squad) = asyncio.run(run())
+
+    assert user_id == 99
+    assert users == {5: "Ana"}
+    assert board == {"data": [{"id": 1}]}
+    assert market == [{"id": 3}]
+    assert players[7].name == "Pedri"
+    assert squad == [{"id": 4}]
+
+
+def test_async_client_fans_out_squads_concurrently(stub_server):
+    """Las plantillas se piden a la vez desde un solo event loop y en orden."""
+    manager_ids = list(range(20, 0, -1))
+
+    async def run():
+        async with await connect(stub_server) as client:
+            return await client.get_manager_squads(
+                f"{stub_server}/squad/{{manager_id}}", manager_ids
+            )
+
+    squads = asyncio.run(run())
+
+    assert list(squads) == manager_ids
+    assert all(squads[i] == [{"id": i}] for i in manager_ids)
+    assert StubBiwengerHandler.max_in_flight > 1
@@ -1,8 +1,27 @@
+import base64
+import json
+
 import pytest
+import requests
 import requests_mock
-from core.sdk.biwenger import BiwengerClient
+from unittest.mock import patch
+from core.domain.players import Player
+from core.sdk.biwenger import (
+    DEFAULT_TIMEOUT,
+    BiwengerClient,
+    RateLimiter,
+    TokenCache,
+    build_session,
+    token_expiry,
+)
+from core.sdk.http_cache import HttpCache
 
 from .constants import (
+    TEST_ACCOUNT_URL,
+    TEST_EMAIL,
+    TEST_LEAGUE_ID,
+    TEST_LOGIN_URL,
+    TEST_PASSWORD,
     TEST_LEAGUE_USERS_URL,
     TEST_PLAYERS_DATA_URL,
     TEST_MARKET_URL,
@@ -65,7 +84,7 @@ def test_get_all_players_data_map_json(
 
         players_map = client.get_all_players_data_map(TEST_PLAYERS_DATA_URL)
         assert len(players_map) == 2
-        assert players_map[1001]["name"] == "Yamal"
+        assert players_map[1001].name == "Yamal"
 
 
 def test_get_all_players_data_map_jsonp(biwenger_client_authenticated):
@@ -76,11 +95,29 @@ def test_get_all_players_data_map_jsonp(biwenger_client_authenticated):
         m.get(TEST_PLAYERS_DATA_URL, text=jsonp_string, status_code=200)
 
         players_map = client.get_all_players_data_map(TEST_PLAYERS_DATA_URL)
-        expected_map = {3: {"id": 3, "name": "Mbappé", "teamId": 3}}
+        # Solo se conservan los campos que usan las herramientas
+        expected_map = {3: Player(3, "Mbappé")}
         assert players_map == expected_map
         assert len(players_map) == 1
 
 
+def test_get_all_players_data_map_uses_http_cache(
+    biwenger_client_authenticated, load_json_fixture, tmp_path
+):
+    """Verifica que con caché HTTP la base de datos no se vuelve a descargar."""
+    client = biwenger_client_authenticated
+    client.http_cache = HttpCache(str(tmp_path), default_ttl=3600)
+    with requests_mock.Mocker() as m:
+        players_data = load_json_fixture("all_players_data.json")
+        m.get(TEST_PLAYERS_DATA_URL, json=players_data, status_code=200)
+
+        first = client.get_all_players_data_map(TEST_PLAYERS_DATA_URL)
+        second = client.get_all_players_data_map(TEST_PLAYERS_DATA_URL)
+
+    assert m.call_count == 1
+    assert first == second
+
+
 def test_get_manager_squad(biwenger_client_authenticated, load_json_fixture):
     """Verifica que get_manager_squad devuelve la plantilla del mánager."""
     client = biwenger_client_authenticated
@@ -110,3 +147,222 @@ def test_get_market_players(biwenger_client_authenticated, load_json_fixture):
         ]
         assert market_players == expected_list
         assert len(market_players) == 2
+
+
+def test_get_manager_squads_keeps_manager_order(
+    biwenger_client_authenticated, load_json_fixture
+):
+    """Verifica que las plantillas descargadas en paralelo se asocian a su mánager."""
+    client = biwenger_client_authenticated
+    mock_response = load_json_fixture("manager_squad.json")
+    with requests_mock.Mocker() as m:
+        for manager_id in (3, 1, 2):
+            m.get(
+                TEST_MANAGER_SQUAD_URL_TEMPLATE.format(manager_id=manager_id),
+                json=mock_response,
+            )
+
+        squads = client.get_manager_squads(TEST_MANAGER_SQUAD_URL_TEMPLATE, [3, 1, 2])
+
+        assert list(squads) == [3, 1, 2]
+        assert all(len(squad) == 2 for squad in squads.values())
+        assert m.call_count == 3
+
+
+def test_get_retries_after_429(biwenger_client_authenticated):
+    """Verifica que un 429 se reintenta respetando la cabecera Retry-After."""
+    client = biwenger_client_authenticated
+    with requests_mock.Mocker() as m, patch("core.sdk.biwenger.time.sleep"):
+        m.get(
+            TEST_MARKET_URL,
+            [
+                {"status_code": 429, "headers": {"Retry-After": "2"}},
+                {"json": {"data": {"sales": [{"id": 1}]}}, "status_code": 200},
+            ],
+        )
+
+        with patch.object(client.rate_limiter, "pause") as mock_pause:
+            market_players = client.get_market_players(TEST_MARKET_URL)
+
+        assert market_players == [{"id": 1}]
+        assert m.call_count == 2
+        mock_pause.assert_called_once_with(2.0)
+
+
+def test_get_gives_up_after_max_retries(biwenger_client_authenticated):
+    """Verifica que tras agotar los reintentos se propaga el error 429."""
+    client = biwenger_client_authenticated
+    client.rate_limiter = None
+    with (
+        requests_mock.Mocker() as m,
+        patch("core.sdk.biwenger.time.sleep") as sleep,
+        patch("core.sdk.biwenger.random.uniform", return_value=0.25) as jitter,
+    ):
+        m.get(TEST_MARKET_URL, status_code=429)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_market_players(TEST_MARKET_URL)
+
+        assert m.call_count == client.max_retries + 1
+        # Espera exponencial (1s, 2s, 4s) más el azar
+        assert [c.args[0] for c in sleep.call_args_list] == [1.25, 2.25, 4.25]
+        jitter.assert_called_with(0, client.backoff_seconds)
+
+
+def test_rate_limiter_spaces_requests_beyond_burst():
+    """Verifica que el limitador solo deja pasar 'rate' peticiones por segundo."""
+    clock = [100.0]
+
+    def fake_sleep(seconds):
+        clock[0] += seconds
+
+    with (
+        patch("core.sdk.biwenger.time.monotonic", side_effect=lambda: clock[0]),
+        patch("core.sdk.biwenger.time.sleep", side_effect=fake_sleep),
+    ):
+        limiter = RateLimiter(rate=2)
+        for _ in range(6):
+            limiter.acquire()
+
+    # Ráfaga inicial de 2 y después una petición cada 0,5 segundos
+    assert clock[0] == pytest.approx(102.0)
+
+
+def make_jwt(payload):
+    """Construye un JWT sin firma válida, suficiente para leer su caducidad."""
+    encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    return f"cabecera.{encoded.rstrip('=')}.firma"
+
+
+def test_client_reuses_cached_token_without_auth_calls(tmp_path):
+    """Con un token vigente en caché no se hace login ni se consulta la cuenta."""
+    token_cache = TokenCache(str(tmp_path / "token.json"))
+    token_cache.save(TEST_EMAIL, TEST_LEAGUE_ID, "cached_token", 98765)
+
+    with requests_mock.Mocker() as m:
+        client = BiwengerClient(
+            TEST_EMAIL,
+            TEST_PASSWORD,
+            TEST_LOGIN_URL,
+            TEST_ACCOUNT_URL,
+            TEST_LEAGUE_ID,
+            token_cache=token_cache,
+        )
+
+        assert m.call_count == 0
+    assert client.user_id == 98765
+    assert client.session.headers["Authorization"] == "Bearer cached_token"
+    assert client.session.headers["X-User"] == "98765"
+
+
+def test_client_saves_token_after_login(tmp_path, load_json_fixture):
+    """Tras hacer login el token queda guardado para la siguiente ejecución."""
+    token_cache = TokenCache(str(tmp_path / "token.json"))
+    with requests_mock.Mocker() as m:
+        m.post(TEST_LOGIN_URL, json=load_json_fixture("login_response.json"))
+        m.get(TEST_ACCOUNT_URL, json=load_json_fixture("account_response.json"))
+        BiwengerClient(
+            TEST_EMAIL,
+            TEST_PASSWORD,
+            TEST_LOGIN_URL,
+            TEST_ACCOUNT_URL,
+            TEST_LEAGUE_ID,
+            token_cache=token_cache,
+        )
+
+    assert token_cache.load(TEST_EMAIL, TEST_LEAGUE_ID) == {
+        "token": "test_token_12345",
+        "user_id": 98765,
+    }
+    # Otra cuenta u otra liga no reutilizan el token
+    assert token_cache.load("otro@example.com", TEST_LEAGUE_ID) is None
+    assert token_cache.load(TEST_EMAIL, "1") is None
+
+
+def test_token_cache_honours_jwt_expiry(tmp_path):
+    """Un token cuyo 'exp' ya ha pasado no se reutiliza."""
+    token_cache = TokenCache(str(tmp_path / "token.json"))
+    expired = make_jwt({"exp": 1000})
+    token_cache.save(TEST_EMAIL, TEST_LEAGUE_ID, expired, 98765)
+
+    assert token_expiry(expired) == 1000.0
+    assert token_cache.load(TEST_EMAIL, TEST_LEAGUE_ID) is None
+
+
+def test_get_reauthenticates_once_on_401(tmp_path, load_json_fixture):
+    """Un 401 renueva la sesión, guarda el nuevo token y repite la petición."""
+    token_cache = TokenCache(str(tmp_path / "token.json"))
+    token_cache.save(TEST_EMAIL, TEST_LEAGUE_ID, "stale_token", 98765)
+    with requests_mock.Mocker() as m:
+        client = BiwengerClient(
+            TEST_EMAIL,
+            TEST_PASSWORD,
+            TEST_LOGIN_URL,
+            TEST_ACCOUNT_URL,
+            TEST_LEAGUE_ID,
+            token_cache=token_cache,
+        )
+        m.post(TEST_LOGIN_URL, json=load_json_fixture("login_response.json"))
+        m.get(TEST_ACCOUNT_URL, json=load_json_fixture("account_response.json"))
+        m.get(
+            TEST_MARKET_URL,
+            [
+                {"status_code": 401},
+                {"json": {"data": {"sales": [{"id": 1}]}}, "status_code": 200},
+            ],
+        )
+
+        assert client.get_market_players(TEST_MARKET_URL) == [{"id": 1}]
+        assert m.request_history[-1].headers["Authorization"] == (
+            "Bearer test_token_12345"
+        )
+    assert token_cache.load(TEST_EMAIL, TEST_LEAGUE_ID)["token"] == "test_token_12345"
+
+
+def test_get_returns_second_401_without_looping(biwenger_client_authenticated):
+    """Si tras renovar la sesión sigue el 401, se devuelve el error."""
+    client = biwenger_client_authenticated
+    with (
+        requests_mock.Mocker() as m,
+        patch.object(client, "_authenticate") as authenticate,
+    ):
+        m.get(TEST_MARKET_URL, status_code=401)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_market_players(TEST_MARKET_URL)
+
+    authenticate.assert_called_once()
+    assert m.call_count == 2
+
+
+def test_session_mounts_pooled_adapter_with_retries():
+    """Verifica el pool de conexiones y la política de reintentos de la sesión."""
+    session = build_session(pool_size=12, max_retries=2, backoff_seconds=0.5)
+
+    adapter = session.get_adapter("https://biwenger.as.com/api/v2")
+    assert adapter._pool_maxsize == 12
+    retry = adapter.max_retries
+    assert retry.total == 2
+    assert set(retry.status_forcelist) == {500, 502, 503, 504}
+    assert retry.allowed_methods == frozenset({"GET"})
+    assert retry.backoff_jitter == 0.5
+
+
+def test_requests_use_timeout_and_session(biwenger_client_authenticated):
+    """Todas las peticiones, incluida la base de datos de jugadores, usan la sesión y su timeout."""
+    client = biwenger_client_authenticated
+    with (
+        requests_mock.Mocker() as m,
+        patch.object(client.session, "get", wraps=client.session.get) as session_get,
+    ):
+        m.get(TEST_MARKET_URL, json={"data": {"sales": []}})
+        m.get(TEST_PLAYERS_DATA_URL, json={"data": {"players": {}}})
+
+        client.get_market_players(TEST_MARKET_URL)
+        client.get_all_players_data_map(TEST_PLAYERS_DATA_URL)
+
+    assert session_get.call_count == 2
+    for call in session_get.call_args_list:
+        assert call.kwargs["timeout"] == DEFAULT_TIMEOUT
+    # La descarga pública lleva las cabeceras de la sesión
+    assert m.request_history[-1].headers["User-Agent"].startswith("Mozilla/5.0")
@@ -0,0 +1,24 @@
+from core.domain.board_segments import delta_filename, merge_segments
+
+
+def test_delta_filename():
+    """El delta se llama como el CSV base con el sufijo '_delta'."""
+    assert delta_filename("comunicados_25-26.csv") == "comunicados_25-26_delta.csv"
+
+
+def test_merge_segments_puts_delta_first_without_duplicates():
+    """El delta va delante y los mensajes repetidos aparecen una sola vez."""
+    base = [{"id_hash": "b"}, {"id_hash": "a"}]
+    delta = [{"id_hash": "c"}, {"id_hash": "b"}]
+
+    merged = merge_segments(base, delta)
+
+    assert [row["id_hash"] for row in merged] == ["c", "b", "a"]
+
+
+def test_merge_segments_without_delta():
+    """Sin delta (o si no existe en Drive) se devuelve el base."""
+    base = [{"id_hash": "a"}]
+
+    assert merge_segments(base, None) == base
+    assert merge_segments(base, []) == base
@@ -52,6 +52,113 @@ def test_find_file_on_drive_not_found(mock_google_service):
     assert result is None
 
 
+def batch_service(responses, errors=None):
+    """Servicio simulado cuyas peticiones batch responden según su 'request_id'."""
+    service = MagicMock()
+    errors = errors or {}
+
+    def new_batch_http_request(callback):
+        batch = MagicMock()
+        request_ids = []
+        batch.add.side_effect = lambda request, request_id: request_ids.append(
+            request_id
+        )
+        batch.execute.side_effect = lambda: [
+            callback(rid, responses.get(rid), errors.get(rid)) for rid in request_ids
+        ]
+        return batch
+
+    service.new_batch_http_request.side_effect = new_batch_http_request
+    return service
+
+
+def test_list_folder_files_single_batch():
+    """Verifica que carpeta y archivos por ID se piden en una sola llamada batch."""
+    service = batch_service(
+        {
+            "folder": {
+                "files": [
+                    {"id": "a1", "name": "a.csv"},
+                    {"id": "a2", "name": "a.csv"},
+                    {"id": "b1", "name": "b.csv"},
+                ]
+            },
+            "id:sheet1": {"id": "sheet1", "name": "Ligas"},
+        },
+        errors={"id:sheet2": Exception("404")},
+    )
+
+    files_by_name, files_by_id = gcp.list_folder_files(
+        service, "folder123", ["sheet1", "sheet2"]
+    )
+
+    assert files_by_name == {
+        "a.csv": {"id": "a1", "name": "a.csv"},
+        "b.csv": {"id": "b1", "name": "b.csv"},
+    }
+    assert files_by_id == {"sheet1": {"id": "sheet1", "name": "Ligas"}, "sheet2": None}
+    service.new_batch_http_request.assert_called_once()
+    service.files.return_value.list.return_value.execute.assert_not_called()
+
+
+def test_list_folder_files_follows_pages():
+    """Verifica que se piden las páginas siguientes del listado si las hay."""
+    service = batch_service(
+        {"folder": {"files": [{"id": "a1", "name": "a.csv"}], "nextPageToken": "p2"}}
+    )
+    service.files.return_value.list.return_value.execute.return_value = {
+        "files": [{"id": "b1", "name": "b.csv"}]
+    }
+
+    files_by_name, _ = gcp.list_folder_files(service, "folder123")
+
+    assert set(files_by_name) == {"a.csv", "b.csv"}
+    assert service.files.return_value.list.call_args.kwargs["pageToken"] == "p2"
+
+
+def test_list_folder_files_raises_folder_error():
+    """Verifica que un error al listar la carpeta se propaga."""
+    service = batch_service({}, errors={"folder": RuntimeError("boom")})
+    with pytest.raises(RuntimeError):
+        gcp.list_folder_files(service, "folder123")
+
+
+@patch("core.sdk.gcp.time.monotonic")
+@patch("core.sdk.gcp.list_folder_files")
+def test_drive_folder_index_memoizes_within_ttl(mock_list, mock_monotonic):
+    """Verifica que el listado se reutiliza dentro del TTL y se repite al caducar."""
+    mock_monotonic.return_value = 0
+    mock_list.return_value = ({"a.csv": {"id": "a1"}}, {"s1": {"id": "s1"}})
+    index = gcp.DriveFolderIndex(ttl_seconds=60)
+
+    assert index.get(None, "folder", ["s1"])[1] == {"s1": {"id": "s1"}}
+    assert index.find(None, "a.csv", "folder") == {"id": "a1"}
+    assert index.find(None, "missing.csv", "folder") is None
+    mock_list.assert_called_once_with(None, "folder", ["s1"])
+
+    mock_monotonic.return_value = 100
+    index.find(None, "a.csv", "folder")
+    assert mock_list.call_count == 2
+
+
+@patch("core.sdk.gcp.download_csv_as_dict", side_effect=lambda s, file_id: [file_id])
+@patch("core.sdk.gcp.find_file_on_drive")
+@patch("core.sdk.gcp.list_folder_files")
+def test_drive_csv_cache_uses_folder_index(mock_list, mock_find, mock_download):
+    """Verifica que con un índice de carpeta varios CSV comparten un único listado."""
+    mock_list.return_value = (
+        {"a.csv": {"id": "a1", "modifiedTime": "t"}, "b.csv": {"id": "b1"}},
+        {},
+    )
+    cache = gcp.DriveCsvCache(folder_index=gcp.DriveFolderIndex(ttl_seconds=60))
+
+    assert cache.get_rows(None, "a.csv", "folder") == ["a1"]
+    assert cache.get_rows(None, "b.csv", "folder") == ["b1"]
+    assert cache.get_rows(None, "c.csv", "folder") is None
+    mock_list.assert_called_once()
+    mock_find.assert_not_called()
+
+
 @patch("core.sdk.gcp.MediaIoBaseDownload")
 @patch("core.sdk.gcp.io.BytesIO")
 def test_download_csv_from_drive(mock_bytesio, mock_download, mock_google_service):
@@ -68,16 +175,55 @@ def test_download_csv_from_drive(mock_bytesio, mock_download, mock_google_servic
     assert result == mock_content.decode("utf-8")
 
 
-@patch("core.sdk.gcp.download_csv_from_drive")
-def test_download_csv_as_dict_success(mock_download_csv):
+@patch("core.sdk.gcp.iter_drive_file_chunks")
+def test_download_csv_as_dict_success(mock_chunks):
     """Verifica la descarga y conversión exitosa a lista de diccionarios."""
-    csv_string = "col1,col2\nval1,val2\nval3,val4"
-    mock_download_csv.return_value = csv_string
+    mock_chunks.return_value = [b"col1,col2\nval1,val2\nval3,val4"]
     result = gcp.download_csv_as_dict(None, "file_id")
     assert len(result) == 2
     assert result[0] == {"col1": "val1", "col2": "val2"}
 
 
+@patch("core.sdk.gcp.MediaIoBaseDownload")
+def test_iter_drive_file_chunks_yields_each_chunk(mock_download, mock_google_service):
+    """Verifica que cada trozo se entrega en cuanto llega y no se acumula."""
+    parts = iter([b"abc", b"def"])
+    states = iter([False, True])
+
+    def make_downloader(buffer, request, chunksize):
+        downloader = MagicMock()
+
+        def next_chunk():
+            buffer.write(next(parts))
+            return None, next(states)
+
+        downloader.next_chunk.side_effect = next_chunk
+        return downloader
+
+    mock_download.side_effect = make_downloader
+
+    chunks = list(gcp.iter_drive_file_chunks(mock_google_service, "file_id", 3))
+
+    assert chunks == [b"abc", b"def"]
+    assert mock_download.call_args.kwargs["chunksize"] == 3
+
+
+@patch("core.sdk.gcp.iter_drive_file_chunks")
+def test_iter_csv_rows_from_drive_across_chunks(mock_chunks):
+    """Verifica filas con caracteres y campos multilínea partidos entre trozos."""
+    content = 'autor,contenido\r\nJosé,"<p>uno</p>\r\n<p>dos</p>"\r\nAna,Sanción\r\n'
+    data = content.encode("utf-8")
+    mock_chunks.return_value = [data[i : i + 3] for i in range(0, len(data), 3)]
+
+    rows = gcp.iter_csv_rows_from_drive(None, "file_id")
+
+    assert not isinstance(rows, list)
+    assert list(rows) == [
+        {"autor": "José", "contenido": "<p>uno</p>\r\n<p>dos</p>"},
+        {"autor": "Ana", "contenido": "Sanción"},
+    ]
+
+
 def test_download_csv_as_dict_no_file_id():
     """Verifica que se levanta un error si no hay ID de archivo."""
     with pytest.raises(FileNotFoundError):
@@ -125,66 +271,193 @@ def test_upload_csv_to_drive_create_new(mock_upload, mock_google_service, capsys
     mock_google_service.permissions.return_value.create.assert_called_once()
 
 
+# --- Tests para la caché de CSVs de Drive ---
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive")
+def test_drive_csv_cache_hit_within_ttl(mock_find, mock_download):
+    """Verifica que dentro del TTL no se hace ninguna llamada a Drive."""
+    mock_find.return_value = {"id": "f1", "modifiedTime": "2025-09-01T10:00:00Z"}
+    mock_download.return_value = [{"a": "1"}]
+    cache = gcp.DriveCsvCache(ttl_seconds=60)
+
+    first = cache.get_rows(None, "a.csv", "folder")
+    second = cache.get_rows(None, "a.csv", "folder")
+
+    assert first == second == [{"a": "1"}]
+    mock_find.assert_called_once()
+    mock_download.assert_called_once()
+
+
+@patch("core.sdk.gcp.time.monotonic")
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive")
+def test_drive_csv_cache_revalidates_by_modified_time(
+    mock_find, mock_download, mock_monotonic
+):
+    """Verifica que al caducar el TTL solo se descarga si cambia 'modifiedTime'."""
+    mock_monotonic.return_value = 0
+    mock_find.side_effect = [
+        {"id": "f1", "modifiedTime": "2025-09-01T10:00:00Z"},
+        {"id": "f1", "modifiedTime": "2025-09-01T10:00:00Z"},
+        {"id": "f1", "modifiedTime": "2025-09-02T10:00:00Z"},
+    ]
+    mock_download.side_effect = [[{"v": "old"}], [{"v": "new"}]]
+    cache = gcp.DriveCsvCache(ttl_seconds=10)
+
+    assert cache.get_rows(None, "a.csv", "folder") == [{"v": "old"}]
+    mock_monotonic.return_value = 100
+    assert cache.get_rows(None, "a.csv", "folder") == [{"v": "old"}]
+    assert mock_download.call_count == 1
+    mock_monotonic.return_value = 200
+    assert cache.get_rows(None, "a.csv", "folder") == [{"v": "new"}]
+    assert mock_download.call_count == 2
+
+
+@patch("core.sdk.gcp.find_file_on_drive", return_value=None)
+def test_drive_csv_cache_file_not_found(mock_find):
+    """Verifica que devuelve None si el archivo no existe en Drive."""
+    cache = gcp.DriveCsvCache()
+    assert cache.get_rows(None, "missing.csv", "folder") is None
+
+
+@patch("core.sdk.gcp.download_csv_as_dict", side_effect=lambda s, file_id: [file_id])
+@patch("core.sdk.gcp.find_file_on_drive")
+def test_drive_csv_cache_lru_eviction(mock_find, mock_download):
+    """Verifica que se descarta la entrada usada hace más tiempo al superar el límite."""
+    mock_find.side_effect = lambda service, name, folder_id: {
+        "id": name,
+        "modifiedTime": "t",
+    }
+    cache = gcp.DriveCsvCache(ttl_seconds=60, max_entries=2)
+
+    cache.get_rows(None, "a.csv", "folder")
+    cache.get_rows(None, "b.csv", "folder")
+    cache.get_rows(None, "a.csv", "folder")  # 'a' pasa a ser la más reciente
+    cache.get_rows(None, "c.csv", "folder")  # expulsa 'b'
+    cache.get_rows(None, "a.csv", "folder")
+    cache.get_rows(None, "b.csv", "folder")
+
+    assert [c.args[1] for c in mock_download.call_args_list] == [
+        "a.csv",
+        "b.csv",
+        "c.csv",
+        "b.csv",
+    ]
+
+
+@patch("core.sdk.gcp.time.monotonic")
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive")
+def test_drive_csv_cache_derived_once_per_version(
+    mock_find, mock_download, mock_monotonic
+):
+    """Verifica que los datos derivados se calculan una vez por versión del archivo."""
+    mock_monotonic.return_value = 0
+    mock_find.side_effect = [
+        {"id": "f1", "modifiedTime": "t1"},
+        {"id": "f1", "modifiedTime": "t1"},
+        {"id": "f1", "modifiedTime": "t2"},
+    ]
+    mock_download.side_effect = [[1, 2], [1, 2, 3]]
+    build = MagicMock(side_effect=len)
+    cache = gcp.DriveCsvCache(ttl_seconds=10)
+
+    assert cache.get_derived(None, "a.csv", "folder", build) == 2
+    mock_monotonic.return_value = 100  # Caduca el TTL, pero el archivo no cambia
+    assert cache.get_derived(None, "a.csv", "folder", build) == 2
+    assert build.call_count == 1
+    mock_monotonic.return_value = 200  # El archivo cambia
+    assert cache.get_derived(None, "a.csv", "folder", build) == 3
+    assert build.call_count == 2
+
+
 # --- Tests para las operaciones con Google Sheets ---
 
 
+def grid(*rows):
+    """Construye el 'data' de una pestaña tal y como lo devuelve includeGridData."""
+    return [
+        {
+            "rowData": [
+                {"values": [{"formattedValue": v} if v else {} for v in row]}
+                for row in rows
+            ]
+        }
+    ]
+
+
 def test_get_sheets_data_success(mock_sheets_service):
-    """Verifica que se leen los datos de múltiples hojas correctamente."""
-    # Simula la respuesta de .spreadsheets().get().execute()
+    """Verifica que se leen los datos de múltiples hojas con una sola llamada."""
     mock_sheets_service.spreadsheets.return_value.get.return_value.execute.return_value = {
         "sheets": [
-            {"properties": {"title": "Hoja1"}},
-            {"properties": {"title": "Hoja2"}},
+            {
+                "properties": {"title": "Hoja1"},
+                "data": grid(
+                    ["Nombre de la Liga:", "Liga Test 1"],
+                    ["Descripción:", "Desc. 1"],
+                    ["Premio:", "100€"],
+                    ["", ""],
+                    ["Col1", "Col2"],
+                    ["val1", "val2"],
+                ),
+            },
+            {
+                "properties": {"title": "Hoja2"},
+                "data": grid(
+                    ["Nombre de la Liga:", "Liga Test 2"],
+                    ["Descripción:", "Desc. 2"],
+                    ["Premio:", "200€"],
+                    ["", ""],
+                    ["ColA", "ColB", ""],
+                    ["valA", "valB"],
+                ),
+            },
         ]
     }
-    # Simula las respuestas de .spreadsheets().values().get().execute() para cada hoja
-    mock_get_values_execute = MagicMock()
-    mock_get_values_execute.side_effect = [
-        {
-            "values": [
-                ["Nombre de la Liga:", "Liga Test 1"],
-                ["Descripción:", "Desc. 1"],
-                ["Premio:", "100€"],
-                ["", ""],
-                ["Col1", "Col2"],
-                ["val1", "val2"],
-            ]
-        },
-        {
-            "values": [
-                ["Nombre de la Liga:", "Liga Test 2"],
-                ["Descripción:", "Desc. 2"],
-                ["Premio:", "200€"],
-                ["", ""],
-                ["ColA", "ColB"],
-                ["valA", "valB"],
-            ]
-        },
-    ]
-    mock_sheets_service.spreadsheets.return_value.values.return_value.get.return_value.execute = (
-        mock_get_values_execute
-    )
 
     result = gcp.get_sheets_data(mock_sheets_service, "spreadsheet_id")
 
     assert len(result) == 2
     assert result[0]["nombre"] == "Liga Test 1"
     assert result[1]["headers"] == ["ColA", "ColB"]
+    mock_sheets_service.spreadsheets.return_value.get.assert_called_once_with(
+        spreadsheetId="spreadsheet_id",
+        includeGridData=True,
+        fields=gcp.SHEETS_GRID_FIELDS,
+    )
+    mock_sheets_service.spreadsheets.return_value.values.assert_not_called()
 
 
 def test_get_sheets_data_no_data(mock_sheets_service):
     """Verifica que se manejan correctamente las hojas sin datos."""
-    # Simula la respuesta de .spreadsheets().get().execute()
     mock_sheets_service.spreadsheets.return_value.get.return_value.execute.return_value = {
         "sheets": [{"properties": {"title": "HojaVacia"}}]
     }
-    # Simula la respuesta de .spreadsheets().values().get().execute() con datos vacíos
-    mock_get_values_execute = MagicMock()
-    mock_get_values_execute.return_value = {"values": []}
-    mock_sheets_service.spreadsheets.return_value.values.return_value.get.return_value.execute = (
-        mock_get_values_execute
-    )
 
     result = gcp.get_sheets_data(mock_sheets_service, "spreadsheet_id")
 
     assert result == []
+
+
+def test_grid_to_values_trims_empty_cells():
+    """Verifica que se descartan las celdas y filas vacías del final, como en values().get."""
+    data = grid(["a", "", "b", ""], [], ["c"], ["", ""], [])
+    assert gcp.grid_to_values(data) == [["a", "", "b"], [], ["c"]]
+
+
+@patch("core.sdk.gcp.time.monotonic")
+@patch("core.sdk.gcp.get_sheets_data")
+def test_sheets_data_cache_reuses_within_ttl(mock_get_sheets, mock_monotonic):
+    """Verifica que dentro del TTL no se llama a la API y al caducar se relee."""
+    mock_monotonic.return_value = 0
+    mock_get_sheets.side_effect = [["old"], ["new"]]
+    cache = gcp.SheetsDataCache(ttl_seconds=60)
+
+    assert cache.get(None, "sheet1") == ["old"]
+    assert cache.get(None, "sheet1") == ["old"]
+    mock_get_sheets.assert_called_once_with(None, "sheet1")
+    mock_monotonic.return_value = 100
+    assert cache.get(None, "sheet1") == ["new"]
+    assert mock_get_sheets.call_count == 2
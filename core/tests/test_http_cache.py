@@ -0,0 +1,88 @@
+import requests
+import requests_mock
+from unittest.mock import patch
+
+from core.sdk.http_cache import HttpCache
+
+from .constants import TEST_PLAYERS_DATA_URL
+
+
+def test_get_reuses_body_within_ttl(tmp_path):
+    """Dentro del TTL se devuelven los bytes guardados sin tocar la red."""
+    cache = HttpCache(str(tmp_path), ttls={TEST_PLAYERS_DATA_URL: 3600})
+    with requests_mock.Mocker() as m:
+        m.get(TEST_PLAYERS_DATA_URL, json={"data": 1}, headers={"ETag": '"v1"'})
+
+        first = cache.get(TEST_PLAYERS_DATA_URL)
+        second = cache.get(TEST_PLAYERS_DATA_URL)
+
+    assert m.call_count == 1
+    assert second.json() == first.json() == {"data": 1}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_get_revalidates_with_etag_after_ttl(tmp_path):
+    """Pasado el TTL se revalida con ETag y un 304 reutiliza el cuerpo guardado."""
+    cache = HttpCache(str(tmp_path))
+    with requests_mock.Mocker() as m:
+        m.get(
+            TEST_PLAYERS_DATA_URL,
+            [
+                {
+                    "text": "contenido",
+                    "headers": {
+                        "ETag": '"v1"',
+                        "Last-Modified": "Wed, 01 Oct 2025 10:00:00 GMT",
+                    },
+                },
+                {"status_code": 304},
+            ],
+        )
+
+        cache.get(TEST_PLAYERS_DATA_URL)
+        response = cache.get(TEST_PLAYERS_DATA_URL)
+
+        revalidation = m.request_history[1]
+        assert revalidation.headers["If-None-Match"] == '"v1"'
+        assert (
+            revalidation.headers["If-Modified-Since"] == "Wed, 01 Oct 2025 10:00:00 GMT"
+        )
+    assert response.status_code == 200
+    assert response.text == "contenido"
+    assert cache.revalidated == 1
+
+
+def test_get_persists_across_instances(tmp_path):
+    """La caché vive en disco: otra ejecución (otra instancia) la reutiliza."""
+    with requests_mock.Mocker() as m:
+        m.get(TEST_PLAYERS_DATA_URL, text="contenido")
+        HttpCache(str(tmp_path), default_ttl=3600).get(TEST_PLAYERS_DATA_URL)
+        response = HttpCache(str(tmp_path), default_ttl=3600).get(TEST_PLAYERS_DATA_URL)
+
+    assert m.call_count == 1
+    assert response.text == "contenido"
+
+
+def test_get_does_not_store_errors(tmp_path):
+    """Las respuestas de error se devuelven tal cual y no se guardan."""
+    cache = HttpCache(str(tmp_path), default_ttl=3600)
+    with requests_mock.Mocker() as m:
+        m.get(TEST_PLAYERS_DATA_URL, [{"status_code": 500}, {"text": "ok"}])
+
+        assert cache.get(TEST_PLAYERS_DATA_URL).status_code == 500
+        assert cache.get(TEST_PLAYERS_DATA_URL).text == "ok"
+
+    assert m.call_count == 2
+
+
+def test_get_uses_given_fetch_function(tmp_path):
+    """Se puede pasar la función que hace el GET real (p. ej. 'session.get')."""
+    cache = HttpCache(str(tmp_path))
+    session = requests.Session()
+    with requests_mock.Mocker() as m, patch.object(
+        session, "get", wraps=session.get
+    ) as session_get:
+        m.get(TEST_PLAYERS_DATA_URL, text="contenido")
+        cache.get(TEST_PLAYERS_DATA_URL, fetch=session.get, timeout=5)
+
+    session_get.assert_called_once_with(TEST_PLAYERS_DATA_URL, headers={}, timeout=5)
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from core.sdk.json_stream import iter_json_object_items
+
+
+def chunked(text, size):
+    data = text.encode("utf-8")
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+DOCUMENT = json.dumps(
+    {
+        "status": 200,
+        "data": {
+            "teams": {"1": {"id": 1, "name": "Equipo {raro}"}},
+            "players": {
+                "1001": {"id": 1001, "name": "Yamal", "price": 150000000},
+                "1002": {"id": 1002, "name": "Mbappé", "price": 180000000},
+            },
+            "after": [1, 2, 3],
+        },
+    }
+)
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1024])
+def test_iter_json_object_items_across_chunk_boundaries(size):
+    """Los miembros se decodifican igual sea cual sea el tamaño de los trozos."""
+    items = list(iter_json_object_items(chunked(DOCUMENT, size), ("data", "players")))
+
+    assert [key for key, _ in items] == ["1001", "1002"]
+    assert items[1][1] == {"id": 1002, "name": "Mbappé", "price": 180000000}
+
+
+def test_iter_json_object_items_skips_jsonp_wrapper():
+    """Se salta el envoltorio 'jsonp_123(...)' sin copiar el documento."""
+    jsonp = f"jsonp_12345({DOCUMENT}) "
+
+    items = dict(iter_json_object_items(chunked(jsonp, 5), ("data", "players")))
+
+    assert items["1001"]["name"] == "Yamal"
+
+
+def test_iter_json_object_items_stops_after_target_object():
+    """No hace falta leer el resto del documento una vez recorrido el objeto."""
+    # Lo que sigue a 'players' está roto: no debe llegar a leerse
+    broken_tail = '{"data": {"players": {"1": {"id": 1}}, "teams": {'
+
+    items = list(iter_json_object_items([broken_tail.encode()], ("data", "players")))
+
+    assert items == [("1", {"id": 1})]
+
+
+def test_iter_json_object_items_missing_path_is_empty():
+    """Si la ruta no existe no se devuelve ningún miembro."""
+    document = json.dumps({"data": {"teams": {}}})
+
+    assert list(iter_json_object_items([document.encode()], ("data", "players"))) == []
+
+
+def test_iter_json_object_items_rejects_non_json():
+    """Una respuesta sin objeto JSON produce un error claro."""
+    with pytest.raises(ValueError):
+        list(iter_json_object_items([b"<html></html>"], ("data",)))
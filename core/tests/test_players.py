@@ -0,0 +1,56 @@
+from core.domain.players import Player, PlayerCatalogue, UNKNOWN_POSITION
+
+
+def test_catalogue_add_keeps_only_used_fields():
+    """El catálogo guarda un registro compacto por jugador, indexado por ID."""
+    catalogue = PlayerCatalogue()
+    catalogue.add(
+        {"id": 7, "name": "Pedri", "position": 3, "price": 90000000, "teamId": 1}
+    )
+
+    player = catalogue[7]
+    assert player == Player(7, "Pedri", 3, 90000000)
+    assert not hasattr(player, "__dict__")
+    assert catalogue.get(8) is None
+    assert len(catalogue) == 1
+
+
+def test_catalogue_normalizes_position_and_price():
+    """Posiciones desconocidas pasan a 0 y los precios ausentes a 0."""
+    catalogue = PlayerCatalogue()
+    player = catalogue.add({"id": 1, "name": "Nadie", "position": "defensa"})
+
+    assert player.position == UNKNOWN_POSITION
+    assert player.price == 0
+
+
+def test_catalogue_interns_names():
+    """Los nombres repetidos comparten la misma cadena."""
+    catalogue = PlayerCatalogue()
+    first = catalogue.add({"id": 1, "name": "".join(["Will", "iams"])})
+    second = catalogue.add({"id": 2, "name": "".join(["Willi", "ams"])})
+
+    assert first.name is second.name
+
+
+def test_catalogue_memory_is_smaller_than_raw_dicts():
+    """El catálogo ocupa menos que guardar cada diccionario completo."""
+    import sys
+
+    raw = {
+        i: {
+            "id": i,
+            "name": f"Jugador {i % 50}",
+            "position": 1 + i % 4,
+            "price": 1000000,
+            "teamId": i % 20,
+            "status": "ok",
+        }
+        for i in range(500)
+    }
+    catalogue = PlayerCatalogue()
+    for info in raw.values():
+        catalogue.add(info)
+
+    raw_bytes = sys.getsizeof(raw) + sum(sys.getsizeof(info) for info in raw.values())
+    assert catalogue.memory_bytes() < raw_bytes
@@ -0,0 +1,94 @@
+import pytest
+from core.domain.search_index import (
+    BoardSearchIndex,
+    html_to_text,
+    normalize_text,
+    tokenize,
+)
+
+
+@pytest.fixture
+def messages():
+    """Mensajes de ejemplo con el formato del CSV de comunicados."""
+    return [
+        {
+            "id_hash": "h1",
+            "titulo": "Multa a Jorge",
+            "autor": "Dani",
+            "contenido": "<p>Por <b>retraso</b></p>",
+        },
+        {
+            "id_hash": "h2",
+            "titulo": "Crónica - Jornada 1",
+            "autor": "Jorge",
+            "contenido": "<p>Clausulazo</p>",
+        },
+        {
+            "id_hash": "h3",
+            "titulo": "Normas",
+            "autor": "Dani",
+            "contenido": "<p>Sanción por alineación</p>",
+        },
+    ]
+
+
+def test_normalize_and_tokenize():
+    """Verifica la normalización a mayúsculas sin acentos y la división en términos."""
+    assert normalize_text("  Crónica ") == "CRONICA"
+    assert normalize_text(None) == ""
+    assert tokenize("¡Cesión de Muñoz, jornada 3!") == [
+        "CESION",
+        "DE",
+        "MUNOZ",
+        "JORNADA",
+        "3",
+    ]
+
+
+def test_html_to_text():
+    """Verifica que se eliminan las etiquetas HTML del contenido."""
+    assert html_to_text("<p>Hola <b>mundo</b></p>") == "Hola mundo"
+    assert html_to_text(None) == ""
+
+
+def test_search_is_accent_and_case_insensitive(messages):
+    """Verifica que la búsqueda ignora acentos y mayúsculas en título, autor y contenido."""
+    index = BoardSearchIndex.from_messages(messages)
+    assert index.search("jorge") == {"h1", "h2"}
+    assert index.search("SANCION") == {"h3"}
+    assert index.search("alineacion") == {"h3"}
+    assert index.search("b") == set()  # Las etiquetas HTML no se indexan
+
+
+def test_search_requires_all_terms_and_matches_prefixes(messages):
+    """Verifica que deben aparecer todas las palabras y que admiten prefijos."""
+    index = BoardSearchIndex.from_messages(messages)
+    assert index.search("cron jorn") == {"h2"}
+    assert index.search("jorge multa") == {"h1"}
+    assert index.search("jorge inexistente") == set()
+    assert index.search("  ") == set()
+
+
+def test_add_is_incremental_and_idempotent(messages):
+    """Verifica que se pueden añadir mensajes nuevos y que no se duplican."""
+    index = BoardSearchIndex.from_messages(messages[:1])
+    assert index.search("clausulazo") == set()
+    assert index.add_message(messages[1]) is True
+    assert index.add_message(messages[1]) is False
+    assert len(index) == 2
+    assert "h2" in index
+    assert index.search("clausulazo") == {"h2"}
+
+
+def test_json_round_trip(messages):
+    """Verifica que el índice se serializa y se vuelve a cargar sin cambios."""
+    index = BoardSearchIndex.from_messages(messages)
+    loaded = BoardSearchIndex.from_json(index.to_json())
+    assert loaded.ids == index.ids
+    assert loaded.search("dani") == {"h1", "h3"}
+
+
+def test_from_json_rejects_unknown_version():
+    """Verifica que no se cargan índices con un formato desconocido."""
+    with pytest.raises(ValueError):
+        BoardSearchIndex.from_json('{"version": 99, "ids": [], "postings": {}}')
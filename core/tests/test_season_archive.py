@@ -0,0 +1,70 @@
+import gzip
+import json
+
+import pytest
+
+from core.domain.season_archive import (
+    archive_filename,
+    read_season_archive,
+    write_season_archive,
+)
+
+FIELDS = ["id_hash", "fecha", "titulo", "contenido", "categoria"]
+
+
+def sample_messages(count):
+    return [
+        {
+            "id_hash": f"h{i}",
+            "fecha": "01-01-2025 10:00:00",
+            "titulo": f"Comunicado {i}",
+            "contenido": "<p>Texto con tildes: sanción</p>" * 5,
+            "categoria": "comunicado" if i % 2 else "dato",
+        }
+        for i in range(count)
+    ]
+
+
+def test_archive_filename():
+    """El archivo comprimido se llama como el CSV con extensión '.jsonl.gz'."""
+    assert archive_filename("comunicados_25-26.csv") == "comunicados_25-26.jsonl.gz"
+
+
+def test_archive_round_trip_with_header():
+    """Los mensajes se recuperan tal cual y la cabecera describe el contenido."""
+    messages = sample_messages(3)
+
+    data = write_season_archive(messages, FIELDS)
+
+    assert read_season_archive(data) == messages
+    header = json.loads(gzip.decompress(data).decode("utf-8").splitlines()[0])
+    assert header["fields"] == FIELDS
+    assert header["count"] == 3
+    assert header["categories"] == {"dato": 2, "comunicado": 1}
+
+
+def test_archive_is_smaller_than_csv_text():
+    """El archivo comprimido ocupa mucho menos que el texto sin comprimir."""
+    messages = sample_messages(200)
+    raw_size = len(json.dumps(messages).encode("utf-8"))
+
+    assert len(write_season_archive(messages, FIELDS)) < raw_size / 5
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"", b"no es gzip", gzip.compress(b'{"version": 99, "fields": [], "count": 0}')],
+)
+def test_read_rejects_invalid_archives(data):
+    """Un archivo vacío, corrupto o de otra versión produce ValueError."""
+    with pytest.raises(ValueError):
+        read_season_archive(data)
+
+
+def test_read_rejects_truncated_archive():
+    """Si faltan filas respecto a la cabecera el archivo se rechaza."""
+    lines = gzip.decompress(write_season_archive(sample_messages(2), FIELDS))
+    truncated = gzip.compress(b"\n".join(lines.splitlines()[:2]))
+
+    with pytest.raises(ValueError):
+        read_season_archive(truncated)
@@ -131,3 +131,39 @@ def test_get_file_metadata_not_found(mock_google_drive_service):
         assert result[0]["name"] == "missing_file.txt"
         assert result[0]["status"] == "No Encontrado"
         assert result[0]["is_stale"] is False
+
+
+def test_get_file_metadata_single_query(mock_google_drive_service):
+    """Verifica que todos los archivos se buscan con una única consulta a Drive."""
+    mock_google_drive_service.files().list().execute.return_value = {
+        "files": [
+            {"id": "a", "name": "a.csv", "modifiedTime": "2025-09-04T10:00:00Z"},
+            {"id": "c", "name": "c.csv", "modifiedTime": "2025-09-04T10:00:00Z"},
+        ]
+    }
+    mock_google_drive_service.files().list.reset_mock()
+
+    result = utils.get_file_metadata(
+        mock_google_drive_service, "folder_id", ["a.csv", "b.csv", "c.csv"], []
+    )
+
+    assert [r["status"] for r in result] == [
+        "Encontrado",
+        "No Encontrado",
+        "Encontrado",
+    ]
+    mock_google_drive_service.files().list.assert_called_once()
+    query = mock_google_drive_service.files().list.call_args.kwargs["q"]
+    assert "name = 'a.csv' or name = 'b.csv' or name = 'c.csv'" in query
+
+
+def test_get_file_metadata_with_known_files(mock_google_drive_service):
+    """Verifica que no consulta Drive si ya se le pasa la metadata de la carpeta."""
+    files_by_name = {"a.csv": {"id": "a", "modifiedTime": "2025-09-04T10:00:00Z"}}
+
+    result = utils.get_file_metadata(
+        mock_google_drive_service, "folder_id", ["a.csv"], [], files_by_name
+    )
+
+    assert result[0]["status"] == "Encontrado"
+    mock_google_drive_service.files.assert_not_called()
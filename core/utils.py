@@ -13,27 +13,39 @@ def read_secret_from_file(secret_path, fallback=None):
             return f.read().strip()
     return fallback
 
-def get_file_metadata(service, folder_id, filenames, dynamic_files):
-    """Obtiene la metadata de una lista de archivos y comprueba si están desactualizados."""
-    statuses = []
-    now_madrid = datetime.now(pytz.timezone('Europe/Madrid'))
-
-    for name in filenames:
-        query = f"name = '{name}' and '{folder_id}' in parents and trashed=false"
+def get_file_metadata(service, folder_id, filenames, dynamic_files, files_by_name=None):
+    """
+    Obtiene la metadata de una lista de archivos y comprueba si están desactualizados.
+    Todos los archivos se buscan con una sola consulta a Drive; si ya se tiene la
+    metadata de la carpeta (nombre -> archivo), se pasa en 'files_by_name' y no se
+    consulta nada.
+    """
+    if files_by_name is None:
+        names_query = ' or '.join(f"name = '{name}'" for name in filenames)
+        query = f"({names_query}) and '{folder_id}' in parents and trashed=false"
         response = service.files().list(q=query, spaces='drive', fields='files(id, name, modifiedTime)').execute()
-        file = response.get('files', [])[0] if response.get('files') else None
+        files_by_name = {}
+        for file in response.get('files', []):
+            files_by_name.setdefault(file['name'], file)
 
-        if file:
-            dt_utc = parser.isoparse(file['modifiedTime'])
-            dt_madrid = dt_utc.astimezone(pytz.timezone('Europe/Madrid'))
-            formatted_date = dt_madrid.strftime('%d-%m-%Y a las %H:%M:%S')
+    now_madrid = datetime.now(pytz.timezone('Europe/Madrid'))
+    return [
+        get_file_status(name, files_by_name.get(name), name in dynamic_files, now_madrid)
+        for name in filenames
+    ]
 
-            is_stale = False
-            # Comprueba si el archivo debe ser revisado y si tiene más de 7 días
-            if name in dynamic_files and (now_madrid - dt_madrid) > timedelta(days=7):
-                is_stale = True
+def get_file_status(name, file, check_stale, now_madrid=None):
+    """
+    Estado de un archivo para el panel de administración a partir de su metadata
+    de Drive (None si no existe). Si 'check_stale', se marca como desactualizado
+    cuando tiene más de 7 días.
+    """
+    if not file:
+        return {'name': name, 'status': 'No Encontrado', 'last_updated': 'N/A', 'is_stale': False}
 
-            statuses.append({'name': name, 'status': 'Encontrado', 'last_updated': formatted_date, 'is_stale': is_stale})
-        else:
-            statuses.append({'name': name, 'status': 'No Encontrado', 'last_updated': 'N/A', 'is_stale': False})
-    return statuses
\ No newline at end of file
+    now_madrid = now_madrid or datetime.now(pytz.timezone('Europe/Madrid'))
+    dt_utc = parser.isoparse(file['modifiedTime'])
+    dt_madrid = dt_utc.astimezone(pytz.timezone('Europe/Madrid'))
+    formatted_date = dt_madrid.strftime('%d-%m-%Y a las %H:%M:%S')
+    is_stale = check_stale and (now_madrid - dt_madrid) > timedelta(days=7)
+    return {'name': name, 'status': 'Encontrado', 'last_updated': formatted_date, 'is_stale': is_stale}
@@ -13,6 +13,17 @@ BIWENGER_EMAIL = os.getenv("BIWENGER_EMAIL")
 BIWENGER_PASSWORD = os.getenv("BIWENGER_PASSWORD")
 GDRIVE_FOLDER_ID = os.getenv("GDRIVE_FOLDER_ID")
 
+# Fuerza a descargar el tablón completo en lugar de sincronizar solo lo nuevo
+FULL_SYNC = os.getenv("FULL_SYNC", "false").lower() == "true"
+# Páginas del tablón que se piden en paralelo al descargarlo completo
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+# Mensajes que puede acumular el CSV delta antes de compactarlo en el CSV base
+COMUNICADOS_DELTA_MAX_ROWS = int(os.getenv("COMUNICADOS_DELTA_MAX_ROWS", "300"))
+# Token de sesión de Biwenger reutilizado entre ejecuciones (vacío para desactivarlo)
+BIWENGER_TOKEN_CACHE_FILE = os.getenv(
+    "BIWENGER_TOKEN_CACHE_FILE", "biwenger_token.json"
+)
+
 # --- CONFIGURACIÓN NO CRÍTICA (valores fijos) ---
 LEAGUE_ID = "340703"
 SCOPES = ["https://www.googleapis.com/auth/drive"]
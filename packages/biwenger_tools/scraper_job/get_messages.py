@@ -13,17 +13,71 @@ from packages.biwenger_tools.scraper_job.logic.processing import (
     process_participation,
     sort_messages,
     get_all_board_messages,
+    get_high_water_mark,
 )
+from core.domain.board_segments import delta_filename, merge_segments
+from core.domain.season_archive import (
+    archive_filename,
+    read_season_archive,
+    write_season_archive,
+)
+from core.domain.search_index import BoardSearchIndex
 from core.sdk.gcp import (
     get_google_service,
     find_file_on_drive,
     download_csv_as_dict,
+    download_file_from_drive,
+    upload_bytes_to_drive,
     upload_csv_to_drive,
+    upload_file_to_drive,
 )
-from core.sdk.biwenger import BiwengerClient
+from core.sdk.biwenger import BiwengerClient, TokenCache
 from core.utils import read_secret_from_file
 
 
+def load_search_index(drive_service, index_file_meta):
+    """
+    Descarga el índice de búsqueda de la temporada. Si no existe o no se puede
+    leer, se devuelve uno vacío para reconstruirlo a partir del CSV.
+    """
+    if not index_file_meta:
+        return BoardSearchIndex()
+    try:
+        content = download_file_from_drive(drive_service, index_file_meta["id"])
+        return BoardSearchIndex.from_json(content.decode("utf-8"))
+    except Exception as e:
+        # El índice es un derivado del CSV: un fallo al leerlo no debe parar la sincronización
+        print(f"⚠️  No se pudo leer el índice de búsqueda, se reconstruirá: {e}")
+        return BoardSearchIndex()
+
+
+COMUNICADOS_FIELDS = ["id_hash", "fecha", "autor", "titulo", "contenido", "categoria"]
+
+
+def load_season_archive(drive_service, archive_file_meta):
+    """
+    Descarga los mensajes del archivo comprimido de la temporada. Devuelve None si
+    no existe o no se puede leer (p. ej. recién creado vacío en Drive).
+    """
+    if not archive_file_meta:
+        return None
+    try:
+        content = download_file_from_drive(drive_service, archive_file_meta["id"])
+        return read_season_archive(content)
+    except Exception as e:
+        print(f"⚠️  No se pudo leer el archivo comprimido de la temporada: {e}")
+        return None
+
+
+def messages_to_csv(messages):
+    """Serializa mensajes con las columnas del CSV de comunicados."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=COMUNICADOS_FIELDS)
+    writer.writeheader()
+    writer.writerows(messages)
+    return output.getvalue()
+
+
 def main():
     """
     Función principal que orquesta el scraping de mensajes, el procesamiento
@@ -65,6 +119,11 @@ def main():
             config.LOGIN_URL,
             config.ACCOUNT_URL,
             config.LEAGUE_ID,
+            token_cache=(
+                TokenCache(config.BIWENGER_TOKEN_CACHE_FILE)
+                if config.BIWENGER_TOKEN_CACHE_FILE
+                else None
+            ),
         )
 
         # --- 2. Descargar datos existentes de Google Drive ---
@@ -73,25 +132,79 @@ def main():
             drive_service, comunicados_filename, gdrive_folder_id
         )
 
-        all_messages = []
-        existing_ids = set()
-        if comunicados_file_meta:
-            all_messages = download_csv_as_dict(
-                drive_service, comunicados_file_meta["id"]
+        # El archivo comprimido contiene lo mismo que el CSV base y se lee más rápido
+        comunicados_archive_filename = archive_filename(comunicados_filename)
+        archive_file_meta = find_file_on_drive(
+            drive_service, comunicados_archive_filename, gdrive_folder_id
+        )
+        base_messages = load_season_archive(drive_service, archive_file_meta)
+        archive_stale = archive_file_meta is not None and base_messages is None
+        if base_messages is None:
+            base_messages = []
+            if comunicados_file_meta:
+                base_messages = download_csv_as_dict(
+                    drive_service, comunicados_file_meta["id"]
+                )
+        if not comunicados_file_meta:
+            print(f"ℹ️  No se encontró '{comunicados_filename}'. Se creará uno nuevo.")
+
+        # Segmento delta: mensajes llegados desde la última compactación del CSV base
+        comunicados_delta_filename = delta_filename(comunicados_filename)
+        delta_file_meta = find_file_on_drive(
+            drive_service, comunicados_delta_filename, gdrive_folder_id
+        )
+        delta_messages = []
+        if delta_file_meta:
+            delta_messages = download_csv_as_dict(drive_service, delta_file_meta["id"])
+        else:
+            # La cuenta de servicio no puede crear ficheros en la carpeta de Drive
+            print(
+                f"⚠️  No se encontró '{comunicados_delta_filename}'. Crea ese fichero "
+                "vacío en Drive para subir solo los mensajes nuevos en cada ejecución."
+            )
+
+        all_messages = merge_segments(base_messages, delta_messages)
+        existing_ids = {msg["id_hash"] for msg in all_messages}
+
+        # --- 3. Cargar el índice de búsqueda y completarlo si le faltan mensajes ---
+        index_filename = f"comunicados_{config.TEMPORADA_ACTUAL}_index.json"
+        index_file_meta = find_file_on_drive(
+            drive_service, index_filename, gdrive_folder_id
+        )
+        reindexed_count = 0
+        if index_file_meta:
+            search_index = load_search_index(drive_service, index_file_meta)
+            reindexed_count = sum(
+                search_index.add_message(msg)
+                for msg in all_messages
+                if msg["id_hash"] not in search_index
             )
-            existing_ids = {msg["id_hash"] for msg in all_messages}
         else:
-            print(f"ℹ️  No se encontró '{comunicados_filename}'. Se creará uno nuevo.")
+            # La cuenta de servicio no puede crear ficheros en la carpeta de Drive
+            search_index = None
+            print(
+                f"⚠️  No se encontró '{index_filename}'. Crea ese fichero vacío en "
+                "Drive para que el scraper pueda mantener el índice de búsqueda."
+            )
+        if reindexed_count:
+            print(f"🔎 Se han añadido {reindexed_count} mensajes existentes al índice.")
 
+        # Sincronización incremental: solo se pagina hasta el último mensaje guardado
+        since = None if config.FULL_SYNC else get_high_water_mark(all_messages)
+        if since is not None:
+            print(f"⏱️  Sincronización incremental desde el timestamp {since}.")
         board_messages = get_all_board_messages(
-            biwenger, f"{config.BASE_URL}/league/{config.LEAGUE_ID}/board?type=text"
+            biwenger,
+            f"{config.BASE_URL}/league/{config.LEAGUE_ID}/board?type=text",
+            since=since,
+            max_workers=config.BACKFILL_WORKERS,
         )
 
         print(f"📊 Total de mensajes descargados: {len(board_messages)}")
         user_map = biwenger.get_league_users(config.LEAGUE_USERS_URL)
 
         # --- 4. Procesar y fusionar datos ---
-        new_messages_count = 0
+        new_messages = []
         for item in board_messages:
             content_html = item.get("content", "")
             soup = BeautifulSoup(content_html, "html.parser")
@@ -100,7 +213,6 @@ def main():
             id_hash = hashlib.sha256(unique_string.encode("utf-8")).hexdigest()
 
             if id_hash not in existing_ids:
-                new_messages_count += 1
                 author_id = item.get("author", {}).get("id")
                 author_name = user_map.get(author_id, "Autor Desconocido")
 
@@ -109,47 +221,75 @@ def main():
                 fecha_madrid = fecha_utc.astimezone(ZoneInfo("Europe/Madrid"))
                 fecha_str = fecha_madrid.strftime("%d-%m-%Y %H:%M:%S")
 
-                all_messages.append(
-                    {
-                        "id_hash": id_hash,
-                        "fecha": fecha_str,
-                        "autor": author_name,
-                        "titulo": item.get("title", "Sin título"),
-                        "contenido": content_html,
-                        "categoria": categorize_title(item.get("title", "")),
-                    }
-                )
+                message = {
+                    "id_hash": id_hash,
+                    "fecha": fecha_str,
+                    "autor": author_name,
+                    "titulo": item.get("title", "Sin título"),
+                    "contenido": content_html,
+                    "categoria": categorize_title(item.get("title", "")),
+                }
+                all_messages.append(message)
+                new_messages.append(message)
+                existing_ids.add(id_hash)
+                if search_index is not None:
+                    search_index.add_message(message, content_text)
 
         # --- 5. Si hay cambios, subir los archivos actualizados a Drive ---
+        new_messages_count = len(new_messages)
         if new_messages_count > 0:
             print(f"\n✅ Se han encontrado {new_messages_count} mensajes nuevos.")
             all_messages = sort_messages(all_messages)
 
-            # Subir archivo de comunicados
-            output_comunicados = io.StringIO()
-            writer = csv.DictWriter(
-                output_comunicados,
-                fieldnames=[
-                    "id_hash",
-                    "fecha",
-                    "autor",
-                    "titulo",
-                    "contenido",
-                    "categoria",
-                ],
-            )
-            writer.writeheader()
-            writer.writerows(all_messages)
-            existing_comunicados_id = (
-                comunicados_file_meta["id"] if comunicados_file_meta else None
-            )
-            upload_csv_to_drive(
-                drive_service,
-                gdrive_folder_id,
-                comunicados_filename,
-                output_comunicados.getvalue(),
-                existing_comunicados_id,
+            # Normalmente solo se reescribe el delta; el CSV base se compacta (se
+            # reescribe con toda la temporada) cuando el delta crece demasiado
+            pending_delta = sort_messages(delta_messages + new_messages)
+            compact = (
+                config.FULL_SYNC
+                or not comunicados_file_meta
+                or not delta_file_meta
+                or archive_stale
+                or len(pending_delta) > config.COMUNICADOS_DELTA_MAX_ROWS
             )
+            if compact:
+                if delta_file_meta:
+                    print(
+                        f"🗜️  Compactando {len(pending_delta)} mensajes del delta "
+                        f"en '{comunicados_filename}'."
+                    )
+                upload_csv_to_drive(
+                    drive_service,
+                    gdrive_folder_id,
+                    comunicados_filename,
+                    messages_to_csv(all_messages),
+                    comunicados_file_meta["id"] if comunicados_file_meta else None,
+                )
+                if archive_file_meta:
+                    upload_bytes_to_drive(
+                        drive_service,
+                        gdrive_folder_id,
+                        comunicados_archive_filename,
+                        write_season_archive(all_messages, COMUNICADOS_FIELDS),
+                        archive_file_meta["id"],
+                        "application/gzip",
+                    )
+                # El base ya contiene el delta: se vacía después para no perder mensajes
+                if delta_file_meta and delta_messages:
+                    upload_csv_to_drive(
+                        drive_service,
+                        gdrive_folder_id,
+                        comunicados_delta_filename,
+                        messages_to_csv([]),
+                        delta_file_meta["id"],
+                    )
+            else:
+                upload_csv_to_drive(
+                    drive_service,
+                    gdrive_folder_id,
+                    comunicados_delta_filename,
+                    messages_to_csv(pending_delta),
+                    delta_file_meta["id"],
+                )
 
             # Subir archivo de participación
             participacion_filename = f"participacion_{config.TEMPORADA_ACTUAL}.csv"
@@ -177,6 +317,17 @@ def main():
         else:
             print("\n✅ No hay mensajes nuevos.")
 
+        # --- 6. Subir el índice de búsqueda si ha cambiado ---
+        if search_index is not None and (new_messages_count > 0 or reindexed_count > 0):
+            upload_file_to_drive(
+                drive_service,
+                gdrive_folder_id,
+                index_filename,
+                search_index.to_json(),
+                index_file_meta["id"],
+                "application/json",
+            )
+
     except Exception as e:
         print(f"❌ Ocurrió un error inesperado: {e}")
 
@@ -1,5 +1,8 @@
-import unidecode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from core.domain.search_index import normalize_text
 
 
 def categorize_title(title):
@@ -7,7 +10,7 @@ def categorize_title(title):
     if not title:
         return "comunicado"
     # Normalizamos a mayúsculas y sin acentos para hacer la comparación más robusta
-    normalized_title = unidecode.unidecode(title.strip().upper())
+    normalized_title = normalize_text(title)
 
     if normalized_title.startswith("CRONICA -") or normalized_title.startswith(
         "CRONICAS"
@@ -70,24 +73,66 @@ def sort_messages(messages):
     return messages
 
 
-def get_all_board_messages(biwenger, base_url, limit=200):
+def get_high_water_mark(messages):
+    """
+    Devuelve el timestamp (segundos UTC) del mensaje más reciente ya guardado, a
+    partir de su 'fecha' en hora de Madrid, o None si no hay ninguno válido.
+    En la hora repetida del cambio de horario se toma la primera, de modo que la
+    marca nunca es posterior al mensaje real y no se pierde ningún mensaje.
+    """
+    madrid = ZoneInfo("Europe/Madrid")
+    mark = None
+    for msg in messages:
+        try:
+            fecha = datetime.strptime(msg["fecha"], "%d-%m-%Y %H:%M:%S")
+        except (KeyError, ValueError, TypeError):
+            continue
+        timestamp = int(fecha.replace(tzinfo=madrid).timestamp())
+        if mark is None or timestamp > mark:
+            mark = timestamp
+    return mark
+
+
+def fetch_board_page(biwenger, base_url, limit, offset):
+    """Descarga una página del tablón a partir del desplazamiento indicado."""
+    url = f"{base_url}&limit={limit}&offset={offset}"
+    messages = biwenger.get_board_messages(url).get("data", [])
+    print(f"📥 Página offset={offset} → {len(messages)} mensajes")
+    return messages
+
+
+def get_all_board_messages(biwenger, base_url, limit=200, since=None, max_workers=1):
     """
     Descarga todos los mensajes del board de Biwenger usando paginación automática.
+    Si se indica 'since' (timestamp del último mensaje guardado), la sincronización
+    es incremental: el tablón llega del más reciente al más antiguo, así que se deja
+    de paginar en cuanto el mensaje más antiguo de una página es anterior o igual a
+    esa marca, y solo se devuelven los mensajes desde la marca en adelante.
+    Sin marca y con 'max_workers' > 1, el tablón completo se descarga en paralelo.
     """
+    if since is None and max_workers > 1:
+        return get_all_board_messages_parallel(biwenger, base_url, limit, max_workers)
+
     all_messages = []
     offset = 0
 
     while True:
-        url = f"{base_url}&limit={limit}&offset={offset}"
-        data = biwenger.get_board_messages(url)
-        messages = data.get("data", [])
-
-        print(f"📥 Página offset={offset} → {len(messages)} mensajes")
+        messages = fetch_board_page(biwenger, base_url, limit, offset)
 
         if not messages:
             break
 
-        all_messages.extend(messages)
+        if since is not None:
+            # Los mensajes del mismo segundo que la marca se conservan: el hash decide
+            recent = [m for m in messages if m.get("date", 0) >= since]
+            all_messages.extend(recent)
+            # El tablón va del más reciente al más antiguo: si el último de la
+            # página ya es anterior a la marca, no hay nada nuevo más allá
+            if messages[-1].get("date", 0) <= since:
+                print("⏹️  Alcanzada la marca de la última sincronización.")
+                break
+        else:
+            all_messages.extend(messages)
         offset += limit
 
         # Si devuelve menos mensajes que el límite, ya hemos llegado al final
@@ -96,3 +141,29 @@ def get_all_board_messages(biwenger, base_url, limit=200):
 
     print(f"✅ Total mensajes descargados: {len(all_messages)}")
     return all_messages
+
+
+def get_all_board_messages_parallel(biwenger, base_url, limit=200, max_workers=4):
+    """
+    Descarga el tablón completo pidiendo 'max_workers' páginas a la vez con el
+    mismo cliente. Las páginas se procesan en orden de desplazamiento, de modo que
+    el resultado es idéntico al secuencial, y se para en la primera página incompleta.
+    """
+    all_messages = []
+    offset = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            offsets = [offset + i * limit for i in range(max_workers)]
+            pages = executor.map(
+                lambda page_offset: fetch_board_page(
+                    biwenger, base_url, limit, page_offset
+                ),
+                offsets,
+            )
+            for messages in pages:
+                all_messages.extend(messages)
+                if len(messages) < limit:
+                    print(f"✅ Total mensajes descargados: {len(all_messages)}")
+                    return all_messages
+            offset += max_workers * limit
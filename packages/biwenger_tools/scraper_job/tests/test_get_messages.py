@@ -5,9 +5,11 @@ import hashlib
 from unittest.mock import patch, MagicMock
 
 # Se actualizan las importaciones para que apunten al nuevo nombre de la carpeta
-from packages.biwenger_tools.scraper_job.get_messages import main
+from packages.biwenger_tools.scraper_job.get_messages import COMUNICADOS_FIELDS, main
 from packages.biwenger_tools.scraper_job.logic.processing import get_all_board_messages
 from core.sdk.biwenger import BiwengerClient
+from core.domain.search_index import BoardSearchIndex
+from core.domain.season_archive import read_season_archive, write_season_archive
 
 # --- Fixture para mockear servicios externos en todos los tests del archivo ---
 
@@ -30,6 +32,12 @@ def mock_external_deps():
     ) as mock_download_csv, patch(
         "packages.biwenger_tools.scraper_job.get_messages.upload_csv_to_drive"
     ) as mock_upload_csv, patch(
+        "packages.biwenger_tools.scraper_job.get_messages.download_file_from_drive"
+    ) as mock_download_file, patch(
+        "packages.biwenger_tools.scraper_job.get_messages.upload_file_to_drive"
+    ) as mock_upload_file, patch(
+        "packages.biwenger_tools.scraper_job.get_messages.upload_bytes_to_drive"
+    ) as mock_upload_bytes, patch(
         "packages.biwenger_tools.scraper_job.get_messages.os.path.exists",
         return_value=True,
     ):
@@ -43,6 +51,9 @@ def mock_external_deps():
             "find_file": mock_find_file,
             "download_csv": mock_download_csv,
             "upload_csv": mock_upload_csv,
+            "download_file": mock_download_file,
+            "upload_file": mock_upload_file,
+            "upload_bytes": mock_upload_bytes,
         }
 
 
@@ -108,7 +119,13 @@ def test_main_with_new_messages(mock_external_deps):
         ]
     }
 
-    mock_external_deps["find_file"].return_value = None
+    # Los CSV no existen todavía, pero el índice (vacío) sí se creó a mano en Drive
+    mock_external_deps["find_file"].side_effect = lambda service, name, folder: (
+        {"id": "index_id"} if name.endswith("_index.json") else None
+    )
+    mock_external_deps["download_file"].return_value = (
+        BoardSearchIndex().to_json().encode("utf-8")
+    )
 
     # Se llama a la función main() directamente
     main()
@@ -119,6 +136,14 @@ def test_main_with_new_messages(mock_external_deps):
     uploaded_content = call_args[0][3]
     assert "Un nuevo comunicado" in uploaded_content
 
+    # El índice de búsqueda se publica junto al CSV con el mensaje nuevo
+    mock_external_deps["upload_file"].assert_called_once()
+    index_args = mock_external_deps["upload_file"].call_args[0]
+    assert index_args[2] == "comunicados_25-26_index.json"
+    index = BoardSearchIndex.from_json(index_args[3])
+    assert len(index) == 1
+    assert len(index.search("nuevo comunicado")) == 1
+
 
 def test_main_no_new_messages(mock_external_deps):
     """Prueba el flujo principal cuando no hay nuevos mensajes."""
@@ -147,8 +172,192 @@ def test_main_no_new_messages(mock_external_deps):
 
     mock_external_deps["find_file"].return_value = {"id": "fake_id"}
     mock_external_deps["download_csv"].return_value = [existing_message]
+    mock_external_deps["download_file"].return_value = (
+        BoardSearchIndex.from_messages([existing_message]).to_json().encode("utf-8")
+    )
 
     # Se llama a la función main() directamente
     main()
 
     mock_external_deps["upload_csv"].assert_not_called()
+    mock_external_deps["upload_file"].assert_not_called()
+
+
+def test_main_rebuilds_unreadable_index(mock_external_deps):
+    """Prueba que un índice ilegible se reconstruye desde el CSV y se vuelve a subir."""
+    existing_message = {
+        "id_hash": "abc",
+        "fecha": "01-01-2023 00:00:00",
+        "autor": "Jorge",
+        "titulo": "Crónica - Jornada 1",
+        "contenido": "<p>Goleada</p>",
+        "categoria": "cronica",
+    }
+    mock_external_deps["biwenger"].get_board_messages.return_value = {"data": []}
+    mock_external_deps["find_file"].side_effect = lambda service, name, folder: (
+        {"id": "index_id"} if name.endswith("_index.json") else {"id": "csv_id"}
+    )
+    mock_external_deps["download_csv"].return_value = [existing_message]
+    mock_external_deps["download_file"].return_value = b'{"version": 1}'
+
+    main()
+
+    mock_external_deps["upload_csv"].assert_not_called()
+    index_args = mock_external_deps["upload_file"].call_args[0]
+    assert index_args[4] == "index_id"
+    assert BoardSearchIndex.from_json(index_args[3]).search("goleada") == {"abc"}
+
+
+def test_main_without_index_file_still_syncs(mock_external_deps):
+    """Prueba que sin el fichero del índice en Drive se sincroniza igual y no se intenta crearlo."""
+    mock_external_deps["biwenger"].get_league_users.return_value = {123: "Jorge"}
+    mock_external_deps["biwenger"].get_board_messages.return_value = {
+        "data": [
+            {
+                "id": 1,
+                "date": 1672531200,
+                "author": {"id": 123},
+                "title": "Un nuevo comunicado",
+                "content": "Contenido del comunicado.",
+            }
+        ]
+    }
+    mock_external_deps["find_file"].return_value = None
+
+    main()
+
+    assert mock_external_deps["upload_csv"].call_count == 2
+    mock_external_deps["upload_file"].assert_not_called()
+
+
+def board_with_one_new_message():
+    return {
+        "data": [
+            {
+                "id": 2,
+                "date": 1672617600,
+                "author": {"id": 123},
+                "title": "Otro comunicado",
+                "content": "Contenido nuevo.",
+            }
+        ]
+    }
+
+
+def test_main_uploads_only_delta_segment(mock_external_deps):
+    """Con el delta creado en Drive solo se sube el delta, no toda la temporada."""
+    base_message = {
+        "id_hash": "base",
+        "fecha": "01-01-2023 00:00:00",
+        "autor": "Jorge",
+        "titulo": "Comunicado antiguo",
+        "contenido": "<p>Antiguo</p>",
+        "categoria": "comunicado",
+    }
+    mock_external_deps["biwenger"].get_league_users.return_value = {123: "Jorge"}
+    mock_external_deps["biwenger"].get_board_messages.return_value = (
+        board_with_one_new_message()
+    )
+    # Sin archivo comprimido en Drive
+    mock_external_deps["find_file"].side_effect = lambda service, name, folder: (
+        None if name.endswith(".jsonl.gz") else {"id": name}
+    )
+    mock_external_deps["download_csv"].side_effect = lambda service, file_id: (
+        [] if "_delta" in file_id else [base_message]
+    )
+    mock_external_deps["download_file"].return_value = (
+        BoardSearchIndex.from_messages([base_message]).to_json().encode("utf-8")
+    )
+
+    main()
+
+    uploads = {
+        c[0][2]: c[0][3] for c in mock_external_deps["upload_csv"].call_args_list
+    }
+    assert set(uploads) == {"comunicados_25-26_delta.csv", "participacion_25-26.csv"}
+    delta_content = uploads["comunicados_25-26_delta.csv"]
+    assert "Otro comunicado" in delta_content
+    assert "Comunicado antiguo" not in delta_content
+    # La participación se sigue calculando con toda la temporada
+    assert "Jorge,2" in uploads["participacion_25-26.csv"]
+
+
+def test_main_compacts_delta_over_threshold(mock_external_deps):
+    """Si el delta supera el máximo se reescribe el base y se vacía el delta."""
+    delta_message = {
+        "id_hash": "delta",
+        "fecha": "01-01-2023 12:00:00",
+        "autor": "Jorge",
+        "titulo": "Comunicado del delta",
+        "contenido": "<p>Delta</p>",
+        "categoria": "comunicado",
+    }
+    mock_external_deps["biwenger"].get_league_users.return_value = {123: "Jorge"}
+    mock_external_deps["biwenger"].get_board_messages.return_value = (
+        board_with_one_new_message()
+    )
+    mock_external_deps["find_file"].side_effect = lambda service, name, folder: {
+        "id": name
+    }
+    mock_external_deps["download_csv"].side_effect = lambda service, file_id: (
+        [delta_message] if "_delta" in file_id else []
+    )
+    mock_external_deps["download_file"].return_value = (
+        BoardSearchIndex().to_json().encode("utf-8")
+    )
+
+    with patch(
+        "packages.biwenger_tools.scraper_job.get_messages.config.COMUNICADOS_DELTA_MAX_ROWS",
+        1,
+    ):
+        main()
+
+    calls = [c[0] for c in mock_external_deps["upload_csv"].call_args_list]
+    assert [c[2] for c in calls[:2]] == [
+        "comunicados_25-26.csv",
+        "comunicados_25-26_delta.csv",
+    ]
+    assert "Comunicado del delta" in calls[0][3]
+    assert "Otro comunicado" in calls[0][3]
+    # El delta queda vacío (solo la cabecera)
+    assert calls[1][3].strip() == "id_hash,fecha,autor,titulo,contenido,categoria"
+
+
+def test_main_reads_archive_and_republishes_it_on_compaction(mock_external_deps):
+    """El base se lee del archivo comprimido y se vuelve a publicar al compactar."""
+    base_message = {
+        "id_hash": "base",
+        "fecha": "01-01-2023 00:00:00",
+        "autor": "Jorge",
+        "titulo": "Comunicado antiguo",
+        "contenido": "<p>Antiguo</p>",
+        "categoria": "comunicado",
+    }
+    archive = write_season_archive([base_message], COMUNICADOS_FIELDS)
+    index = BoardSearchIndex.from_messages([base_message]).to_json().encode("utf-8")
+    mock_external_deps["biwenger"].get_league_users.return_value = {123: "Jorge"}
+    mock_external_deps["biwenger"].get_board_messages.return_value = (
+        board_with_one_new_message()
+    )
+    mock_external_deps["find_file"].side_effect = lambda service, name, folder: {
+        "id": name
+    }
+    mock_external_deps["download_csv"].return_value = []
+    mock_external_deps["download_file"].side_effect = lambda service, file_id: (
+        archive if file_id.endswith(".jsonl.gz") else index
+    )
+
+    with patch(
+        "packages.biwenger_tools.scraper_job.get_messages.config.FULL_SYNC", True
+    ):
+        main()
+
+    # El CSV base no se descarga: solo el delta
+    mock_external_deps["download_csv"].assert_called_once()
+    upload_args = mock_external_deps["upload_bytes"].call_args[0]
+    assert upload_args[2] == "comunicados_25-26.jsonl.gz"
+    republished = read_season_archive(upload_args[3])
+    assert [m["titulo"] for m in republished] == [
+        "Otro comunicado",
+        "Comunicado antiguo",
+    ]
@@ -9,8 +9,10 @@ from packages.biwenger_tools.scraper_job.logic.processing import (
     process_participation,
     sort_messages,
     get_all_board_messages,
+    get_high_water_mark,
 )
 from core.sdk.biwenger import BiwengerClient
+from unittest.mock import MagicMock
 
 # --- Tests unitarios para las funciones de lógica ---
 
@@ -65,3 +67,86 @@ def test_sort_messages():
     assert sorted_messages[1]["fecha"] == "02-01-2024 10:00:00"
     assert sorted_messages[2]["fecha"] == "01-01-2024 12:00:00"
     assert sorted_messages[3]["fecha"] == "fecha-invalida"
+
+
+def test_get_high_water_mark():
+    """Prueba que la marca es el timestamp UTC del mensaje más reciente."""
+    messages = [
+        {"fecha": "01-01-2023 01:00:00"},  # 2023-01-01 00:00:00 UTC
+        {"fecha": "31-12-2022 10:00:00"},
+        {"fecha": "fecha-invalida"},
+        {},
+    ]
+    assert get_high_water_mark(messages) == 1672531200
+    assert get_high_water_mark([]) is None
+
+
+def test_get_all_board_messages_incremental_stops_at_mark():
+    """Prueba que la sincronización incremental deja de paginar al llegar a la marca."""
+    biwenger = MagicMock()
+    biwenger.get_board_messages.side_effect = [
+        {"data": [{"date": 300 - i} for i in range(2)]},
+        {"data": [{"date": 100}, {"date": 99}]},
+        {"data": [{"date": 98}, {"date": 97}]},
+    ]
+
+    messages = get_all_board_messages(biwenger, "http://test.com", limit=2, since=100)
+
+    assert [m["date"] for m in messages] == [300, 299, 100]
+    assert biwenger.get_board_messages.call_count == 2
+
+
+def test_get_all_board_messages_incremental_single_call_with_news():
+    """Prueba que basta una llamada si la página ya llega hasta la marca."""
+    biwenger = MagicMock()
+    biwenger.get_board_messages.return_value = {
+        "data": [{"date": 300}, {"date": 150}, {"date": 90}]
+    }
+
+    messages = get_all_board_messages(biwenger, "http://test.com", limit=3, since=100)
+
+    assert [m["date"] for m in messages] == [300, 150]
+    biwenger.get_board_messages.assert_called_once()
+
+
+def test_get_all_board_messages_incremental_single_call_without_news():
+    """Prueba que sin mensajes nuevos basta con una sola llamada a la API."""
+    biwenger = MagicMock()
+    biwenger.get_board_messages.return_value = {
+        "data": [{"date": 100 - i} for i in range(200)]
+    }
+
+    messages = get_all_board_messages(biwenger, "http://test.com", since=100)
+
+    assert [m["date"] for m in messages] == [100]
+    biwenger.get_board_messages.assert_called_once()
+
+
+def test_get_all_board_messages_parallel_keeps_order_and_stops_on_short_page():
+    """Prueba que la descarga en paralelo conserva el orden y para en la página corta."""
+    pages = {0: [1, 2], 2: [3, 4], 4: [5], 6: []}
+    biwenger = MagicMock()
+    biwenger.get_board_messages.side_effect = lambda url: {
+        "data": [{"id": i} for i in pages[int(url.rsplit("=", 1)[1])]]
+    }
+
+    messages = get_all_board_messages(
+        biwenger, "http://test.com?type=text", limit=2, max_workers=2
+    )
+
+    assert [m["id"] for m in messages] == [1, 2, 3, 4, 5]
+    # Dos oleadas de dos páginas: la segunda contiene la página incompleta
+    assert biwenger.get_board_messages.call_count == 4
+
+
+def test_get_all_board_messages_incremental_ignores_workers():
+    """Prueba que con marca de sincronización la paginación sigue siendo secuencial."""
+    biwenger = MagicMock()
+    biwenger.get_board_messages.return_value = {"data": [{"date": 50}]}
+
+    messages = get_all_board_messages(
+        biwenger, "http://test.com", since=100, max_workers=4
+    )
+
+    assert messages == []
+    biwenger.get_board_messages.assert_called_once()
@@ -14,6 +14,17 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 LEAGUE_ID = "340703"
 FINAL_REPORT_NAME = "squads_export.csv"
 BACKUP_COEFFS_CSV = "analitica_fantasy_data_backup.csv"
+MATCH_CACHE_FILE = "player_match_cache.json"
+# Límite de peticiones a la API de Biwenger y plantillas descargadas a la vez
+BIWENGER_REQUESTS_PER_SECOND = float(os.getenv("BIWENGER_REQUESTS_PER_SECOND", "5"))
+SQUAD_FETCH_WORKERS = 8
+# Token de sesión de Biwenger reutilizado entre ejecuciones (vacío para desactivarlo)
+BIWENGER_TOKEN_CACHE_FILE = os.getenv(
+    "BIWENGER_TOKEN_CACHE_FILE", "biwenger_token.json"
+)
+# Tiempo máximo (segundos) de cada fuente de datos; el scraping con Selenium es el más lento
+STAGE_TIMEOUTS_SECONDS = {"analitica_fantasy": 900}
+DEFAULT_STAGE_TIMEOUT_SECONDS = 120
 
 # --- URLs DE LAS APIS ---
 BASE_URL_BIWENGER = "https://biwenger.as.com/api/v2"
@@ -29,6 +40,31 @@ MARKET_URL = f"{BASE_URL_BIWENGER}/market"
 
 JORNADA_PERFECTA_MERCADO_URL = "https://www.jornadaperfecta.com/mercado/"
 ANALITICA_FANTASY_URL = "https://www.analiticafantasy.com/oraculo-fantasy"
+# Motor para Analítica Fantasy: "auto" (HTTP y, si falla, Selenium), "http" o "selenium"
+ANALITICA_FANTASY_ENGINE = os.getenv("ANALITICA_FANTASY_ENGINE", "auto")
+# Ruta y campos de la lista de jugadores en el JSON embebido ('__NEXT_DATA__').
+# No están verificados contra una respuesta real: si no casan, la vía HTTP no
+# devuelve filas (o menos del mínimo) y en modo "auto" se recurre a Selenium.
+ANALITICA_FANTASY_DATA_PATH = ("props", "pageProps", "players")
+ANALITICA_FANTASY_FIELDS = {
+    "nombre": "name",
+    "coeficiente": "coefficient",
+    "puntuacion_esperada": "expectedPoints",
+}
+ANALITICA_FANTASY_MIN_ROWS = 50
+
+# Navegador compartido: se recicla tras N páginas o si supera la memoria indicada (MB)
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "200"))
+BROWSER_MAX_RSS_MB = int(os.getenv("BROWSER_MAX_RSS_MB", "1500"))
+
+# Caché HTTP en disco: dentro del TTL (segundos) se reutiliza la descarga anterior y,
+# pasado, se revalida con ETag/Last-Modified (una respuesta 304 si no ha cambiado)
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+HTTP_CACHE_TTLS_SECONDS = {
+    ALL_PLAYERS_DATA_URL: 6 * 3600,
+    JORNADA_PERFECTA_MERCADO_URL: 3600,
+    ANALITICA_FANTASY_URL: 3600,
+}
 
 TELEGRAM_API_URL = "https://api.telegram.org/bot{token}/sendDocument"
 
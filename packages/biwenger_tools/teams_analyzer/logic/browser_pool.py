@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def process_tree_rss_mb(root_pid):
+    """
+    Memoria residente (MB) de un proceso y todos sus descendientes leyendo /proc.
+    Devuelve None fuera de Linux o si no se puede leer.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    children = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    # El nombre del proceso va entre paréntesis y puede tener espacios
+                    fields = f.read().rsplit(")", 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return None
+
+    total_kb = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class BrowserPool:
+    """
+    Mantiene un único navegador headless caliente para todas las fuentes que usan
+    Selenium dentro del proceso. Se recicla tras 'max_pages' páginas o si supera
+    'max_rss_mb' de memoria, y guarda los tiempos de arranque y cierre.
+    """
+
+    def __init__(self, create_driver, quit_driver, max_pages=200, max_rss_mb=None):
+        self.create_driver = create_driver
+        self.quit_driver = quit_driver
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.startup_seconds = []
+        self.shutdown_seconds = []
+        self._driver = None
+        self._pages = 0
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def lease(self):
+        """
+        Presta el navegador (arrancándolo o reciclándolo si hace falta) a un único
+        usuario a la vez. Si el usuario falla, el navegador se descarta porque su
+        estado ya no es fiable.
+        """
+        with self._lock:
+            if self._driver is not None and self._needs_recycle():
+                print("♻️  Reciclando el navegador...")
+                self._shutdown()
+            if self._driver is None:
+                start = time.perf_counter()
+                self._driver = self.create_driver()
+                self._pages = 0
+                self.startup_seconds.append(time.perf_counter() - start)
+                print(f"🌐 Navegador arrancado en {self.startup_seconds[-1]:.2f}s")
+            try:
+                yield self._driver
+            except BaseException:
+                self._shutdown()
+                raise
+
+    def record_page(self, count=1):
+        """Anota páginas cargadas para reciclar el navegador cuando toque."""
+        self._pages += count
+
+    def _needs_recycle(self):
+        if self.max_pages and self._pages >= self.max_pages:
+            return True
+        if self.max_rss_mb:
+            service_process = getattr(
+                getattr(self._driver, "service", None), "process", None
+            )
+            pid = getattr(service_process, "pid", None)
+            rss = process_tree_rss_mb(pid) if isinstance(pid, int) else None
+            if rss is not None and rss > self.max_rss_mb:
+                return True
+        return False
+
+    def _shutdown(self):
+        driver, self._driver = self._driver, None
+        if driver is None:
+            return
+        start = time.perf_counter()
+        try:
+            self.quit_driver(driver)
+        except Exception as e:
+            print(f"⚠️  Error al cerrar el navegador: {e}")
+        self.shutdown_seconds.append(time.perf_counter() - start)
+
+    def close(self):
+        """
+        Cierra el navegador si está arrancado y muestra los tiempos acumulados.
+        No espera al préstamo en curso: si el orquestador abandona una etapa colgada,
+        el navegador se cierra igualmente y esa etapa termina con error.
+        """
+        self._shutdown()
+        if self.startup_seconds:
+            print(
+                f"🌐 Navegador: {len(self.startup_seconds)} arranques "
+                f"({sum(self.startup_seconds):.2f}s) y {len(self.shutdown_seconds)} "
+                f"cierres ({sum(self.shutdown_seconds):.2f}s)."
+            )
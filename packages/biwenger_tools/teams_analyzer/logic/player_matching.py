@@ -1,3 +1,7 @@
+import hashlib
+import json
+import os
+
 from unidecode import unidecode
 
 # Este mapa es específico para la lógica de este analizador.
@@ -25,49 +29,197 @@ def normalize_name(name):
     return unidecode(name.lower().strip())
 
 
+NO_MATCH = {"coeficiente": "N/A", "puntuacion_esperada": "N/A"}
+
+
+class MatchCache:
+    """
+    Caché persistente (JSON) de emparejamientos Biwenger -> Analítica Fantasy,
+    indexada por ID de jugador de Biwenger. Guarda la clave resuelta y la
+    estrategia usada; se descarta entera si cambia su huella (nombres de
+    Analítica Fantasy, PLAYER_NAME_MAPPINGS o STRATEGY_VERSION) y una entrada se
+    ignora si Biwenger cambia el nombre del jugador. Los fallos no se guardan,
+    para que se reintenten en cada ejecución.
+    """
+
+    VERSION = 1
+    # Incrementar al cambiar las estrategias de PlayerMatcher.resolve
+    STRATEGY_VERSION = 1
+
+    def __init__(self, path, analitica_map):
+        self.path = path
+        self.fingerprint = self.fingerprint_for(analitica_map)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def fingerprint_for(analitica_map):
+        """Huella de todo lo que decide un emparejamiento: fuente, excepciones y estrategias."""
+        digest = hashlib.sha1()
+        digest.update(f"estrategias={MatchCache.STRATEGY_VERSION}\n".encode("utf-8"))
+        for biwenger_name, mapped_name in sorted(PLAYER_NAME_MAPPINGS.items()):
+            digest.update(f"{biwenger_name}->{mapped_name}\n".encode("utf-8"))
+        for key in sorted(analitica_map):
+            digest.update(key.encode("utf-8") + b"\n")
+        return digest.hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  No se pudo leer la caché de emparejamientos: {e}")
+            return
+        if (
+            data.get("version") != self.VERSION
+            or data.get("fingerprint") != self.fingerprint
+        ):
+            print("ℹ️  La fuente de coeficientes ha cambiado. Se descarta la caché.")
+            return
+        self.entries = data.get("entries", {})
+
+    def get(self, player_id, biwenger_name):
+        """Devuelve la entrada (clave, estrategia) cacheada o None si no sirve."""
+        entry = self.entries.get(str(player_id))
+        if entry and entry.get("name") == biwenger_name:
+            self.hits += 1
+            return entry["key"], entry["strategy"]
+        self.misses += 1
+        return None
+
+    def put(self, player_id, biwenger_name, key, strategy):
+        self.entries[str(player_id)] = {
+            "name": biwenger_name,
+            "key": key,
+            "strategy": strategy,
+        }
+
+    def save(self):
+        """Escribe la caché de forma atómica (fichero temporal + renombrado)."""
+        data = {
+            "version": self.VERSION,
+            "fingerprint": self.fingerprint,
+            "entries": self.entries,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def print_stats(self):
+        total = self.hits + self.misses
+        ratio = (self.hits / total * 100) if total else 0
+        print(
+            f"📈 Caché de emparejamientos: {self.hits} aciertos, "
+            f"{self.misses} fallos ({ratio:.0f}% de aciertos)."
+        )
+
+
+class PlayerMatcher:
+    """
+    Índice de coincidencias sobre el mapa de Analítica Fantasy (nombre
+    normalizado -> datos). Las estrategias se aplican en el mismo orden de
+    siempre, pero todas son búsquedas en diccionarios: la de subconjunto usa un
+    índice invertido palabra -> posiciones, que se construye una sola vez y solo
+    cuando algún nombre llega a esa estrategia.
+    """
+
+    def __init__(self, analitica_map, cache=None):
+        self.analitica_map = analitica_map
+        self.cache = cache
+        self._keys = None
+        self._token_sets = None
+        self._postings = None
+
+    def _build_token_index(self):
+        self._keys = list(self.analitica_map)
+        self._token_sets = [frozenset(key.split()) for key in self._keys]
+        self._postings = {}
+        for position, tokens in enumerate(self._token_sets):
+            for token in tokens:
+                self._postings.setdefault(token, []).append(position)
+
+    def resolve(self, biwenger_name):
+        """
+        Devuelve (clave en el mapa de Analítica Fantasy, estrategia) para un nombre
+        de Biwenger, o (None, None) si ninguna estrategia encuentra coincidencia.
+        """
+        norm_b_name = normalize_name(biwenger_name)
+
+        # Estrategia 1: Búsqueda por nombre original normalizado (la más fiable)
+        if norm_b_name in self.analitica_map:
+            return norm_b_name, "exacto"
+
+        # Estrategia 2: Mapeo de excepciones (casos especiales definidos a mano)
+        mapped_name = PLAYER_NAME_MAPPINGS.get(norm_b_name)
+        if mapped_name in self.analitica_map:
+            return mapped_name, "excepcion"
+
+        # Estrategia 3: Transformaciones automáticas para nombres compuestos
+        name_parts = norm_b_name.split()
+        if len(name_parts) > 1:
+            # Intenta coincidir solo con el apellido (ej: 'pacha espino' -> 'espino')
+            if name_parts[-1] in self.analitica_map:
+                return name_parts[-1], "apellido"
+
+            # Intenta coincidir solo con el nombre (ej: 'giuliano simeone' -> 'giuliano')
+            if name_parts[0] in self.analitica_map:
+                return name_parts[0], "nombre"
+
+            # Intenta coincidir con inicial. apellido (ej: 'carlos vicente' -> 'c. vicente')
+            initial_last_name = f"{name_parts[0][0]}. {name_parts[-1]}"
+            if initial_last_name in self.analitica_map:
+                return initial_last_name, "inicial_apellido"
+
+        # Estrategia 4: Búsqueda por subconjunto (último recurso). Se gana la
+        # primera entrada del mapa que contenga todas las palabras, como antes.
+        position = self._first_superset(set(name_parts))
+        if position is not None:
+            return self._keys[position], "subconjunto"
+
+        return None, None
+
+    def match(self, biwenger_name, player_id=None):
+        """
+        Devuelve los datos de Analítica Fantasy del jugador o los valores por defecto.
+        Con 'player_id' y caché, se consulta primero la resolución de ejecuciones previas.
+        """
+        if self.cache is None or player_id is None:
+            key, _ = self.resolve(biwenger_name)
+        else:
+            cached = self.cache.get(player_id, biwenger_name)
+            if cached is not None:
+                key, _ = cached
+            else:
+                key, strategy = self.resolve(biwenger_name)
+                if key is not None:
+                    self.cache.put(player_id, biwenger_name, key, strategy)
+        return self.analitica_map[key] if key is not None else dict(NO_MATCH)
+
+    def _first_superset(self, parts):
+        """Posición de la primera entrada cuyas palabras incluyen todas las de 'parts'."""
+        if self._postings is None:
+            self._build_token_index()
+        if not parts:
+            return 0 if self._keys else None
+        candidates = min((self._postings.get(part, []) for part in parts), key=len)
+        for position in candidates:
+            if parts <= self._token_sets[position]:
+                return position
+        return None
+
+
 def find_player_match(biwenger_name, analitica_map):
     """
-    Versión mejorada que automatiza patrones comunes de nombres y usa
-    un mapa de mapeo reducido solo para las excepciones.
+    Busca los datos de un jugador de Biwenger en el mapa de Analítica Fantasy.
+    Las coincidencias directas no recorren el mapa; para emparejar muchos
+    jugadores conviene crear un PlayerMatcher una vez y reutilizar su índice.
     """
-    norm_b_name = normalize_name(biwenger_name)
-
-    # Estrategia 1: Búsqueda por nombre original normalizado (la más fiable)
-    if norm_b_name in analitica_map:
-        return analitica_map[norm_b_name]
-
-    # Estrategia 2: Mapeo de excepciones (casos especiales definidos a mano)
-    if norm_b_name in PLAYER_NAME_MAPPINGS:
-        mapped_name = PLAYER_NAME_MAPPINGS[norm_b_name]
-        if mapped_name in analitica_map:
-            return analitica_map[mapped_name]
-
-    # Estrategia 3: Transformaciones automáticas para nombres compuestos
-    name_parts = norm_b_name.split()
-    if len(name_parts) > 1:
-        # Intenta coincidir solo con el apellido (ej: 'pacha espino' -> 'espino')
-        last_name = name_parts[-1]
-        if last_name in analitica_map:
-            return analitica_map[last_name]
-
-        # Intenta coincidir solo con el nombre (ej: 'giuliano simeone' -> 'giuliano')
-        first_name = name_parts[0]
-        if first_name in analitica_map:
-            return analitica_map[first_name]
-
-        # Intenta coincidir con inicial. apellido (ej: 'carlos vicente' -> 'c. vicente')
-        initial_last_name = f"{name_parts[0][0]}. {name_parts[-1]}"
-        if initial_last_name in analitica_map:
-            return analitica_map[initial_last_name]
-
-    # Estrategia 4: Búsqueda por subconjunto (último recurso)
-    b_name_parts_set = set(name_parts)
-    for a_name, data in analitica_map.items():
-        if b_name_parts_set.issubset(set(a_name.split())):
-            return data
-
-    # Si nada funciona, se devuelve el valor por defecto
-    return {"coeficiente": "N/A", "puntuacion_esperada": "N/A"}
+    return PlayerMatcher(analitica_map).match(biwenger_name)
 
 
 def map_position(pos_id):
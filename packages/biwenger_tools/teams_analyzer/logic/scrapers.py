@@ -3,7 +3,6 @@ import json
 import os
 import re
 import requests
-import time
 import shutil
 import tempfile
 import traceback
@@ -15,15 +14,33 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
 
 # Solo importa WebDriverManager si estamos en local
 RUNNING_IN_DOCKER = os.path.exists("/.dockerenv")
 if not RUNNING_IN_DOCKER:
     from webdriver_manager.chrome import ChromeDriverManager
 
+from core.sdk.http_cache import HttpCache
 from packages.biwenger_tools.teams_analyzer import config
+from packages.biwenger_tools.teams_analyzer.logic.browser_pool import BrowserPool
 from packages.biwenger_tools.teams_analyzer.logic.player_matching import normalize_name
+from packages.biwenger_tools.teams_analyzer.logic.selenium_waits import (
+    PageTimer,
+    wait_for_page_change,
+    wait_for_row_count_change,
+    wait_until_gone,
+)
+
+AF_ROW_SELECTOR = "tr.MuiTableRow-root"
+
+
+# Caché en disco de las descargas HTTP, compartida con el cliente de Biwenger
+http_cache = HttpCache(config.HTTP_CACHE_DIR, ttls=config.HTTP_CACHE_TTLS_SECONDS)
 
 
 def fetch_jp_player_tips():
@@ -31,8 +48,11 @@ def fetch_jp_player_tips():
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
     }
-    response = requests.get(
-        config.JORNADA_PERFECTA_MERCADO_URL, headers=headers, verify=False
+    response = http_cache.get(
+        config.JORNADA_PERFECTA_MERCADO_URL,
+        fetch=requests.get,
+        headers=headers,
+        verify=False,
     )
     response.raise_for_status()
     soup = BeautifulSoup(response.text, "html.parser")
@@ -84,143 +104,118 @@ def create_chrome_driver():
             )
 
         driver.get("about:blank")
+        # El perfil temporal se borra al cerrar el navegador (quit_chrome_driver)
+        driver.profile_dir = temp_dir
         return driver
 
     except Exception as e:
         if driver:
             driver.quit()
-        raise Exception(f"No se pudo iniciar Chrome/Chromium: {e}") from e
-    finally:
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
+        raise Exception(f"No se pudo iniciar Chrome/Chromium: {e}") from e
 
 
-def fetch_analitica_fantasy_coeffs():
-    """
-    Descarga los coeficientes de Analítica Fantasy, ignorando problemas de dropdown.
-    """
-    print("▶️ Descargando coeficientes de Analítica Fantasy (usando Selenium)...")
-    driver = None
-    coeffs_map = {}
-    temp_dir = None
-
+def quit_chrome_driver(driver):
+    """Cierra el navegador y borra su perfil temporal."""
     try:
-        driver = create_chrome_driver()
-        driver.get(config.ANALITICA_FANTASY_URL)
-        wait = WebDriverWait(driver, 60)
+        driver.quit()
+    finally:
+        profile_dir = getattr(driver, "profile_dir", None)
+        if isinstance(profile_dir, str) and os.path.exists(profile_dir):
+            shutil.rmtree(profile_dir, ignore_errors=True)
 
-        try:
-            cookie_button = wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//button[contains(., 'ACEPTO')]")
-                )
-            )
-            driver.execute_script("arguments[0].click();", cookie_button)
-            print("✅ Pop-up de cookies aceptado.")
-            time.sleep(2)
-        except TimeoutException:
-            print("⚠️  No se encontró el botón de cookies. Continuando...")
 
-        print("    -> Sincronizando con la tabla de datos...")
-        wait.until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "tr.MuiTableRow-root"))
-        )
-        print("✅ Tabla de datos cargada.")
+# Navegador compartido por todas las fuentes con Selenium del proceso
+browser_pool = BrowserPool(
+    create_driver=lambda: create_chrome_driver(),
+    quit_driver=lambda driver: quit_chrome_driver(driver),
+    max_pages=config.BROWSER_MAX_PAGES,
+    max_rss_mb=config.BROWSER_MAX_RSS_MB,
+)
 
-        try:
-            print("    -> Intentando configurar vista de 50 jugadores por página...")
-            pagination_container = wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "div.MuiTableContainer-root + div")
-                )
-            )
-            driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center'});", pagination_container
-            )
-            time.sleep(1)
 
-            page_size_dropdown_xpath = "//label[text()='Elementos por página']/following-sibling::div/div[@role='combobox']"
-            page_size_dropdown = wait.until(
-                EC.element_to_be_clickable((By.XPATH, page_size_dropdown_xpath))
-            )
+def _format_af_coefficient(value):
+    """Coeficiente con coma decimal, tal y como lo muestra la tabla de la web."""
+    return str(value).strip().replace(".", ",")
 
-            actions = ActionChains(driver)
-            actions.move_to_element(page_size_dropdown).click().perform()
 
-            option_50_xpath = "//ul[@role='listbox']/li[@data-value='50']"
-            option_50 = wait.until(
-                EC.element_to_be_clickable((By.XPATH, option_50_xpath))
-            )
-            option_50.click()
+def _format_af_expected_score(value):
+    """Puntuación esperada; los rangos se unen con ' / ' como en la tabla."""
+    if isinstance(value, (list, tuple)):
+        return " / ".join(str(v).strip() for v in value)
+    return str(value).strip()
 
-            print("✅ Vista configurada a 50 jugadores.")
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(3)
-        except Exception as e:
-            print(
-                "⚠️  No se pudo cambiar la vista a 50. Se continúa con la paginación por defecto."
-            )
-            print(f"   --- Error Detallado: {str(e).splitlines()[0]} ---")
-
-        page_number = 1
-        while True:
-            print(f"    ...analizando página {page_number}...")
-            player_rows = driver.find_elements(By.CSS_SELECTOR, "tr.MuiTableRow-root")
-            if not player_rows:
-                print("    -> No se encontraron más filas de jugadores.")
-                break
 
-            for row in player_rows:
-                try:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) > 6:
-                        player_name = (
-                            cells[1]
-                            .find_element(By.CSS_SELECTOR, "p.MuiTypography-root")
-                            .text.strip()
-                        )
-                        coefficient = (
-                            cells[2]
-                            .find_element(By.CSS_SELECTOR, "p.MuiTypography-root")
-                            .text.strip()
-                        )
-                        expected_score = cells[6].text.strip().replace("\n", " / ")
-
-                        if player_name and coefficient:
-                            normalized_name = normalize_name(player_name)
-                            coeffs_map[normalized_name] = {
-                                "coeficiente": coefficient,
-                                "puntuacion_esperada": expected_score,
-                            }
-                except (NoSuchElementException, IndexError):
-                    continue
-
-            try:
-                next_button_xpath = "//button[contains(., 'Siguiente')]"
-                next_button_element = driver.find_element(By.XPATH, next_button_xpath)
-                if not next_button_element.is_enabled():
-                    print(
-                        "    -> El botón 'Siguiente' está desactivado. Fin del scraping."
-                    )
-                    break
+def extract_analitica_fantasy_coeffs(html):
+    """
+    Extrae los coeficientes del JSON embebido ('__NEXT_DATA__') de la página de
+    Analítica Fantasy, sin navegador, leyendo la lista de jugadores en la ruta
+    configurada. Devuelve {} si la página no trae esos datos.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    script_tag = soup.find("script", id="__NEXT_DATA__")
+    if not script_tag or not script_tag.string:
+        return {}
+    data = json.loads(script_tag.string)
+    for key in config.ANALITICA_FANTASY_DATA_PATH:
+        data = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(data, list):
+        return {}
 
-                driver.execute_script(
-                    "arguments[0].scrollIntoView(true);", next_button_element
-                )
-                time.sleep(1)
-                driver.execute_script("arguments[0].click();", next_button_element)
-                page_number += 1
-                time.sleep(3)
-            except NoSuchElementException:
-                print("    -> No se encontró el botón 'Siguiente'. Fin del scraping.")
-                break
-    except Exception:
-        traceback.print_exc()
-    finally:
-        if driver:
-            driver.quit()
-        if temp_dir and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+    fields = config.ANALITICA_FANTASY_FIELDS
+    coeffs_map = {}
+    for player in data:
+        player_name = player.get(fields["nombre"])
+        coefficient = player.get(fields["coeficiente"])
+        expected_score = player.get(fields["puntuacion_esperada"])
+        if player_name and coefficient not in (None, ""):
+            coeffs_map[normalize_name(player_name)] = {
+                "coeficiente": _format_af_coefficient(coefficient),
+                "puntuacion_esperada": (
+                    _format_af_expected_score(expected_score)
+                    if expected_score is not None
+                    else "N/A"
+                ),
+            }
+    return coeffs_map
+
+
+def fetch_analitica_fantasy_coeffs_http():
+    """Descarga la página de Analítica Fantasy y extrae los coeficientes del JSON embebido."""
+    print("▶️  Descargando coeficientes de Analítica Fantasy (HTTP)...")
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
+    }
+    response = http_cache.get(
+        config.ANALITICA_FANTASY_URL, fetch=requests.get, headers=headers, timeout=30
+    )
+    response.raise_for_status()
+    return extract_analitica_fantasy_coeffs(response.text)
+
+
+def fetch_analitica_fantasy_coeffs(cancel_event=None):
+    """
+    Descarga los coeficientes de Analítica Fantasy. Primero intenta la extracción
+    HTTP del JSON embebido y, si no da resultados, recurre a Selenium
+    (según 'ANALITICA_FANTASY_ENGINE': auto, http o selenium).
+    Si se activa 'cancel_event', el scraping con Selenium se detiene y cierra el navegador.
+    """
+    engine = config.ANALITICA_FANTASY_ENGINE
+    coeffs_map = {}
+
+    if engine in ("auto", "http"):
+        try:
+            coeffs_map = fetch_analitica_fantasy_coeffs_http()
+            if len(coeffs_map) < config.ANALITICA_FANTASY_MIN_ROWS:
+                print(f"⚠️  El JSON embebido solo trae {len(coeffs_map)} coeficientes.")
+                coeffs_map = {}
+        except Exception as e:
+            print(f"⚠️  Falló la extracción HTTP de Analítica Fantasy: {e}")
+            coeffs_map = {}
+
+    if not coeffs_map and engine in ("auto", "selenium"):
+        coeffs_map = fetch_analitica_fantasy_coeffs_selenium(cancel_event)
 
     # Guardar CSV de respaldo
     if coeffs_map:
@@ -245,3 +240,189 @@ def fetch_analitica_fantasy_coeffs():
         f"✅ Base de datos de Analítica Fantasy con {len(coeffs_map)} coeficientes creada."
     )
     return coeffs_map
+
+
+# Lee toda la tabla en una sola llamada: [nombre, coeficiente, puntuación esperada]
+# por fila, con el mismo texto visible que devolvería WebElement.text
+AF_ROWS_SCRIPT = """
+const text = (cell, selector) => {
+    const element = selector ? cell.querySelector(selector) : cell;
+    return element ? element.innerText : null;
+};
+return Array.from(document.querySelectorAll(arguments[0])).map((row) => {
+    const cells = row.querySelectorAll("td");
+    if (cells.length <= 6) return null;
+    return [
+        text(cells[1], "p.MuiTypography-root"),
+        text(cells[2], "p.MuiTypography-root"),
+        text(cells[6]),
+    ];
+}).filter((row) => row !== null);
+"""
+
+
+def extract_af_rows_js(driver):
+    """
+    Extrae las filas de la página actual con un único execute_script en lugar de
+    varias llamadas a WebDriver por celda. Devuelve None si el navegador no
+    devuelve una lista, para recurrir a la extracción celda a celda.
+    """
+    try:
+        rows = driver.execute_script(AF_ROWS_SCRIPT, AF_ROW_SELECTOR)
+    except WebDriverException as e:
+        print(f"⚠️  Falló la extracción por JavaScript: {str(e).splitlines()[0]}")
+        return None
+    if not isinstance(rows, list):
+        return None
+    return [tuple(row) for row in rows if isinstance(row, list) and len(row) == 3]
+
+
+def extract_af_rows_webdriver(player_rows):
+    """Extracción celda a celda con WebDriver (más lenta, solo como respaldo)."""
+    rows = []
+    for row in player_rows:
+        try:
+            cells = row.find_elements(By.TAG_NAME, "td")
+            if len(cells) > 6:
+                rows.append(
+                    (
+                        cells[1]
+                        .find_element(By.CSS_SELECTOR, "p.MuiTypography-root")
+                        .text,
+                        cells[2]
+                        .find_element(By.CSS_SELECTOR, "p.MuiTypography-root")
+                        .text,
+                        cells[6].text,
+                    )
+                )
+        except (NoSuchElementException, IndexError):
+            continue
+    return rows
+
+
+def fetch_analitica_fantasy_coeffs_selenium(cancel_event=None):
+    """
+    Descarga los coeficientes de Analítica Fantasy navegando la tabla con Selenium,
+    ignorando problemas de dropdown. Es el método de respaldo.
+    """
+    print("▶️ Descargando coeficientes de Analítica Fantasy (usando Selenium)...")
+    coeffs_map = {}
+    timer = PageTimer()
+
+    try:
+        with browser_pool.lease() as driver:
+            scrape_analitica_fantasy_table(driver, coeffs_map, timer, cancel_event)
+    except Exception:
+        traceback.print_exc()
+    finally:
+        timer.print_summary()
+
+    return coeffs_map
+
+
+def scrape_analitica_fantasy_table(driver, coeffs_map, timer, cancel_event=None):
+    """Recorre la tabla del Oráculo con el navegador dado y rellena 'coeffs_map'."""
+    driver.get(config.ANALITICA_FANTASY_URL)
+    browser_pool.record_page()
+    wait = WebDriverWait(driver, 60)
+
+    try:
+        cookie_button = wait.until(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'ACEPTO')]"))
+        )
+        driver.execute_script("arguments[0].click();", cookie_button)
+        try:
+            wait_until_gone(driver, cookie_button)
+        except TimeoutException:
+            print("⚠️  El pop-up de cookies sigue visible. Continuando...")
+        print("✅ Pop-up de cookies aceptado.")
+    except TimeoutException:
+        print("⚠️  No se encontró el botón de cookies. Continuando...")
+
+    print("    -> Sincronizando con la tabla de datos...")
+    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, AF_ROW_SELECTOR)))
+    print("✅ Tabla de datos cargada.")
+    timer.lap("carga inicial")
+
+    try:
+        print("    -> Intentando configurar vista de 50 jugadores por página...")
+        pagination_container = wait.until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "div.MuiTableContainer-root + div")
+            )
+        )
+        driver.execute_script(
+            "arguments[0].scrollIntoView({block: 'center'});", pagination_container
+        )
+
+        page_size_dropdown_xpath = "//label[text()='Elementos por página']/following-sibling::div/div[@role='combobox']"
+        page_size_dropdown = wait.until(
+            EC.element_to_be_clickable((By.XPATH, page_size_dropdown_xpath))
+        )
+
+        actions = ActionChains(driver)
+        actions.move_to_element(page_size_dropdown).click().perform()
+
+        option_50_xpath = "//ul[@role='listbox']/li[@data-value='50']"
+        option_50 = wait.until(EC.element_to_be_clickable((By.XPATH, option_50_xpath)))
+        rows_before = len(driver.find_elements(By.CSS_SELECTOR, AF_ROW_SELECTOR))
+        option_50.click()
+        try:
+            wait_for_row_count_change(driver, AF_ROW_SELECTOR, rows_before)
+        except TimeoutException:
+            # Con menos jugadores que la vista anterior el número de filas no cambia
+            print("    -> El número de filas no ha cambiado tras elegir 50.")
+
+        print("✅ Vista configurada a 50 jugadores.")
+        driver.execute_script("window.scrollTo(0, 0);")
+        timer.lap("vista de 50")
+    except Exception as e:
+        print(
+            "⚠️  No se pudo cambiar la vista a 50. Se continúa con la paginación por defecto."
+        )
+        print(f"   --- Error Detallado: {str(e).splitlines()[0]} ---")
+
+    page_number = 1
+    while True:
+        if cancel_event is not None and cancel_event.is_set():
+            print("    -> Scraping cancelado por el orquestador.")
+            break
+        print(f"    ...analizando página {page_number}...")
+        player_rows = driver.find_elements(By.CSS_SELECTOR, AF_ROW_SELECTOR)
+        if not player_rows:
+            print("    -> No se encontraron más filas de jugadores.")
+            break
+
+        rows = extract_af_rows_js(driver)
+        if rows is None:
+            rows = extract_af_rows_webdriver(player_rows)
+        for player_name, coefficient, expected_score in rows:
+            player_name = (player_name or "").strip()
+            coefficient = (coefficient or "").strip()
+            if player_name and coefficient:
+                coeffs_map[normalize_name(player_name)] = {
+                    "coeficiente": coefficient,
+                    "puntuacion_esperada": (expected_score or "")
+                    .strip()
+                    .replace("\n", " / "),
+                }
+
+        try:
+            next_button_xpath = "//button[contains(., 'Siguiente')]"
+            next_button_element = driver.find_element(By.XPATH, next_button_xpath)
+            if not next_button_element.is_enabled():
+                print("    -> El botón 'Siguiente' está desactivado. Fin del scraping.")
+                break
+
+            previous_text = player_rows[0].text
+            driver.execute_script("arguments[0].click();", next_button_element)
+            wait_for_page_change(driver, AF_ROW_SELECTOR, previous_text)
+            browser_pool.record_page()
+            timer.lap(f"página {page_number}")
+            page_number += 1
+        except NoSuchElementException:
+            print("    -> No se encontró el botón 'Siguiente'. Fin del scraping.")
+            break
+        except TimeoutException:
+            print("    -> La tabla no cambió de página a tiempo. Fin del scraping.")
+            break
@@ -0,0 +1,77 @@
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Sondeo frecuente: el tiempo de espera debe parecerse al de renderizado real
+POLL_SECONDS = 0.1
+
+
+def first_row_text(driver, row_selector):
+    """Texto de la primera fila de la tabla ('' si no hay filas o se está repintando)."""
+    try:
+        rows = driver.find_elements(By.CSS_SELECTOR, row_selector)
+        return rows[0].text if rows else ""
+    except StaleElementReferenceException:
+        return ""
+
+
+def wait_for_page_change(driver, row_selector, previous_text, timeout=30):
+    """
+    Espera a que la tabla muestre otra página: la primera fila existe y su texto
+    ya no es el de la página anterior. Sustituye a las esperas fijas tras 'Siguiente'.
+    """
+    WebDriverWait(
+        driver,
+        timeout,
+        poll_frequency=POLL_SECONDS,
+        ignored_exceptions=(StaleElementReferenceException,),
+    ).until(lambda d: first_row_text(d, row_selector) not in ("", previous_text))
+
+
+def wait_for_row_count_change(driver, row_selector, previous_count, timeout=15):
+    """Espera a que cambie el número de filas (p. ej. al pasar a 50 por página)."""
+
+    def row_count_changed(d):
+        count = len(d.find_elements(By.CSS_SELECTOR, row_selector))
+        return count if count != previous_count else False
+
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(
+        row_count_changed
+    )
+
+
+def wait_until_gone(driver, element, timeout=10):
+    """Espera a que un elemento (p. ej. el pop-up de cookies) se oculte o salga del DOM."""
+    WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(
+        EC.any_of(EC.staleness_of(element), EC.invisibility_of_element(element))
+    )
+
+
+class PageTimer:
+    """Registra cuánto tarda cada página del scraping para ver el tiempo real de renderizado."""
+
+    def __init__(self):
+        self.timings = []
+        self._last = time.perf_counter()
+
+    def lap(self, label):
+        """Cierra la vuelta actual con una etiqueta y devuelve su duración."""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self.timings.append((label, elapsed))
+        self._last = now
+        return elapsed
+
+    def print_summary(self):
+        if not self.timings:
+            return
+        total = sum(elapsed for _, elapsed in self.timings)
+        slowest_label, slowest = max(self.timings, key=lambda item: item[1])
+        print(
+            f"⏱️  {len(self.timings)} pasos en {total:.2f}s "
+            f"(media {total / len(self.timings):.2f}s, "
+            f"más lento '{slowest_label}' con {slowest:.2f}s)."
+        )
@@ -0,0 +1,70 @@
+import queue
+import threading
+import time
+
+
+def run_stages(stages, timeouts=None, default_timeout=None, cancel_event=None):
+    """
+    Ejecuta en paralelo etapas independientes y devuelve {nombre: resultado}.
+    'stages' es un diccionario {nombre: función sin argumentos}. Cada etapa tiene
+    su tiempo máximo (en 'timeouts' o 'default_timeout') contado desde el arranque
+    común, así que el total lo marca la fuente más lenta y no la suma de todas.
+
+    En cuanto una etapa falla se propaga su excepción, sin esperar al resto; si una
+    se pasa de tiempo, se lanza TimeoutError. En ambos casos se activa
+    'cancel_event' para que las etapas que lo consulten (p. ej. el scraping con
+    Selenium) paren y cierren sus recursos. Las etapas corren en hilos daemon, de
+    modo que una etapa colgada no impide que el proceso termine.
+    """
+    timeouts = timeouts or {}
+    cancel_event = cancel_event or threading.Event()
+    finished = queue.Queue()
+
+    def run(name, func):
+        start = time.perf_counter()
+        try:
+            finished.put((name, func(), None))
+        except BaseException as e:
+            finished.put((name, None, e))
+        finally:
+            print(
+                f"⏱️  Etapa '{name}' finalizada en {time.perf_counter() - start:.2f}s"
+            )
+
+    started = time.monotonic()
+    deadlines = {}
+    for name, func in stages.items():
+        timeout = timeouts.get(name, default_timeout)
+        deadlines[name] = None if timeout is None else started + timeout
+        threading.Thread(
+            target=run, args=(name, func), name=f"stage-{name}", daemon=True
+        ).start()
+
+    results = {}
+    try:
+        while len(results) < len(stages):
+            pending = [
+                (deadline, name)
+                for name, deadline in deadlines.items()
+                if name not in results and deadline is not None
+            ]
+            next_deadline, next_name = min(pending, default=(None, None))
+            wait = (
+                None
+                if next_deadline is None
+                else max(0.0, next_deadline - time.monotonic())
+            )
+            try:
+                name, result, error = finished.get(timeout=wait)
+            except queue.Empty:
+                timeout = timeouts.get(next_name, default_timeout)
+                raise TimeoutError(
+                    f"La etapa '{next_name}' superó el tiempo máximo de {timeout}s."
+                ) from None
+            if error is not None:
+                raise error
+            results[name] = result
+    except BaseException:
+        cancel_event.set()
+        raise
+    return {name: results[name] for name in stages}
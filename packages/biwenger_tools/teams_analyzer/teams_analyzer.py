@@ -1,20 +1,25 @@
 import csv
 import os
+import threading
 import time
 import traceback
 from datetime import datetime
 
 from packages.biwenger_tools.teams_analyzer import config
 from packages.biwenger_tools.teams_analyzer.logic.scrapers import (
+    browser_pool,
     fetch_jp_player_tips,
+    http_cache,
     fetch_analitica_fantasy_coeffs,
 )
 from packages.biwenger_tools.teams_analyzer.logic.player_matching import (
-    find_player_match,
+    MatchCache,
+    PlayerMatcher,
     normalize_name,
     map_position,
 )
-from core.sdk.biwenger import BiwengerClient
+from packages.biwenger_tools.teams_analyzer.logic.stages import run_stages
+from core.sdk.biwenger import BiwengerClient, TokenCache
 from core.sdk.telegram import send_telegram_notification
 
 
@@ -31,14 +36,42 @@ def main():
             config.LOGIN_URL,
             config.ACCOUNT_URL,
             config.LEAGUE_ID,
+            requests_per_second=config.BIWENGER_REQUESTS_PER_SECOND,
+            http_cache=http_cache,
+            token_cache=(
+                TokenCache(config.BIWENGER_TOKEN_CACHE_FILE)
+                if config.BIWENGER_TOKEN_CACHE_FILE
+                else None
+            ),
         )
 
-        # 2. Obtención de datos de fuentes externas
-        players_map_biwenger = biwenger.get_all_players_data_map(
-            config.ALL_PLAYERS_DATA_URL
+        # 2 y 3. Fuentes externas y datos de la liga, en paralelo (son independientes)
+        cancel_event = threading.Event()
+        sources = run_stages(
+            {
+                "biwenger_jugadores": lambda: biwenger.get_all_players_data_map(
+                    config.ALL_PLAYERS_DATA_URL
+                ),
+                "jornada_perfecta": fetch_jp_player_tips,
+                "analitica_fantasy": lambda: fetch_analitica_fantasy_coeffs(
+                    cancel_event
+                ),
+                "biwenger_liga": lambda: biwenger.get_league_users(
+                    config.LEAGUE_DATA_URL
+                ),
+                "biwenger_mercado": lambda: biwenger.get_market_players(
+                    config.MARKET_URL
+                ),
+            },
+            timeouts=config.STAGE_TIMEOUTS_SECONDS,
+            default_timeout=config.DEFAULT_STAGE_TIMEOUT_SECONDS,
+            cancel_event=cancel_event,
         )
-        jp_tips_map = fetch_jp_player_tips()
-        analitica_coeffs_map = fetch_analitica_fantasy_coeffs()
+        players_map_biwenger = sources["biwenger_jugadores"]
+        jp_tips_map = sources["jornada_perfecta"]
+        analitica_coeffs_map = sources["analitica_fantasy"]
+        managers_map = sources["biwenger_liga"]
+        market_players = sources["biwenger_mercado"]
 
         if not analitica_coeffs_map:
             print(
@@ -46,33 +79,38 @@ def main():
             )
             return
 
-        # 3. Obtención de datos de la liga desde Biwenger
-        managers_map = biwenger.get_league_users(config.LEAGUE_DATA_URL)
-        market_players = biwenger.get_market_players(config.MARKET_URL)
-
         # 4. Procesamiento y análisis de los datos
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        match_cache = MatchCache(
+            os.path.join(base_dir, config.MATCH_CACHE_FILE), analitica_coeffs_map
+        )
+        matcher = PlayerMatcher(analitica_coeffs_map, cache=match_cache)
         all_players_export_list = []
         print("\n--- Analizando datos de la liga ---\n")
 
-        # Analizar plantillas de mánagers
+        # Analizar plantillas de mánagers (descargadas en paralelo)
+        squads = biwenger.get_manager_squads(
+            config.USER_SQUAD_URL,
+            list(managers_map),
+            max_workers=config.SQUAD_FETCH_WORKERS,
+        )
         for manager_id, manager_name in managers_map.items():
-            squad_data = biwenger.get_manager_squad(config.USER_SQUAD_URL, manager_id)
+            squad_data = squads.get(manager_id, [])
             print(f"🔎 Analizando a: {manager_name} ({len(squad_data)} jugadores)")
-            time.sleep(0.5)
             for player_data in squad_data:
                 player_info = players_map_biwenger.get(player_data.get("id"))
                 if not player_info:
                     continue
 
-                player_name = player_info.get("name", "N/A")
-                matched_data = find_player_match(player_name, analitica_coeffs_map)
+                player_name = player_info.name
+                matched_data = matcher.match(player_name, player_info.id)
 
                 all_players_export_list.append(
                     {
                         "Mánager": manager_name,
                         "Jugador": player_name,
-                        "Posición": map_position(player_info.get("position")),
-                        "Valor Actual": player_info.get("price", 0),
+                        "Posición": map_position(player_info.position),
+                        "Valor Actual": player_info.price,
                         "Cláusula": player_data.get("owner", {}).get("clause", 0),
                         "Nota IA": jp_tips_map.get(
                             normalize_name(player_name), "Sin datos"
@@ -93,15 +131,15 @@ def main():
             if not player_info:
                 continue
 
-            player_name = player_info.get("name", "N/A")
-            matched_data = find_player_match(player_name, analitica_coeffs_map)
+            player_name = player_info.name
+            matched_data = matcher.match(player_name, player_info.id)
 
             all_players_export_list.append(
                 {
                     "Mánager": market_team_name,
                     "Jugador": player_name,
-                    "Posición": map_position(player_info.get("position")),
-                    "Valor Actual": player_info.get("price", 0),
+                    "Posición": map_position(player_info.position),
+                    "Valor Actual": player_info.price,
                     "Cláusula": sale.get("price", 0),
                     "Nota IA": jp_tips_map.get(
                         normalize_name(player_name), "Sin datos"
@@ -111,6 +149,13 @@ def main():
                 }
             )
 
+        match_cache.print_stats()
+        http_cache.print_stats()
+        try:
+            match_cache.save()
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la caché de emparejamientos: {e}")
+
         # 5. Exportación y notificación
         if all_players_export_list:
             order = {
@@ -131,7 +176,6 @@ def main():
 
             # --- CORRECCIÓN: Construir la ruta de salida dinámicamente ---
             # Esto asegura que el CSV se guarde dentro de la carpeta 'teams_analyzer'
-            base_dir = os.path.dirname(os.path.abspath(__file__))
             output_filepath = os.path.join(base_dir, config.FINAL_REPORT_NAME)
 
             fieldnames = [
@@ -165,6 +209,7 @@ def main():
         print(f"❌ Ocurrió un error inesperado: {e}")
         traceback.print_exc()
     finally:
+        browser_pool.close()
         duration = time.time() - start_time
         print(f"\n🏁 Script finalizado en {duration:.2f} segundos.")
 
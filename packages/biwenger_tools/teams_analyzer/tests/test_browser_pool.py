@@ -0,0 +1,94 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from packages.biwenger_tools.teams_analyzer.logic.browser_pool import (
+    BrowserPool,
+    process_tree_rss_mb,
+)
+
+
+def make_pool(**kwargs):
+    create_driver = MagicMock(side_effect=lambda: MagicMock())
+    quit_driver = MagicMock()
+    return BrowserPool(create_driver, quit_driver, **kwargs), create_driver, quit_driver
+
+
+def test_lease_reuses_warm_browser():
+    """Prueba que varios usos seguidos comparten el mismo navegador."""
+    pool, create_driver, quit_driver = make_pool()
+
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+
+    assert first is second
+    create_driver.assert_called_once()
+    quit_driver.assert_not_called()
+    assert len(pool.startup_seconds) == 1
+
+
+def test_lease_recycles_after_max_pages():
+    """Prueba que el navegador se recicla al llegar al máximo de páginas."""
+    pool, create_driver, quit_driver = make_pool(max_pages=2)
+
+    with pool.lease() as first:
+        pool.record_page(2)
+    with pool.lease() as second:
+        pass
+
+    assert first is not second
+    assert create_driver.call_count == 2
+    quit_driver.assert_called_once_with(first)
+    assert len(pool.shutdown_seconds) == 1
+
+
+def test_lease_recycles_over_memory_ceiling():
+    """Prueba que el navegador se recicla si supera la memoria máxima."""
+    pool, create_driver, quit_driver = make_pool(max_rss_mb=100)
+
+    with pool.lease() as first:
+        first.service.process.pid = 1234
+    with patch(
+        "packages.biwenger_tools.teams_analyzer.logic.browser_pool.process_tree_rss_mb",
+        return_value=250.0,
+    ) as mock_rss:
+        with pool.lease():
+            pass
+
+    mock_rss.assert_called_once_with(1234)
+    quit_driver.assert_called_once_with(first)
+    assert create_driver.call_count == 2
+
+
+def test_lease_discards_browser_on_error():
+    """Prueba que un fallo durante el uso descarta el navegador."""
+    pool, create_driver, quit_driver = make_pool()
+
+    with pytest.raises(RuntimeError):
+        with pool.lease() as driver:
+            raise RuntimeError("página rota")
+
+    quit_driver.assert_called_once_with(driver)
+    with pool.lease() as new_driver:
+        assert new_driver is not driver
+
+
+def test_close_quits_browser_and_is_idempotent():
+    """Prueba que 'close' cierra el navegador una sola vez."""
+    pool, _, quit_driver = make_pool()
+    with pool.lease() as driver:
+        pass
+
+    pool.close()
+    pool.close()
+
+    quit_driver.assert_called_once_with(driver)
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="Requiere /proc")
+def test_process_tree_rss_mb_reads_current_process():
+    """Prueba que se lee la memoria residente del proceso actual."""
+    assert process_tree_rss_mb(os.getpid()) > 0
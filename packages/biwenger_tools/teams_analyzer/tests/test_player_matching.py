@@ -1,8 +1,11 @@
 import pytest
+from unittest.mock import patch
 from packages.biwenger_tools.teams_analyzer.logic.player_matching import (
     normalize_name,
     find_player_match,
     map_position,
+    PlayerMatcher,
+    MatchCache,
 )
 
 
@@ -80,6 +83,91 @@ def test_find_player_match_no_match(analitica_map):
     assert result["puntuacion_esperada"] == "N/A"
 
 
+def test_player_matcher_resolve_reports_strategy(analitica_map):
+    """Prueba que el índice indica qué entrada y qué estrategia resolvió cada nombre."""
+    matcher = PlayerMatcher(analitica_map)
+    assert matcher.resolve("Oihan Sancet") == ("oihan sancet", "exacto")
+    assert matcher.resolve("Odysseas") == ("vlachodimos", "excepcion")
+    assert matcher.resolve("Pacha Espino") == ("espino", "apellido")
+    assert matcher.resolve("Giuliano Simeone") == ("giuliano", "nombre")
+    assert matcher.resolve("Carlos Vicente") == ("c. vicente", "inicial_apellido")
+    assert matcher.resolve("Luis Morales") == ("jose luis morales", "subconjunto")
+    assert matcher.resolve("Jugador Ficticio") == (None, None)
+
+
+def test_player_matcher_builds_token_index_only_for_subset(analitica_map):
+    """Prueba que las coincidencias directas no tokenizan el mapa completo."""
+    matcher = PlayerMatcher(analitica_map)
+    matcher.match("Oihan Sancet")
+    matcher.match("Carlos Vicente")
+    assert matcher._postings is None
+
+    matcher.match("Morales")
+    assert "morales" in matcher._postings
+
+
+def test_player_matcher_subset_prefers_first_entry():
+    """Prueba que, como el escaneo lineal, gana la primera entrada que encaja."""
+    matcher = PlayerMatcher(
+        {
+            "pedro lopez": {"coeficiente": "1"},
+            "ana garcia lopez": {"coeficiente": "2"},
+            "garcia lopez": {"coeficiente": "3"},
+        }
+    )
+    assert matcher.match("Lopez Garcia")["coeficiente"] == "2"
+
+
+def test_match_cache_reuses_resolutions_between_runs(analitica_map, tmp_path):
+    """Prueba que una segunda ejecución resuelve desde la caché persistida."""
+    cache_path = str(tmp_path / "cache.json")
+
+    first_run = MatchCache(cache_path, analitica_map)
+    matcher = PlayerMatcher(analitica_map, cache=first_run)
+    assert matcher.match("Carlos Vicente", 7)["coeficiente"] == "7.5"
+    assert matcher.match("Jugador Ficticio", 8)["coeficiente"] == "N/A"
+    first_run.save()
+    assert (first_run.hits, first_run.misses) == (0, 2)
+
+    second_run = MatchCache(cache_path, analitica_map)
+    matcher = PlayerMatcher(analitica_map, cache=second_run)
+    with patch.object(matcher, "resolve", wraps=matcher.resolve) as mock_resolve:
+        assert matcher.match("Carlos Vicente", 7)["coeficiente"] == "7.5"
+        assert matcher.match("Jugador Ficticio", 8)["coeficiente"] == "N/A"
+    # Solo se recalcula el jugador sin coincidencia, que no se guarda
+    mock_resolve.assert_called_once_with("Jugador Ficticio")
+    assert second_run.entries["7"]["strategy"] == "inicial_apellido"
+    assert "8" not in second_run.entries
+    assert (second_run.hits, second_run.misses) == (1, 1)
+
+
+def test_match_cache_invalidated_when_source_or_name_changes(analitica_map, tmp_path):
+    """Prueba que la caché se descarta si cambia la fuente o el nombre del jugador."""
+    cache_path = str(tmp_path / "cache.json")
+    cache = MatchCache(cache_path, analitica_map)
+    cache.put(7, "Carlos Vicente", "c. vicente", "inicial_apellido")
+    cache.save()
+
+    assert MatchCache(cache_path, analitica_map).get(7, "Carlos V.") is None
+
+    changed_map = dict(analitica_map, **{"nuevo": {"coeficiente": "1"}})
+    assert MatchCache(cache_path, changed_map).entries == {}
+
+
+def test_match_cache_invalidated_when_name_mappings_change(analitica_map, tmp_path):
+    """Prueba que editar PLAYER_NAME_MAPPINGS invalida los emparejamientos guardados."""
+    cache_path = str(tmp_path / "cache.json")
+    cache = MatchCache(cache_path, analitica_map)
+    cache.put(7, "Carlos Vicente", "c. vicente", "inicial_apellido")
+    cache.save()
+
+    with patch.dict(
+        "packages.biwenger_tools.teams_analyzer.logic.player_matching.PLAYER_NAME_MAPPINGS",
+        {"carlos vicente": "cristian"},
+    ):
+        assert MatchCache(cache_path, analitica_map).entries == {}
+
+
 def test_map_position():
     """Prueba que el mapeo de posiciones funciona correctamente."""
     assert map_position(1) == "Portero"
@@ -3,9 +3,14 @@ import shutil
 import tempfile
 from unittest.mock import MagicMock, patch, Mock
 import pytest
+from core.sdk.http_cache import HttpCache
 from packages.biwenger_tools.teams_analyzer.logic.scrapers import (
+    browser_pool,
     create_chrome_driver,
+    extract_af_rows_js,
+    extract_analitica_fantasy_coeffs,
     fetch_analitica_fantasy_coeffs,
+    quit_chrome_driver,
 )
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
@@ -21,6 +26,23 @@ def mock_running_in_docker():
         yield
 
 
+@pytest.fixture(autouse=True)
+def isolated_http_cache(tmp_path):
+    """Cada test usa una caché HTTP vacía para no leer descargas reales."""
+    with patch(
+        "packages.biwenger_tools.teams_analyzer.logic.scrapers.http_cache",
+        HttpCache(str(tmp_path / "http_cache")),
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def close_browser_pool():
+    """Evita que el navegador compartido pase de un test a otro."""
+    yield
+    browser_pool.close()
+
+
 @pytest.fixture
 def mock_selenium_driver():
     """
@@ -92,9 +114,61 @@ def test_create_chrome_driver_docker(
         driver = create_chrome_driver()
         assert driver == mock_driver
         mock_chrome.assert_called_once()
-        mock_rmtree.assert_called_once_with(mock_mkdtemp.return_value)
+        # El perfil sigue en uso: se borra al cerrar el navegador, no al crearlo
+        mock_rmtree.assert_not_called()
+        assert driver.profile_dir == mock_mkdtemp.return_value
 
 
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.tempfile.mkdtemp")
+@patch(
+    "packages.biwenger_tools.teams_analyzer.logic.scrapers.os.path.exists",
+    return_value=True,
+)
+@patch(
+    "packages.biwenger_tools.teams_analyzer.logic.scrapers.webdriver.Chrome",
+    side_effect=RuntimeError("sin navegador"),
+)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.shutil.rmtree")
+def test_create_chrome_driver_removes_profile_on_failure(
+    mock_rmtree, mock_chrome, mock_exists, mock_mkdtemp
+):
+    """Si Chrome no arranca, el perfil temporal se borra en el momento."""
+    mock_mkdtemp.return_value = "/mock/temp/dir"
+
+    with patch(
+        "packages.biwenger_tools.teams_analyzer.logic.scrapers.RUNNING_IN_DOCKER", True
+    ):
+        with pytest.raises(Exception, match="No se pudo iniciar"):
+            create_chrome_driver()
+    mock_rmtree.assert_called_once_with("/mock/temp/dir")
+
+
+@patch(
+    "packages.biwenger_tools.teams_analyzer.logic.scrapers.os.path.exists",
+    return_value=True,
+)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.shutil.rmtree")
+def test_quit_chrome_driver_removes_profile(mock_rmtree, mock_exists):
+    """Al cerrar el navegador se borra su perfil temporal."""
+    mock_driver = MagicMock()
+    mock_driver.profile_dir = "/mock/temp/dir"
+
+    quit_chrome_driver(mock_driver)
+
+    mock_driver.quit.assert_called_once()
+    mock_rmtree.assert_called_once_with("/mock/temp/dir", ignore_errors=True)
+
+
+@patch(
+    "packages.biwenger_tools.teams_analyzer.logic.scrapers.fetch_analitica_fantasy_coeffs_http",
+    return_value={},
+)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.ActionChains")
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.wait_until_gone")
+@patch(
+    "packages.biwenger_tools.teams_analyzer.logic.scrapers.wait_for_row_count_change"
+)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.wait_for_page_change")
 @patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.WebDriverWait")
 @patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.By")
 @patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.create_chrome_driver")
@@ -112,10 +186,15 @@ def test_fetch_analitica_fantasy_coeffs_success_with_pagination(
     mock_create_chrome_driver,
     mock_by,
     mock_webdriverwait,
+    mock_wait_for_page_change,
+    mock_wait_for_row_count_change,
+    mock_wait_until_gone,
+    mock_action_chains,
+    mock_fetch_http,
 ):
     """
-    Prueba que la función descarga y parsea los coeficientes de Analítica Fantasy
-    simulando la paginación y el final del scraping.
+    Prueba que, si la extracción HTTP no da datos, la función recurre a Selenium
+    y parsea los coeficientes simulando la paginación y el final del scraping.
     """
     # Configurar mocks para simular una página con datos
     mock_driver = MagicMock()
@@ -184,7 +263,9 @@ def test_fetch_analitica_fantasy_coeffs_success_with_pagination(
     mock_row_2 = create_mock_row("Test Player 2", "8,2", "15.0")
 
     # Mockear `find_elements` para que simule la paginación.
+    # La primera llamada cuenta las filas antes de cambiar a 50 por página.
     mock_driver.find_elements.side_effect = [
+        [mock_row_1],
         [mock_row_1],
         [mock_row_2],
         [],
@@ -216,7 +297,17 @@ def test_fetch_analitica_fantasy_coeffs_success_with_pagination(
     assert coeffs_map["test player 1"]["puntuacion_esperada"] == "20.0"
     assert coeffs_map["test player 2"]["puntuacion_esperada"] == "15.0"
     mock_create_chrome_driver.assert_called_once()
+    # El navegador queda caliente en el pool hasta que se cierra
+    mock_driver.quit.assert_not_called()
+    browser_pool.close()
     mock_driver.quit.assert_called_once()
+    # Las esperas dependen de la tabla, no de pausas fijas
+    mock_wait_until_gone.assert_called_once_with(mock_driver, mock_cookie_button)
+    mock_wait_for_row_count_change.assert_called_once()
+    assert mock_wait_for_page_change.call_count == 2
+    mock_wait_for_page_change.assert_any_call(
+        mock_driver, "tr.MuiTableRow-root", mock_row_1.text
+    )
 
     # Comprobar que el archivo se ha escrito
     mock_open.assert_called_with(
@@ -231,3 +322,98 @@ def test_fetch_analitica_fantasy_coeffs_success_with_pagination(
     mock_csv_writer.return_value.writerow.assert_any_call(
         ["test player 2", "8,2", "15.0"]
     )
+
+
+def load_fixture_text(filename):
+    path = os.path.join(os.path.dirname(__file__), "data", filename)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_extract_analitica_fantasy_coeffs_from_embedded_json():
+    """Prueba que los coeficientes se leen del JSON embebido sin navegador."""
+    html = load_fixture_text("analitica_fantasy_oraculo.html")
+
+    coeffs_map = extract_analitica_fantasy_coeffs(html)
+
+    assert coeffs_map == {
+        "oihan sancet": {"coeficiente": "8,5", "puntuacion_esperada": "6 / 9"},
+        "lamine yamal": {"coeficiente": "9,1", "puntuacion_esperada": "11.0"},
+        "vlachodimos": {"coeficiente": "6,8", "puntuacion_esperada": "N/A"},
+    }
+
+
+def test_extract_analitica_fantasy_coeffs_without_embedded_json():
+    """Prueba que una página sin datos embebidos devuelve un mapa vacío."""
+    assert extract_analitica_fantasy_coeffs("<html><body></body></html>") == {}
+
+
+@pytest.fixture
+def af_fixture_html():
+    # Se lee antes de parchear nada relacionado con ficheros
+    return load_fixture_text("analitica_fantasy_oraculo.html")
+
+
+@patch(
+    "packages.biwenger_tools.teams_analyzer.logic.scrapers.config.ANALITICA_FANTASY_MIN_ROWS",
+    1,
+)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.csv.writer")
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.open", create=True)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.create_chrome_driver")
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.requests.get")
+def test_fetch_analitica_fantasy_coeffs_prefers_http(
+    mock_get, mock_create_chrome_driver, mock_open, mock_csv_writer, af_fixture_html
+):
+    """Prueba que con datos embebidos no se llega a arrancar Selenium."""
+    mock_get.return_value.text = af_fixture_html
+
+    coeffs_map = fetch_analitica_fantasy_coeffs()
+
+    assert len(coeffs_map) == 3
+    mock_create_chrome_driver.assert_not_called()
+    mock_csv_writer.return_value.writerow.assert_any_call(
+        ["oihan sancet", "8,5", "6 / 9"]
+    )
+
+
+@patch(
+    "packages.biwenger_tools.teams_analyzer.logic.scrapers.fetch_analitica_fantasy_coeffs_selenium",
+    return_value={"x": {"coeficiente": "1", "puntuacion_esperada": "2"}},
+)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.csv.writer")
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.open", create=True)
+@patch("packages.biwenger_tools.teams_analyzer.logic.scrapers.requests.get")
+def test_fetch_analitica_fantasy_coeffs_falls_back_below_min_rows(
+    mock_get, mock_open, mock_csv_writer, mock_selenium, af_fixture_html
+):
+    """Prueba que un JSON embebido con pocas filas no se da por bueno."""
+    mock_get.return_value.text = af_fixture_html
+
+    coeffs_map = fetch_analitica_fantasy_coeffs()
+
+    assert list(coeffs_map) == ["x"]
+    mock_selenium.assert_called_once()
+
+
+def test_extract_af_rows_js_reads_page_in_one_call():
+    """Prueba que la tabla se lee con una sola llamada a execute_script."""
+    driver = MagicMock()
+    driver.execute_script.return_value = [
+        ["Pedri", "9,1", "7\n10"],
+        ["Incompleta", "1"],
+    ]
+
+    rows = extract_af_rows_js(driver)
+
+    assert rows == [("Pedri", "9,1", "7\n10")]
+    driver.execute_script.assert_called_once()
+    assert driver.execute_script.call_args[0][1] == "tr.MuiTableRow-root"
+    driver.find_elements.assert_not_called()
+
+
+def test_extract_af_rows_js_signals_fallback():
+    """Prueba que una respuesta inesperada del navegador pide la extracción celda a celda."""
+    driver = MagicMock()
+    driver.execute_script.return_value = None
+    assert extract_af_rows_js(driver) is None
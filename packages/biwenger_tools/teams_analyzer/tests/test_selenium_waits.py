@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+from packages.biwenger_tools.teams_analyzer.logic.selenium_waits import (
+    PageTimer,
+    first_row_text,
+    wait_for_page_change,
+    wait_for_row_count_change,
+)
+
+
+def make_driver(pages):
+    """Driver falso que devuelve sucesivamente las filas de cada 'pages'."""
+    driver = MagicMock()
+    driver.find_elements.side_effect = [
+        [MagicMock(text=text) for text in page] for page in pages
+    ]
+    return driver
+
+
+def test_first_row_text_handles_stale_rows():
+    """Prueba que una fila que se está repintando cuenta como tabla vacía."""
+    stale_row = MagicMock()
+    type(stale_row).text = property(
+        lambda self: (_ for _ in ()).throw(StaleElementReferenceException())
+    )
+    driver = MagicMock()
+    driver.find_elements.return_value = [stale_row]
+    assert first_row_text(driver, "tr") == ""
+
+
+def test_wait_for_page_change_returns_when_first_row_changes():
+    """Prueba que la espera termina en cuanto cambia la primera fila, sin pausas fijas."""
+    driver = make_driver([["Pedri"], [], ["Yamal"]])
+    wait_for_page_change(driver, "tr", "Pedri", timeout=5)
+    assert driver.find_elements.call_count == 3
+
+
+def test_wait_for_page_change_times_out_if_table_does_not_change():
+    """Prueba que si la tabla no cambia se lanza TimeoutException."""
+    driver = MagicMock()
+    driver.find_elements.return_value = [MagicMock(text="Pedri")]
+    with pytest.raises(TimeoutException):
+        wait_for_page_change(driver, "tr", "Pedri", timeout=0.3)
+
+
+def test_wait_for_row_count_change_returns_new_count():
+    """Prueba que se detecta el cambio de tamaño de página contando filas."""
+    driver = make_driver([["a"] * 10, ["a"] * 10, ["a"] * 50])
+    assert wait_for_row_count_change(driver, "tr", 10, timeout=5) == 50
+
+
+def test_page_timer_records_laps():
+    """Prueba que el temporizador registra la duración de cada paso."""
+    with patch(
+        "packages.biwenger_tools.teams_analyzer.logic.selenium_waits.time.perf_counter",
+        side_effect=[0.0, 1.5, 4.0],
+    ):
+        timer = PageTimer()
+        assert timer.lap("página 1") == 1.5
+        assert timer.lap("página 2") == 2.5
+    assert [label for label, _ in timer.timings] == ["página 1", "página 2"]
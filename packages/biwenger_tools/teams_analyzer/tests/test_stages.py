@@ -0,0 +1,78 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from packages.biwenger_tools.teams_analyzer.logic.stages import run_stages
+
+
+def test_run_stages_runs_concurrently_and_returns_by_name():
+    """Prueba que las etapas se ejecutan a la vez y se devuelven por nombre."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def stage(value):
+        # Solo termina si la otra etapa está en marcha al mismo tiempo
+        barrier.wait()
+        return value
+
+    results = run_stages({"a": lambda: stage(1), "b": lambda: stage(2)})
+
+    assert results == {"a": 1, "b": 2}
+
+
+def test_run_stages_propagates_errors():
+    """Prueba que el error de una etapa se propaga al orquestador."""
+
+    def failing():
+        raise ValueError("fuente caída")
+
+    with pytest.raises(ValueError, match="fuente caída"):
+        run_stages({"ok": lambda: 1, "mal": failing})
+
+
+def test_run_stages_fails_fast_and_cancels_other_stages():
+    """Prueba que un error se propaga sin esperar a las etapas lentas y las avisa."""
+    cancel_event = threading.Event()
+
+    def failing():
+        raise ValueError("liga caída")
+
+    start = time.monotonic()
+    with pytest.raises(ValueError, match="liga caída"):
+        # La etapa lenta va primero: el error no debe esperar a que termine
+        run_stages(
+            {"lenta": lambda: cancel_event.wait(5), "mal": failing},
+            cancel_event=cancel_event,
+        )
+    assert time.monotonic() - start < 1
+    assert cancel_event.is_set()
+
+
+def test_run_stages_enforces_per_stage_timeout():
+    """Prueba que una etapa que supera su tiempo máximo lanza TimeoutError."""
+    cancel_event = threading.Event()
+
+    with pytest.raises(TimeoutError, match="lenta"):
+        run_stages(
+            {"rapida": lambda: 1, "lenta": lambda: cancel_event.wait(5)},
+            timeouts={"lenta": 0.05},
+            cancel_event=cancel_event,
+        )
+    assert cancel_event.is_set()
+
+
+def test_run_stages_timeout_does_not_block_process_exit():
+    """Prueba que una etapa colgada no retiene el proceso tras el timeout."""
+    script = (
+        "import time\n"
+        "from packages.biwenger_tools.teams_analyzer.logic.stages import run_stages\n"
+        "try:\n"
+        "    run_stages({'colgada': lambda: time.sleep(30)}, default_timeout=0.1)\n"
+        "except TimeoutError:\n"
+        "    pass\n"
+    )
+    start = time.monotonic()
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=20)
+    assert time.monotonic() - start < 10
@@ -1,6 +1,7 @@
 import os
 import pytest
 from unittest.mock import patch, MagicMock, mock_open
+from core.domain.players import Player, PlayerCatalogue
 from packages.biwenger_tools.teams_analyzer.teams_analyzer import main
 from packages.biwenger_tools.teams_analyzer import config  # Importar el archivo config
 
@@ -57,38 +58,30 @@ def mock_all_dependencies():
             "packages.biwenger_tools.teams_analyzer.teams_analyzer.send_telegram_notification"
         ) as mock_telegram,
         patch("builtins.open", new_callable=mock_open) as mock_open_file,
+        # La caché de emparejamientos se escribe en un temporal y se renombra
+        patch(
+            "packages.biwenger_tools.teams_analyzer.logic.player_matching.os.replace"
+        ),
     ):
         mock_biwenger = MagicMock()
         mock_biwenger_client.return_value = mock_biwenger
 
-        players_data = {
-            1: {
-                "id": 1,
-                "name": "Player A",
-                "owner": {"id": 123, "clause": 5000000},
-                "position": "defensa",
-                "team_id": 1,
-                "price": 1000000,
-            },
-            2: {
-                "id": 2,
-                "name": "Player B",
-                "owner": {"id": 456, "clause": 6000000},
-                "position": "delantero",
-                "team_id": 2,
-                "price": 1200000,
-            },
-        }
+        players_data = PlayerCatalogue(
+            [
+                Player(1, "Player A", position=2, price=1000000),
+                Player(2, "Player B", position=4, price=1200000),
+            ]
+        )
 
         mock_biwenger.get_all_players_data_map.return_value = players_data
         mock_biwenger.get_league_users.return_value = {
             123: "Manager A",
             456: "Manager B",
         }
-        mock_biwenger.get_manager_squad.side_effect = [
-            [players_data[1]],
-            [players_data[2]],
-        ]
+        mock_biwenger.get_manager_squads.return_value = {
+            123: [{"id": 1, "owner": {"id": 123, "clause": 5000000}}],
+            456: [{"id": 2, "owner": {"id": 456, "clause": 6000000}}],
+        }
         mock_biwenger.get_market_players.return_value = [
             {"player": {"id": 1}, "user": None, "price": 0}
         ]
@@ -123,11 +116,10 @@ def test_main_success(mock_all_dependencies):
     # 2. Comprobar que se llamaron a las funciones de Biwenger.
     mock_all_dependencies["mock_biwenger"].get_all_players_data_map.assert_called_once()
     mock_all_dependencies["mock_biwenger"].get_league_users.assert_called_once()
-    mock_all_dependencies["mock_biwenger"].get_manager_squad.assert_any_call(
-        "https://biwenger.as.com/api/v2/user/{manager_id}?fields=players(id,owner)", 123
-    )
-    mock_all_dependencies["mock_biwenger"].get_manager_squad.assert_any_call(
-        "https://biwenger.as.com/api/v2/user/{manager_id}?fields=players(id,owner)", 456
+    mock_all_dependencies["mock_biwenger"].get_manager_squads.assert_called_once_with(
+        "https://biwenger.as.com/api/v2/user/{manager_id}?fields=players(id,owner)",
+        [123, 456],
+        max_workers=config.SQUAD_FETCH_WORKERS,
     )
     mock_all_dependencies["mock_biwenger"].get_market_players.assert_called_once()
 
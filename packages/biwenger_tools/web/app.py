@@ -1,9 +1,5 @@
 import os
-import pytz
 import ssl
-from collections import defaultdict
-from datetime import datetime, timedelta
-from dateutil import parser
 from flask import (
     Flask,
     render_template,
@@ -17,13 +13,23 @@ from flask import (
 )
 
 from packages.biwenger_tools.web import config
+from core.domain.board_segments import delta_filename, merge_segments
+from core.domain.search_index import BoardSearchIndex
+from core.domain.season_archive import archive_filename, read_season_archive
 from core.sdk.gcp import (
+    DriveCsvCache,
+    DriveFolderIndex,
+    SheetsDataCache,
+    download_file_from_drive,
     get_google_service,
-    find_file_on_drive,
-    download_csv_as_dict,
-    get_sheets_data,
 )
-from core.utils import get_file_metadata
+from packages.biwenger_tools.web.logic.season import (
+    CATEGORIAS,
+    SeasonSnapshot,
+    build_palmares,
+    build_participation_stats,
+)
+from core.utils import get_file_metadata, get_file_status
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = config.SECRET_KEY
@@ -50,6 +56,134 @@ except Exception as e:
     # Log critical error if services fail to initialize
     print(f"CRITICAL ERROR: No se pudieron inicializar los servicios de Google: {e}")
 
+# Metadata de todos los archivos de la carpeta de Drive, pedida con un único listado
+# y compartida por las rutas y el panel de administración.
+drive_index = DriveFolderIndex(ttl_seconds=config.DRIVE_INDEX_TTL_SECONDS)
+
+# Caché compartida por todas las rutas: evita descargar y parsear los CSV de Drive
+# en cada visita mientras el archivo no cambie.
+csv_cache = DriveCsvCache(
+    ttl_seconds=config.DRIVE_CACHE_TTL_SECONDS,
+    max_entries=config.DRIVE_CACHE_MAX_ENTRIES,
+    folder_index=drive_index,
+)
+
+# Ligas especiales y trofeos ya procesados, compartidos por /reglamento y la API
+sheets_cache = SheetsDataCache(ttl_seconds=config.SHEETS_CACHE_TTL_SECONDS)
+
+
+def load_drive_data(filename, build):
+    """
+    Devuelve la estructura precalculada por 'build' a partir de un CSV de Drive.
+    Se calcula una única vez por versión del archivo gracias a la caché.
+    """
+    if not drive_service:
+        raise Exception("El servicio de Google Drive no está disponible.")
+
+    data = csv_cache.get_derived(
+        drive_service, filename, config.GDRIVE_FOLDER_ID, build
+    )
+    if data is None:
+        raise FileNotFoundError(
+            f"El archivo '{filename}' no se encontró en Google Drive."
+        )
+    return data
+
+
+# Campos de cada mensaje que se exponen en la API JSON
+MESSAGE_API_FIELDS = ("fecha", "autor", "titulo", "contenido")
+
+
+def build_season_snapshot(segments):
+    """
+    Construye la vista precalculada de la temporada a partir del CSV base y su
+    delta (los mensajes llegados desde la última compactación).
+    """
+    base_rows, delta_rows = segments
+    return SeasonSnapshot(
+        merge_segments(base_rows, delta_rows), config.MESSAGES_PER_PAGE
+    )
+
+
+def download_season_archive(service, file_id):
+    """
+    Descarga el archivo comprimido de la temporada. Si no se puede leer devuelve
+    None, que queda en caché para esa versión del fichero y hace que se use el CSV.
+    """
+    try:
+        return read_season_archive(download_file_from_drive(service, file_id))
+    except Exception as e:
+        print(f"⚠️  No se pudo leer el archivo comprimido de la temporada: {e}")
+        return None
+
+
+def load_season_snapshot(season):
+    """Devuelve la vista precalculada de los comunicados de una temporada."""
+    if not drive_service:
+        raise Exception("El servicio de Google Drive no está disponible.")
+
+    filename = f"{config.COMUNICADOS_FILENAME_BASE}_{season}.csv"
+    # Se prefiere el archivo comprimido (menos bytes y sin parsear CSV); si no está
+    # publicado o no se puede leer, se usa el CSV base
+    snapshot = csv_cache.get_segments_derived(
+        drive_service,
+        [archive_filename(filename), delta_filename(filename)],
+        config.GDRIVE_FOLDER_ID,
+        build_season_snapshot,
+        loads=[download_season_archive, None],
+    )
+    if snapshot is None:
+        snapshot = csv_cache.get_segments_derived(
+            drive_service,
+            [filename, delta_filename(filename)],
+            config.GDRIVE_FOLDER_ID,
+            build_season_snapshot,
+        )
+    if snapshot is None:
+        raise FileNotFoundError(
+            f"El archivo '{filename}' no se encontró en Google Drive."
+        )
+    return snapshot
+
+
+def download_search_index(service, file_id):
+    """
+    Descarga el índice de búsqueda publicado por el scraper. Si no se puede leer
+    devuelve None, que queda en caché para esa versión del fichero: mientras no
+    cambie, las búsquedas usan el índice local sin volver a descargarlo.
+    """
+    try:
+        content = download_file_from_drive(service, file_id).decode("utf-8")
+        return BoardSearchIndex.from_json(content)
+    except Exception as e:
+        print(f"⚠️  No se pudo leer el índice de búsqueda: {e}")
+        return None
+
+
+def load_search_index(season):
+    """
+    Devuelve el índice de búsqueda de la temporada, o None si no está publicado
+    o no se puede leer (en ese caso se busca con un índice construido localmente).
+    """
+    filename = (
+        f"{config.COMUNICADOS_FILENAME_BASE}_{season}{config.SEARCH_INDEX_SUFFIX}"
+    )
+    try:
+        return csv_cache.get_rows(
+            drive_service, filename, config.GDRIVE_FOLDER_ID, load=download_search_index
+        )
+    except Exception as e:
+        print(f"⚠️  No se pudo cargar el índice de búsqueda '{filename}': {e}")
+        return None
+
+
+def search_season(categoria, query):
+    """Devuelve los mensajes de una categoría, filtrados por la búsqueda si la hay."""
+    snapshot = load_season_snapshot(g.season)
+    if not query:
+        return snapshot, snapshot.messages(categoria)
+    return snapshot, snapshot.search(categoria, query, load_search_index(g.season))
+
 
 # --- REQUEST HANDLERS ---
 @app.before_request
@@ -106,34 +240,12 @@ def comunicados(season):
     paginated_messages = []
     page = 1
     total_pages = 1
-    comunicados_only = []
     try:
-        if not drive_service:
-            raise Exception("El servicio de Google Drive no está disponible.")
-
-        filename = f"{config.COMUNICADOS_FILENAME_BASE}_{g.season}.csv"
-        file_metadata = find_file_on_drive(
-            drive_service, filename, config.GDRIVE_FOLDER_ID
-        )
-        if not file_metadata:
-            raise FileNotFoundError(
-                f"El archivo '{filename}' no se encontró en Google Drive."
-            )
-
-        all_messages = download_csv_as_dict(drive_service, file_metadata["id"])
-
-        comunicados_only = [
-            m for m in all_messages if m.get("categoria", "").strip() == "comunicado"
-        ]
+        snapshot = load_season_snapshot(g.season)
 
         page = request.args.get("page", 1, type=int)
-        start = (page - 1) * config.MESSAGES_PER_PAGE
-        end = start + config.MESSAGES_PER_PAGE
-
-        paginated_messages = comunicados_only[start:end]
-        total_pages = (
-            len(comunicados_only) + config.MESSAGES_PER_PAGE - 1
-        ) // config.MESSAGES_PER_PAGE
+        paginated_messages = snapshot.page("comunicado", page)
+        total_pages = snapshot.total_pages["comunicado"]
     except ssl.SSLError as e:
         error = f"Error de SSL al conectar con Google Drive. Puede ser un problema con tu red o certificados locales. ({e})"
         print(error)
@@ -144,7 +256,6 @@ def comunicados(season):
     return render_template(
         "index.html",
         messages=paginated_messages,
-        all_comunicados=comunicados_only,
         error=error,
         active_page="comunicados",
         current_page=page,
@@ -155,6 +266,58 @@ def comunicados(season):
     )
 
 
+@app.route("/api/<season>/comunicados")
+def api_comunicados(season):
+    """
+    Devuelve en JSON una página de comunicados. Si se indica 'q', la página
+    corresponde a los resultados de la búsqueda en el índice de la temporada.
+    """
+    query = request.args.get("q", "").strip()
+    page = request.args.get("page", 1, type=int)
+    try:
+        snapshot, results = search_season("comunicado", query)
+    except Exception as e:
+        error = f"Ocurrió un error al buscar en los comunicados de la temporada {g.season}: {e}"
+        print(error)
+        return jsonify({"error": error}), 500
+
+    messages = [
+        {field: message.get(field, "") for field in MESSAGE_API_FIELDS}
+        for message in snapshot.paginate(results, page)
+    ]
+    return jsonify(
+        {
+            "messages": messages,
+            "page": page,
+            "total_pages": snapshot.count_pages(len(results)),
+            "total": len(results),
+        }
+    )
+
+
+@app.route("/api/<season>/salseo")
+def api_salseo(season):
+    """Devuelve en JSON los mensajes de una sección de salseo que coinciden con 'q'."""
+    categoria = request.args.get("categoria", "cronica")
+    query = request.args.get("q", "").strip()
+    if categoria not in CATEGORIAS or categoria == "comunicado":
+        return jsonify({"error": f"Categoría no válida: {categoria}"}), 400
+    try:
+        _, results = search_season(categoria, query)
+    except Exception as e:
+        error = (
+            f"Ocurrió un error al buscar en el salseo de la temporada {g.season}: {e}"
+        )
+        print(error)
+        return jsonify({"error": error}), 500
+
+    messages = [
+        {field: message.get(field, "") for field in MESSAGE_API_FIELDS}
+        for message in results
+    ]
+    return jsonify({"messages": messages, "total": len(messages)})
+
+
 @app.route("/<season>/salseo")
 def salseo(season):
     """Displays various categories of content for a given season."""
@@ -163,29 +326,10 @@ def salseo(season):
     cesiones = []
     cronicas = []
     try:
-        if not drive_service:
-            raise Exception("El servicio de Google Drive no está disponible.")
-
-        filename = f"{config.COMUNICADOS_FILENAME_BASE}_{g.season}.csv"
-        file_metadata = find_file_on_drive(
-            drive_service, filename, config.GDRIVE_FOLDER_ID
-        )
-        if not file_metadata:
-            raise FileNotFoundError(
-                f"El archivo '{filename}' no se encontró en Google Drive."
-            )
-
-        all_messages = download_csv_as_dict(drive_service, file_metadata["id"])
-
-        datos_curiosos = [
-            m for m in all_messages if m.get("categoria", "").strip() == "dato"
-        ]
-        cesiones = [
-            m for m in all_messages if m.get("categoria", "").strip() == "cesion"
-        ]
-        cronicas = [
-            m for m in all_messages if m.get("categoria", "").strip() == "cronica"
-        ]
+        snapshot = load_season_snapshot(g.season)
+        datos_curiosos = snapshot.messages("dato")
+        cesiones = snapshot.messages("cesion")
+        cronicas = snapshot.messages("cronica")
     except ssl.SSLError as e:
         error = f"Error de SSL al conectar con Google Drive. Puede ser un problema con tu red o certificados locales. ({e})"
         print(error)
@@ -212,50 +356,8 @@ def participacion(season):
     error = None
     stats = []
     try:
-        if not drive_service:
-            raise Exception("El servicio de Google Drive no está disponible.")
-
         filename = f"{config.PARTICIPACION_FILENAME_BASE}_{g.season}.csv"
-        file_metadata = find_file_on_drive(
-            drive_service, filename, config.GDRIVE_FOLDER_ID
-        )
-        if not file_metadata:
-            raise FileNotFoundError(
-                f"El archivo '{filename}' no se encontró en Google Drive."
-            )
-
-        participation_data = download_csv_as_dict(drive_service, file_metadata["id"])
-
-        for row in participation_data:
-            comunicados_count = (
-                len(row.get("comunicados", "").split(";"))
-                if row.get("comunicados")
-                else 0
-            )
-            datos_count = (
-                len(row.get("datos", "").split(";")) if row.get("datos") else 0
-            )
-            cesiones_count = (
-                len(row.get("cesiones", "").split(";")) if row.get("cesiones") else 0
-            )
-            cronicas_count = (
-                len(row.get("cronicas", "").split(";")) if row.get("cronicas") else 0
-            )
-
-            stats.append(
-                {
-                    "autor": row["autor"],
-                    "comunicados": comunicados_count,
-                    "datos": datos_count,
-                    "cesiones": cesiones_count,
-                    "cronicas": cronicas_count,
-                    "total": comunicados_count
-                    + datos_count
-                    + cesiones_count
-                    + cronicas_count,
-                }
-            )
-        stats.sort(key=lambda item: item["total"], reverse=True)
+        stats = load_drive_data(filename, build_participation_stats)
     except ssl.SSLError as e:
         error = f"Error de SSL al conectar con Google Drive. Puede ser un problema con tu red o certificados locales. ({e})"
         print(error)
@@ -307,7 +409,7 @@ def api_lloros_ligas():
     try:
         sheet_id = config.LIGAS_ESPECIALES_SHEETS.get(g.season)
         if sheet_id:
-            leagues = get_sheets_data(sheets_service, sheet_id)
+            leagues = sheets_cache.get(sheets_service, sheet_id)
     except Exception as e:
         error = f"Ocurrió un error al cargar las ligas especiales: {e}"
         print(error)
@@ -321,7 +423,7 @@ def api_lloros_trofeos():
     try:
         sheet_id = config.TROFEOS_SHEETS.get(g.season)
         if sheet_id:
-            trofeos = get_sheets_data(sheets_service, sheet_id)
+            trofeos = sheets_cache.get(sheets_service, sheet_id)
     except Exception as e:
         error = f"Ocurrió un error al cargar los trofeos: {e}"
         print(error)
@@ -334,41 +436,16 @@ def api_lloros_trofeos():
 @app.route("/palmares")
 def palmares():
     """Displays historical records and awards."""
-    seasons = defaultdict(lambda: defaultdict(list))
     error = None
+    sorted_seasons = []
     try:
-        if not drive_service:
-            raise Exception("El servicio de Google Drive no está disponible.")
-
-        file_metadata = find_file_on_drive(
-            drive_service, config.PALMARES_FILENAME, config.GDRIVE_FOLDER_ID
-        )
-        if not file_metadata:
-            raise FileNotFoundError(
-                f"El archivo '{config.PALMARES_FILENAME}' no se encontró en Google Drive."
-            )
-
-        palmares_data = download_csv_as_dict(drive_service, file_metadata["id"])
-
-        for row in palmares_data:
-            season_data = row.get("temporada", "").strip()
-            category = row.get("categoria", "").strip()
-            value = row.get("valor", "").strip()
-
-            if not season_data or not category:
-                continue
-            if category in ["multa", "sancion", "farolillo"]:
-                seasons[season_data]["otros"].append({"tipo": category, "valor": value})
-            else:
-                seasons[season_data][category] = value
-        sorted_seasons = sorted(seasons.items(), key=lambda item: item[0], reverse=True)
+        sorted_seasons = load_drive_data(config.PALMARES_FILENAME, build_palmares)
     except ssl.SSLError as e:
         error = f"Error de SSL al conectar con Google Drive. Puede ser un problema con tu red o certificados locales. ({e})"
         print(error)
     except Exception as e:
         error = f"Ocurrió un error al cargar el palmarés: {e}"
         print(error)
-        sorted_seasons = []
 
     return render_template(
         "palmares.html",
@@ -390,7 +467,7 @@ def reglamento():
         if sheets_service:
             sheet_id = config.LIGAS_ESPECIALES_SHEETS.get(g.season)
             if sheet_id:
-                leagues = get_sheets_data(sheets_service, sheet_id)
+                leagues = sheets_cache.get(sheets_service, sheet_id)
     except ssl.SSLError as e:
         error = f"Error de SSL al conectar con Google Sheets. Puede ser un problema con tu red o certificados locales. ({e})"
         print(error)
@@ -426,41 +503,39 @@ def admin():
 
             filenames_to_check = [
                 comunicados_actual,
+                delta_filename(comunicados_actual),
+                archive_filename(comunicados_actual),
                 participacion_actual,
                 config.PALMARES_FILENAME,
             ]
-            dynamic_files = [comunicados_actual, participacion_actual]
+            dynamic_files = [
+                comunicados_actual,
+                archive_filename(comunicados_actual),
+                participacion_actual,
+            ]
 
-            # Correctly call the imported function with all required arguments
+            # Una única llamada a Drive (batch) trae la carpeta completa y el Sheet
+            sheet_id = config.LIGAS_ESPECIALES_SHEETS.get(g.season)
+            files_by_name, files_by_id = drive_index.get(
+                drive_service, config.GDRIVE_FOLDER_ID, [sheet_id] if sheet_id else []
+            )
             file_statuses = get_file_metadata(
                 drive_service,
                 config.GDRIVE_FOLDER_ID,
                 filenames_to_check,
                 dynamic_files,
+                files_by_name,
             )
 
-            sheet_id = config.LIGAS_ESPECIALES_SHEETS.get(g.season)
             if sheet_id:
-                sheet_metadata = (
-                    drive_service.files()
-                    .get(fileId=sheet_id, fields="name, modifiedTime")
-                    .execute()
+                sheet_metadata = files_by_id.get(sheet_id)
+                sheet_name = (
+                    f"{sheet_metadata['name']} (Sheet)"
+                    if sheet_metadata
+                    else "Ligas especiales (Sheet)"
                 )
-                dt_utc = parser.isoparse(sheet_metadata["modifiedTime"])
-                dt_madrid = dt_utc.astimezone(pytz.timezone("Europe/Madrid"))
-                formatted_date = dt_madrid.strftime("%d-%m-%Y a las %H:%M:%S")
-
-                is_stale = (
-                    datetime.now(pytz.timezone("Europe/Madrid")) - dt_madrid
-                ) > timedelta(days=7)
-
                 file_statuses.append(
-                    {
-                        "name": f"{sheet_metadata['name']} (Sheet)",
-                        "status": "Encontrado",
-                        "last_updated": formatted_date,
-                        "is_stale": is_stale,
-                    }
+                    get_file_status(sheet_name, sheet_metadata, check_stale=True)
                 )
 
         except ssl.SSLError as e:
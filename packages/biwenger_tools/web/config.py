@@ -48,7 +48,17 @@ ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 # --- CONFIGURACIÓN NO CRÍTICA (valores fijos) ---
 MESSAGES_PER_PAGE = 7
 
+# Caché en memoria de los CSV de Drive (por worker)
+DRIVE_CACHE_TTL_SECONDS = int(os.getenv("DRIVE_CACHE_TTL_SECONDS", "300"))
+DRIVE_CACHE_MAX_ENTRIES = 16
+# Caché en memoria de los Google Sheets ya procesados (ligas especiales y trofeos)
+SHEETS_CACHE_TTL_SECONDS = int(os.getenv("SHEETS_CACHE_TTL_SECONDS", "300"))
+# Vigencia del listado de la carpeta de Drive con la metadata de todos los archivos
+DRIVE_INDEX_TTL_SECONDS = int(os.getenv("DRIVE_INDEX_TTL_SECONDS", "60"))
+
 # Nombres base de los archivos. La temporada se añadirá dinámicamente.
 COMUNICADOS_FILENAME_BASE = "comunicados"
 PARTICIPACION_FILENAME_BASE = "participacion"
 PALMARES_FILENAME = "palmares.csv"
+# Índice de búsqueda que publica el scraper junto al CSV de comunicados
+SEARCH_INDEX_SUFFIX = "_index.json"
@@ -0,0 +1,130 @@
+import threading
+from collections import defaultdict
+
+from core.domain.search_index import BoardSearchIndex
+
+CATEGORIAS = ("comunicado", "dato", "cesion", "cronica")
+
+# Columnas del CSV de participación -> categoría que cuentan
+PARTICIPACION_COLUMNAS = ("comunicados", "datos", "cesiones", "cronicas")
+
+PALMARES_OTROS = ("multa", "sancion", "farolillo")
+
+
+class SeasonSnapshot:
+    """
+    Vista precalculada de los mensajes de una temporada.
+    Se construye una sola vez por versión del CSV de comunicados, de modo que
+    cada petición solo tiene que recortar la página que va a mostrar.
+    """
+
+    def __init__(self, messages, per_page):
+        self.per_page = per_page
+        self.messages_all = messages
+        self.by_category = {categoria: [] for categoria in CATEGORIAS}
+        for message in messages:
+            categoria = message.get("categoria", "").strip()
+            self.by_category.setdefault(categoria, []).append(message)
+        # id_hash -> posición dentro de su categoría, para montar los resultados
+        # de búsqueda a partir de los ids encontrados sin recorrer la temporada
+        self.positions = {
+            categoria: {
+                m["id_hash"]: position
+                for position, m in enumerate(items)
+                if m.get("id_hash")
+            }
+            for categoria, items in self.by_category.items()
+        }
+
+        self.total_pages = {
+            categoria: self.count_pages(len(items))
+            for categoria, items in self.by_category.items()
+        }
+        self._local_index = None
+        self._coverage = (None, False)
+        self._lock = threading.Lock()
+
+    def messages(self, categoria):
+        """Devuelve todos los mensajes de una categoría."""
+        return self.by_category.get(categoria, [])
+
+    def count_pages(self, total):
+        """Número de páginas necesarias para mostrar 'total' mensajes."""
+        return (total + self.per_page - 1) // self.per_page
+
+    def paginate(self, items, page):
+        """Recorta la página indicada (empezando en 1) de una lista de mensajes."""
+        if page < 1:
+            return []
+        start = (page - 1) * self.per_page
+        return items[start : start + self.per_page]
+
+    def page(self, categoria, page):
+        """Devuelve los mensajes de una página de una categoría."""
+        return self.paginate(self.messages(categoria), page)
+
+    def _covered_by(self, index):
+        """Indica si el índice contiene todos los mensajes de esta versión del CSV."""
+        with self._lock:
+            checked_index, covered = self._coverage
+            if checked_index is not index:
+                covered = all(m.get("id_hash") in index for m in self.messages_all)
+                self._coverage = (index, covered)
+        return covered
+
+    def _fallback_index(self):
+        """Índice construido a partir del propio CSV, solo la primera vez que se usa."""
+        with self._lock:
+            if self._local_index is None:
+                self._local_index = BoardSearchIndex.from_messages(self.messages_all)
+        return self._local_index
+
+    def search(self, categoria, query, index=None):
+        """
+        Busca en los mensajes de una categoría con el índice publicado por el
+        scraper. Si no hay índice o no cubre todos los mensajes del CSV (por
+        ejemplo, si se subió antes que el CSV), se usa uno construido localmente.
+        """
+        if index is None or not self._covered_by(index):
+            index = self._fallback_index()
+        positions = self.positions.get(categoria, {})
+        found = sorted(
+            positions[id_hash]
+            for id_hash in index.search(query)
+            if id_hash in positions
+        )
+        items = self.messages(categoria)
+        return [items[position] for position in found]
+
+
+def build_participation_stats(rows):
+    """
+    Calcula las estadísticas de participación a partir del CSV de participación,
+    ordenadas de mayor a menor número total de mensajes.
+    """
+    stats = []
+    for row in rows:
+        counts = {
+            columna: len(row[columna].split(";")) if row.get(columna) else 0
+            for columna in PARTICIPACION_COLUMNAS
+        }
+        stats.append({"autor": row["autor"], **counts, "total": sum(counts.values())})
+    stats.sort(key=lambda item: item["total"], reverse=True)
+    return stats
+
+
+def build_palmares(rows):
+    """Agrupa el palmarés por temporada, de la más reciente a la más antigua."""
+    seasons = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        season_data = row.get("temporada", "").strip()
+        category = row.get("categoria", "").strip()
+        value = row.get("valor", "").strip()
+
+        if not season_data or not category:
+            continue
+        if category in PALMARES_OTROS:
+            seasons[season_data]["otros"].append({"tipo": category, "valor": value})
+        else:
+            seasons[season_data][category] = value
+    return sorted(seasons.items(), key=lambda item: item[0], reverse=True)
@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import MagicMock
+from packages.biwenger_tools.web.logic.season import (
+    SeasonSnapshot,
+    build_palmares,
+    build_participation_stats,
+)
+
+
+@pytest.fixture
+def messages():
+    """Mensajes de ejemplo con varias categorías."""
+    return [
+        {"categoria": "comunicado", "titulo": f"C{i}", "autor": "Autor1"}
+        for i in range(1, 6)
+    ] + [
+        {"categoria": "dato ", "titulo": "D1", "autor": "Autor2"},
+        {"categoria": "cronica", "titulo": "CR1", "autor": "Autor1"},
+    ]
+
+
+def test_season_snapshot_partitions_by_category(messages):
+    """Verifica que los mensajes se reparten por categoría ignorando espacios."""
+    snapshot = SeasonSnapshot(messages, per_page=2)
+    assert [m["titulo"] for m in snapshot.messages("dato")] == ["D1"]
+    assert [m["titulo"] for m in snapshot.messages("cronica")] == ["CR1"]
+    assert snapshot.messages("cesion") == []
+    assert snapshot.messages("inexistente") == []
+
+
+def test_season_snapshot_pages(messages):
+    """Verifica el cálculo de páginas y el recorte de cada una."""
+    snapshot = SeasonSnapshot(messages, per_page=2)
+    assert snapshot.total_pages["comunicado"] == 3
+    assert snapshot.total_pages["cesion"] == 0
+    assert [m["titulo"] for m in snapshot.page("comunicado", 1)] == ["C1", "C2"]
+    assert [m["titulo"] for m in snapshot.page("comunicado", 3)] == ["C5"]
+    assert snapshot.page("comunicado", 4) == []
+    assert snapshot.page("comunicado", 0) == []
+
+
+def test_build_participation_stats():
+    """Verifica el conteo de IDs por columna y el orden por total."""
+    rows = [
+        {
+            "autor": "A",
+            "comunicados": "c1",
+            "datos": "",
+            "cesiones": "",
+            "cronicas": "",
+        },
+        {"autor": "B", "comunicados": "c2;c3", "datos": "d1", "cesiones": ""},
+    ]
+    stats = build_participation_stats(rows)
+    assert [s["autor"] for s in stats] == ["B", "A"]
+    assert stats[0]["comunicados"] == 2
+    assert stats[0]["cronicas"] == 0
+    assert stats[0]["total"] == 3
+
+
+def test_build_palmares():
+    """Verifica la agrupación por temporada y la categoría 'otros'."""
+    rows = [
+        {"temporada": "23-24", "categoria": "multa", "valor": "20"},
+        {"temporada": "24-25", "categoria": "campeon", "valor": "Jorge"},
+        {"temporada": "", "categoria": "campeon", "valor": "Nadie"},
+    ]
+    palmares = build_palmares(rows)
+    assert [season for season, _ in palmares] == ["24-25", "23-24"]
+    assert palmares[0][1]["campeon"] == "Jorge"
+    assert palmares[1][1]["otros"] == [{"tipo": "multa", "valor": "20"}]
+
+
+def test_season_snapshot_search_keeps_category_order():
+    """Verifica que los resultados salen de las posiciones precalculadas, en su orden."""
+    messages = [
+        {"id_hash": f"h{i}", "categoria": "comunicado", "titulo": f"C{i}"}
+        for i in range(5)
+    ] + [{"id_hash": "d0", "categoria": "dato", "titulo": "D0"}]
+    index = MagicMock()
+    index.__contains__.return_value = True
+    index.search.return_value = {"h3", "h1", "d0", "desconocido"}
+
+    snapshot = SeasonSnapshot(messages, per_page=2)
+
+    assert [m["titulo"] for m in snapshot.search("comunicado", "x", index)] == [
+        "C1",
+        "C3",
+    ]
+    assert [m["titulo"] for m in snapshot.search("dato", "x", index)] == ["D0"]
@@ -1,8 +1,10 @@
 import pytest
 import os
 from unittest.mock import patch, MagicMock
-from packages.biwenger_tools.web.app import app
+from packages.biwenger_tools.web.app import app, csv_cache, drive_index, sheets_cache
 from flask import Flask
+from core.domain.search_index import BoardSearchIndex
+from core.domain.season_archive import write_season_archive
 
 # --- Configuración y Fixtures de Pytest ---
 
@@ -22,6 +24,34 @@ def mock_google_services_init():
             yield mock_get_service
 
 
+@pytest.fixture(autouse=True)
+def clear_csv_cache():
+    """Vacía las cachés de CSVs y Sheets para que cada test parta de cero."""
+    csv_cache.clear()
+    sheets_cache.clear()
+    yield
+    csv_cache.clear()
+    sheets_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def per_file_drive_lookup(monkeypatch):
+    """
+    Los tests de las rutas simulan Drive archivo a archivo con find_file_on_drive,
+    así que por defecto la caché no usa el listado de la carpeta.
+    """
+    monkeypatch.setattr(csv_cache, "folder_index", None)
+
+
+@pytest.fixture
+def folder_listing(monkeypatch):
+    """Vuelve a resolver los archivos con el listado compartido de la carpeta."""
+    monkeypatch.setattr(csv_cache, "folder_index", drive_index)
+    drive_index.clear()
+    yield drive_index
+    drive_index.clear()
+
+
 @pytest.fixture
 def client():
     """Crea un cliente de prueba para la aplicación Flask."""
@@ -124,10 +154,8 @@ def test_before_request_ignores_invalid_url(client):
 # --- Tests para las Rutas de Contenido ---
 
 
-@patch("packages.biwenger_tools.web.app.download_csv_as_dict")
-@patch(
-    "packages.biwenger_tools.web.app.find_file_on_drive", return_value={"id": "fake_id"}
-)
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
 def test_comunicados_success(
     mock_find_file, mock_download_csv, client, mock_comunicados_data
 ):
@@ -140,7 +168,7 @@ def test_comunicados_success(
     assert b"D1" not in response.data  # Verifica que solo se muestran comunicados
 
 
-@patch("packages.biwenger_tools.web.app.find_file_on_drive", return_value=None)
+@patch("core.sdk.gcp.find_file_on_drive", return_value=None)
 def test_comunicados_file_not_found(mock_find_file, client):
     """Verifica que se muestra un error si el archivo no se encuentra."""
     response = client.get("/24-25/")
@@ -150,12 +178,10 @@ def test_comunicados_file_not_found(mock_find_file, client):
 
 
 @patch(
-    "packages.biwenger_tools.web.app.download_csv_as_dict",
+    "core.sdk.gcp.download_csv_as_dict",
     side_effect=Exception("Test error"),
 )
-@patch(
-    "packages.biwenger_tools.web.app.find_file_on_drive", return_value={"id": "fake_id"}
-)
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
 def test_comunicados_general_exception(mock_find_file, mock_download_csv, client):
     """Verifica que se muestra un error en caso de excepción general."""
     response = client.get("/24-25/")
@@ -163,10 +189,220 @@ def test_comunicados_general_exception(mock_find_file, mock_download_csv, client
     assert b"Ocurri\xc3\xb3 un error al cargar los comunicados" in response.data
 
 
-@patch("packages.biwenger_tools.web.app.download_csv_as_dict")
+def find_without_delta(service, name, folder_id):
+    """Simula una carpeta de Drive en la que aún no existe el CSV delta."""
+    if "_delta" in name:
+        return None
+    return {"id": "fake_id", "modifiedTime": "2025-09-01T10:00:00Z"}
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", side_effect=find_without_delta)
+def test_comunicados_uses_cache(
+    mock_find_file, mock_download_csv, client, mock_comunicados_data
+):
+    """Verifica que visitas repetidas no vuelven a descargar el CSV de Drive."""
+    mock_download_csv.return_value = mock_comunicados_data
+    client.get("/24-25/")
+    client.get("/24-25/salseo")
+    response = client.get("/24-25/?page=1")
+    assert response.status_code == 200
+    assert b"C1" in response.data
+    # Una consulta por archivo (comprimido, base y delta) y una sola descarga
+    assert mock_find_file.call_count == 3
+    mock_download_csv.assert_called_once()
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch(
+    "core.sdk.gcp.find_file_on_drive",
+    side_effect=lambda service, name, folder_id: {"id": name, "modifiedTime": "t1"},
+)
+def test_api_comunicados_merges_delta_segment(
+    mock_find_file, mock_download_csv, client
+):
+    """Verifica que los mensajes del delta se muestran delante de los del CSV base."""
+    base = [
+        {"id_hash": "h2", "categoria": "comunicado", "titulo": "Antiguo"},
+        {"id_hash": "h1", "categoria": "comunicado", "titulo": "Más antiguo"},
+    ]
+    delta = [
+        {"id_hash": "h3", "categoria": "comunicado", "titulo": "Nuevo"},
+        # Repetido con el base, como ocurre justo después de compactar
+        {"id_hash": "h2", "categoria": "comunicado", "titulo": "Antiguo"},
+    ]
+    mock_download_csv.side_effect = lambda service, file_id: (
+        delta if "_delta" in file_id else base
+    )
+
+    response = client.get("/api/24-25/comunicados?page=1")
+
+    data = response.get_json()
+    assert [m["titulo"] for m in data["messages"]] == [
+        "Nuevo",
+        "Antiguo",
+        "Más antiguo",
+    ]
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
+def test_comunicados_does_not_embed_whole_season(
+    mock_find_file, mock_download_csv, client
+):
+    """Verifica que la página solo incluye los comunicados de la página actual."""
+    mock_download_csv.return_value = [
+        {"categoria": "comunicado", "titulo": f"Titulo{i:02d}"} for i in range(20)
+    ]
+    response = client.get("/24-25/")
+    assert b"Titulo00" in response.data
+    assert b"Titulo19" not in response.data
+
+
+@patch("packages.biwenger_tools.web.app.download_file_from_drive")
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", side_effect=find_without_delta)
+def test_api_comunicados_prefers_season_archive(
+    mock_find_file, mock_download_csv, mock_download_file, client
+):
+    """Verifica que si está publicado el archivo comprimido no se descarga el CSV."""
+    archived = [{"id_hash": "h1", "categoria": "comunicado", "titulo": "Archivado"}]
+    mock_download_file.return_value = write_season_archive(
+        archived, ["id_hash", "categoria", "titulo"]
+    )
+
+    response = client.get("/api/24-25/comunicados?page=1")
+
+    assert [m["titulo"] for m in response.get_json()["messages"]] == ["Archivado"]
+    mock_download_csv.assert_not_called()
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", side_effect=find_without_delta)
+def test_api_comunicados_paginates(
+    mock_find_file, mock_download_csv, client, mock_comunicados_data
+):
+    """Verifica que la API devuelve una página de comunicados sin búsqueda."""
+    mock_download_csv.return_value = mock_comunicados_data
+    response = client.get("/api/24-25/comunicados?page=1")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [m["titulo"] for m in data["messages"]] == ["C1", "C2", "C3"]
+    assert data["total"] == 3
+    assert data["total_pages"] == 1
+
+
+@pytest.fixture
+def mock_search_messages():
+    """Mensajes de ejemplo con 'id_hash' para las búsquedas."""
+    return [
+        {
+            "id_hash": "h1",
+            "categoria": "comunicado",
+            "titulo": "Multa",
+            "contenido": "<p>Sanción</p>",
+        },
+        {
+            "id_hash": "h2",
+            "categoria": "comunicado",
+            "titulo": "Normas",
+            "contenido": "<p>Reglas</p>",
+        },
+        {
+            "id_hash": "h3",
+            "categoria": "dato",
+            "titulo": "Sancion en datos",
+            "contenido": "",
+        },
+    ]
+
+
+@patch("packages.biwenger_tools.web.app.download_search_index")
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
+def test_api_comunicados_search(
+    mock_find_file, mock_download_csv, mock_download_index, client, mock_search_messages
+):
+    """Verifica que la API filtra los comunicados con el índice publicado."""
+    mock_download_csv.return_value = mock_search_messages
+    mock_download_index.return_value = BoardSearchIndex.from_messages(
+        mock_search_messages
+    )
+    response = client.get("/api/24-25/comunicados?q=sancion")
+    data = response.get_json()
+    assert [m["titulo"] for m in data["messages"]] == ["Multa"]
+    assert data["total"] == 1
+    mock_download_index.assert_called_once()
+
+
+@patch("packages.biwenger_tools.web.app.download_search_index")
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
+def test_api_comunicados_search_stale_index(
+    mock_find_file, mock_download_csv, mock_download_index, client, mock_search_messages
+):
+    """Verifica que se usa un índice local si el publicado no cubre todo el CSV."""
+    mock_download_csv.return_value = mock_search_messages
+    mock_download_index.return_value = BoardSearchIndex.from_messages(
+        mock_search_messages[2:]
+    )
+    response = client.get("/api/24-25/comunicados?q=reglas")
+    assert [m["titulo"] for m in response.get_json()["messages"]] == ["Normas"]
+
+
+@patch(
+    "packages.biwenger_tools.web.app.download_file_from_drive",
+    side_effect=Exception("Drive no disponible"),
+)
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
+def test_api_search_caches_unreadable_index(
+    mock_find_file, mock_download_csv, mock_download_file, client, mock_search_messages
+):
+    """Verifica que un índice ilegible no se vuelve a descargar en cada búsqueda."""
+    mock_download_csv.return_value = mock_search_messages
+    for _ in range(2):
+        response = client.get("/api/24-25/comunicados?q=reglas")
+        assert [m["titulo"] for m in response.get_json()["messages"]] == ["Normas"]
+    # Una descarga fallida del archivo comprimido y otra del índice, ambas en caché
+    assert mock_download_file.call_count == 2
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
 @patch(
-    "packages.biwenger_tools.web.app.find_file_on_drive", return_value={"id": "fake_id"}
+    "core.sdk.gcp.find_file_on_drive",
+    side_effect=lambda service, name, folder: (
+        None if name.endswith("_index.json") else {"id": "fake_id"}
+    ),
 )
+def test_api_salseo_search(
+    mock_find_file, mock_download_csv, client, mock_search_messages
+):
+    """Verifica la búsqueda en una sección de salseo sin índice publicado."""
+    mock_download_csv.return_value = mock_search_messages
+    response = client.get("/api/24-25/salseo?categoria=dato&q=sancion")
+    assert response.status_code == 200
+    assert [m["titulo"] for m in response.get_json()["messages"]] == [
+        "Sancion en datos"
+    ]
+
+
+def test_api_salseo_invalid_category(client):
+    """Verifica que se rechazan categorías que no pertenecen al salseo."""
+    response = client.get("/api/24-25/salseo?categoria=comunicado&q=multa")
+    assert response.status_code == 400
+
+
+@patch("core.sdk.gcp.find_file_on_drive", return_value=None)
+def test_api_comunicados_file_not_found(mock_find_file, client):
+    """Verifica que la API devuelve un error si el archivo no existe."""
+    response = client.get("/api/24-25/comunicados?q=multa")
+    assert response.status_code == 500
+    assert "error" in response.get_json()
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
 def test_salseo_success(
     mock_find_file, mock_download_csv, client, mock_comunicados_data
 ):
@@ -179,10 +415,8 @@ def test_salseo_success(
     assert b"C1" not in response.data
 
 
-@patch("packages.biwenger_tools.web.app.download_csv_as_dict")
-@patch(
-    "packages.biwenger_tools.web.app.find_file_on_drive", return_value={"id": "fake_id"}
-)
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
 def test_participacion_success(
     mock_find_file, mock_download_csv, client, mock_participacion_data
 ):
@@ -196,10 +430,8 @@ def test_participacion_success(
     assert b"Autor1" in response.data and b"3" in response.data
 
 
-@patch("packages.biwenger_tools.web.app.download_csv_as_dict")
-@patch(
-    "packages.biwenger_tools.web.app.find_file_on_drive", return_value={"id": "fake_id"}
-)
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive", return_value={"id": "fake_id"})
 def test_palmares_success(
     mock_find_file, mock_download_csv, client, mock_palmares_data
 ):
@@ -213,7 +445,7 @@ def test_palmares_success(
     assert b"20" in response.data
 
 
-@patch("packages.biwenger_tools.web.app.get_sheets_data")
+@patch("core.sdk.gcp.get_sheets_data")
 def test_reglamento_success(mock_get_sheets, client, mock_ligas_data):
     """Verifica que la página de reglamento se carga con datos de las ligas."""
     mock_get_sheets.return_value = mock_ligas_data
@@ -226,7 +458,7 @@ def test_reglamento_success(mock_get_sheets, client, mock_ligas_data):
 # --- Tests para Endpoints API ---
 
 
-@patch("packages.biwenger_tools.web.app.get_sheets_data")
+@patch("core.sdk.gcp.get_sheets_data")
 def test_api_lloros_ligas_success(mock_get_sheets, client, mock_ligas_data):
     """Verifica que el endpoint de ligas devuelve JSON."""
     mock_get_sheets.return_value = mock_ligas_data
@@ -236,7 +468,7 @@ def test_api_lloros_ligas_success(mock_get_sheets, client, mock_ligas_data):
     assert response.get_json() == mock_ligas_data
 
 
-@patch("packages.biwenger_tools.web.app.get_sheets_data")
+@patch("core.sdk.gcp.get_sheets_data")
 def test_api_lloros_trofeos_success(mock_get_sheets, client, mock_trofeos_data):
     """Verifica que el endpoint de trofeos devuelve JSON."""
     mock_get_sheets.return_value = mock_trofeos_data
@@ -250,6 +482,24 @@ def test_api_lloros_trofeos_success(mock_get_sheets, client, mock_trofeos_data):
 
 
 @patch("packages.biwenger_tools.web.app.config.ADMIN_PASSWORD", "test_password")
+@patch("core.sdk.gcp.get_sheets_data")
+def test_sheets_cached_across_routes(mock_get_sheets, client, mock_ligas_data):
+    """Verifica que el Sheet de ligas se lee una sola vez para reglamento y la API."""
+    mock_get_sheets.return_value = mock_ligas_data
+    with client.session_transaction() as sess:
+        sess["current_season"] = "24-25"
+    with patch.dict(
+        "packages.biwenger_tools.web.config.LIGAS_ESPECIALES_SHEETS",
+        {"24-25": "sheet123"},
+    ), patch("packages.biwenger_tools.web.app.sheets_service", MagicMock()):
+        client.get("/reglamento")
+        response = client.get("/api/lloros-awards/ligas")
+
+    assert response.get_json() == mock_ligas_data
+    mock_get_sheets.assert_called_once()
+    assert mock_get_sheets.call_args.args[1] == "sheet123"
+
+
 def test_admin_login_get_page(client):
     """Verifica que la página de login de admin se carga correctamente."""
     response = client.get("/admin")
@@ -278,20 +528,89 @@ def test_admin_login_post_fail(client):
         assert "admin_logged_in" not in sess
 
 
-@patch("packages.biwenger_tools.web.app.get_file_metadata")
-def test_admin_panel_page_loads(mock_get_metadata, client):
-    """Verifica que el panel de admin se carga cuando el usuario está logeado."""
+def drive_batch_service(folder_files, sheets=None):
+    """Servicio de Drive simulado que responde a peticiones batch con un listado."""
+    service = MagicMock()
+    sheets = sheets or {}
+
+    def new_batch_http_request(callback):
+        batch = MagicMock()
+        request_ids = []
+        batch.add.side_effect = lambda request, request_id: request_ids.append(
+            request_id
+        )
+
+        def execute():
+            for request_id in request_ids:
+                if request_id == "folder":
+                    callback(request_id, {"files": folder_files}, None)
+                else:
+                    callback(request_id, sheets[request_id[len("id:") :]], None)
+
+        batch.execute.side_effect = execute
+        return batch
+
+    service.new_batch_http_request.side_effect = new_batch_http_request
+    return service
+
+
+def test_admin_panel_page_loads(client, folder_listing):
+    """Verifica que el panel de admin se carga con una sola llamada a Drive."""
+    folder_files = [
+        {
+            "id": "c1",
+            "name": "comunicados_24-25.csv",
+            "modifiedTime": "2025-09-01T10:00:00Z",
+        },
+        {"id": "p1", "name": "palmares.csv", "modifiedTime": "2025-09-01T10:00:00Z"},
+    ]
+    sheets = {
+        "sheet123": {
+            "id": "sheet123",
+            "name": "Ligas",
+            "modifiedTime": "2025-09-01T10:00:00Z",
+        }
+    }
+    service = drive_batch_service(folder_files, sheets)
     # Simula un usuario logeado
     with client.session_transaction() as sess:
         sess["admin_logged_in"] = True
-    # Mockea la respuesta de la función que busca los archivos
-    mock_get_metadata.return_value = [
-        {"name": "comunicados_24-25.csv", "status": "Encontrado"},
-    ]
-    response = client.get("/admin")
+        sess["current_season"] = "24-25"
+    with patch("packages.biwenger_tools.web.app.drive_service", service), patch.dict(
+        "packages.biwenger_tools.web.config.LIGAS_ESPECIALES_SHEETS",
+        {"24-25": "sheet123"},
+    ):
+        response = client.get("/admin")
+        client.get("/admin")
+
     assert response.status_code == 200
-    # Aserción corregida para buscar un texto m\xc3\xa1s fiable
     assert b"comunicados_24-25.csv" in response.data
+    assert b"Ligas (Sheet)" in response.data
+    assert b"No Encontrado" in response.data
+    # Ni consultas por archivo ni la segunda visita vuelven a llamar a Drive
+    service.new_batch_http_request.assert_called_once()
+    service.files.return_value.list.return_value.execute.assert_not_called()
+
+
+@patch("core.sdk.gcp.download_csv_as_dict")
+@patch("core.sdk.gcp.find_file_on_drive")
+def test_routes_share_folder_listing(
+    mock_find_file, mock_download_csv, client, folder_listing, mock_participacion_data
+):
+    """Verifica que las rutas resuelven sus archivos con un único listado de la carpeta."""
+    mock_download_csv.return_value = mock_participacion_data
+    folder_files = [
+        {"id": "p1", "name": "participacion_24-25.csv", "modifiedTime": "t1"},
+        {"id": "p2", "name": "palmares.csv", "modifiedTime": "t1"},
+    ]
+    service = drive_batch_service(folder_files)
+    with patch("packages.biwenger_tools.web.app.drive_service", service):
+        client.get("/24-25/participacion")
+        client.get("/palmares")
+
+    service.new_batch_http_request.assert_called_once()
+    mock_find_file.assert_not_called()
+    assert [c.args[1] for c in mock_download_csv.call_args_list] == ["p1", "p2"]
 
 
 def test_logout_clears_session(client):